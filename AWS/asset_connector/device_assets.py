@@ -5,14 +5,16 @@ to OCSF Device Inventory format for asset management and security monitoring.
 """
 
 from collections.abc import Generator
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import boto3
 import pytz
 from botocore.exceptions import BotoCoreError, ClientError, NoCredentialsError
 from dateutil.parser import isoparse
 from sekoia_automation.asset_connector import AssetConnector
+from sekoia_automation.asset_connector.models.connector import DefaultAssetConnectorConfiguration
 from sekoia_automation.asset_connector.models.ocsf.base import Metadata, Product
 from sekoia_automation.asset_connector.models.ocsf.device import (
     Device,
@@ -51,14 +53,34 @@ class AwsDevice:
         self.date = date
 
 
+class AwsDeviceAssetConnectorConfiguration(DefaultAssetConnectorConfiguration):
+    """Configuration of the AWS Device Asset Connector.
+
+    Attributes:
+        regions: The regions to inventory, instead of the region of the module
+        all_regions: Inventory all the regions enabled for the account
+        role_arns: The roles to assume to inventory other accounts, along with the account of the credentials
+        max_concurrency: The maximum number of regions inventoried at the same time
+    """
+
+    regions: List[str] = []
+    all_regions: bool = False
+    role_arns: List[str] = []
+    max_concurrency: int = 8
+
+
 class AwsDeviceAssetConnector(AssetConnector):
     """Asset connector for collecting AWS EC2 instance information.
 
     This connector fetches EC2 instance data from AWS and converts it to OCSF
     Device Inventory format for asset management and security monitoring.
+
+    When several regions or accounts are configured, they are inventoried concurrently
+    and the devices of each region are yielded as soon as the region is completed.
     """
 
     module: AWSModule
+    configuration: AwsDeviceAssetConnectorConfiguration
 
     PRODUCT_NAME: str = "AWS EC2"
     OCSF_VERSION: str = "1.6.0"
@@ -135,6 +157,66 @@ class AwsDeviceAssetConnector(AssetConnector):
             self.log_exception(e)
             raise
 
+    def session(self, role_arn: Optional[str] = None) -> boto3.Session:
+        """Create an AWS session, for the account of the credentials or for an assumed role.
+
+        Args:
+            role_arn: The ARN of the role to assume, if any
+
+        Returns:
+            A configured boto3 session
+        """
+        session = boto3.Session(
+            aws_access_key_id=self.module.configuration.aws_access_key,
+            aws_secret_access_key=self.module.configuration.aws_secret_access_key,
+            region_name=self.module.configuration.aws_region_name,
+        )
+        if not role_arn:
+            return session
+
+        credentials = session.client("sts").assume_role(
+            RoleArn=role_arn, RoleSessionName="sekoiaio-aws-device-assets"
+        )["Credentials"]
+        return boto3.Session(
+            aws_access_key_id=credentials["AccessKeyId"],
+            aws_secret_access_key=credentials["SecretAccessKey"],
+            aws_session_token=credentials["SessionToken"],
+            region_name=self.module.configuration.aws_region_name,
+        )
+
+    @property
+    def is_multi_region(self) -> bool:
+        """Check if several regions or accounts are inventoried.
+
+        Returns:
+            True if the inventory spans several regions or accounts
+        """
+        return bool(self.configuration.regions or self.configuration.all_regions or self.configuration.role_arns)
+
+    def _regional_clients(self) -> List[Tuple[str, str, Any]]:
+        """Create an EC2 client for each region of each account to inventory.
+
+        The clients are created upfront, as the creation of clients from a session is not thread-safe.
+
+        Returns:
+            List of tuples with the account (the assumed role, or "default"), the region and the client
+        """
+        clients = []
+
+        for role_arn in [None, *self.configuration.role_arns]:
+            session = self.session(role_arn)
+
+            regions = list(self.configuration.regions)
+            if self.configuration.all_regions:
+                # only the regions enabled for the account are returned
+                response = session.client("ec2").describe_regions(AllRegions=False)
+                regions = [region["RegionName"] for region in response.get("Regions", [])]
+
+            for region in regions or [self.module.configuration.aws_region_name]:
+                clients.append((role_arn or "default", region, session.client("ec2", region_name=region)))
+
+        return clients
+
     def _extract_network_interfaces(self, interfaces: List[Dict[str, Any]]) -> List[NetworkInterface]:
         """Extract network interface information from EC2 instance data.
 
@@ -277,9 +359,6 @@ class AwsDeviceAssetConnector(AssetConnector):
         self.log("Starting AWS device collection...", level="info")
 
         try:
-            paginator = self.client().get_paginator("describe_instances")
-            page_iterator = paginator.paginate()
-
             # Parse the date filter for incremental collection
             date_filter: Optional[datetime] = None
             if self.most_recent_date_seen:
@@ -289,29 +368,15 @@ class AwsDeviceAssetConnector(AssetConnector):
                     self.log(f"Invalid date format in checkpoint: {self.most_recent_date_seen}", level="warning")
                     self.log_exception(e)
 
+            if self.is_multi_region:
+                batches = self._get_regional_devices(date_filter)
+            else:
+                batches = self._get_devices(self.client(), date_filter)
+
             device_count = 0
-            for page in page_iterator:
-                devices = []
-
-                for reservation in page.get("Reservations", []):
-                    # Extract owner ID from reservation for organization info
-                    owner_id = reservation.get("OwnerId")
-
-                    for instance in reservation.get("Instances", []):
-                        try:
-                            # Extract device information with proper error handling
-                            device = self._extract_device_from_instance(instance, date_filter, owner_id)
-                            if device:
-                                devices.append(device)
-                                device_count += 1
-                        except Exception as e:
-                            instance_id = instance.get("InstanceId", "unknown")
-                            self.log(f"Failed to process instance {instance_id}: {str(e)}", level="error")
-                            self.log_exception(e)
-                            continue
-
-                if devices:
-                    yield devices
+            for devices in batches:
+                device_count += len(devices)
+                yield devices
 
             self.log(f"Successfully collected {device_count} AWS devices", level="info")
 
@@ -329,6 +394,82 @@ class AwsDeviceAssetConnector(AssetConnector):
             self.log_exception(e)
             raise
 
+    def _get_devices(self, client: Any, date_filter: Optional[datetime]) -> Generator[List[AwsDevice], None, None]:
+        """Fetch the EC2 instances of a client and convert them to AwsDevice objects, page by page.
+
+        The date filter is applied on the client side: the `launch-time` filter of EC2 doesn't support ranges.
+
+        Args:
+            client: The EC2 client of the region
+            date_filter: Optional date filter for incremental collection
+
+        Yields:
+            Lists of AwsDevice objects representing EC2 instances
+        """
+        paginator = client.get_paginator("describe_instances")
+        page_iterator = paginator.paginate(PaginationConfig={"PageSize": 1000})
+
+        for page in page_iterator:
+            devices = []
+
+            for reservation in page.get("Reservations", []):
+                # Extract owner ID from reservation for organization info
+                owner_id = reservation.get("OwnerId")
+
+                for instance in reservation.get("Instances", []):
+                    try:
+                        # Extract device information with proper error handling
+                        device = self._extract_device_from_instance(instance, date_filter, owner_id)
+                        if device:
+                            devices.append(device)
+                    except Exception as e:
+                        instance_id = instance.get("InstanceId", "unknown")
+                        self.log(f"Failed to process instance {instance_id}: {str(e)}", level="error")
+                        self.log_exception(e)
+                        continue
+
+            if devices:
+                yield devices
+
+    def _get_regional_devices(self, date_filter: Optional[datetime]) -> Generator[List[AwsDevice], None, None]:
+        """Fetch the EC2 instances of all the regions and accounts concurrently.
+
+        The devices of a region are yielded once the region is completed. A failing region doesn't
+        stop the others; the first error is raised once all the regions are completed.
+
+        Args:
+            date_filter: Optional date filter for incremental collection
+
+        Yields:
+            Lists of AwsDevice objects representing EC2 instances
+        """
+        errors: List[Exception] = []
+        executor = ThreadPoolExecutor(max_workers=self.configuration.max_concurrency)
+
+        try:
+            futures = {
+                executor.submit(lambda client: list(self._get_devices(client, date_filter)), client): (account, region)
+                for account, region, client in self._regional_clients()
+            }
+
+            for future in as_completed(futures):
+                account, region = futures[future]
+                try:
+                    batches = future.result()
+                except Exception as e:
+                    self.log(f"Failed to collect the devices of region {region} ({account}): {str(e)}", level="error")
+                    self.log_exception(e)
+                    errors.append(e)
+                    continue
+
+                self.log(f"Collected the devices of region {region} ({account})", level="debug")
+                yield from batches
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        if errors:
+            raise errors[0]
+
     def _extract_device_from_instance(
         self, instance: Dict[str, Any], date_filter: Optional[datetime], owner_id: Optional[str] = None
     ) -> Optional[AwsDevice]:
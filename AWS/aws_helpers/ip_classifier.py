@@ -0,0 +1,216 @@
+"""Classification of IP addresses as private or public."""
+
+import bisect
+import ipaddress
+import socket
+from collections import OrderedDict
+from collections.abc import Iterable, Sequence
+from threading import Lock
+from typing import Any
+
+import numpy
+
+# The networks considered as private by `ipaddress`
+PRIVATE_NETWORKS: Sequence[str] = (
+    "0.0.0.0/8",
+    "10.0.0.0/8",
+    "127.0.0.0/8",
+    "169.254.0.0/16",
+    "172.16.0.0/12",
+    "192.0.0.0/29",
+    "192.0.0.170/31",
+    "192.0.2.0/24",
+    "192.168.0.0/16",
+    "198.18.0.0/15",
+    "198.51.100.0/24",
+    "203.0.113.0/24",
+    "240.0.0.0/4",
+    "255.255.255.255/32",
+    "::1/128",
+    "::/128",
+    "::ffff:0:0/96",
+    "100::/64",
+    "2001::/23",
+    "2001:2::/48",
+    "2001:db8::/32",
+    "2001:10::/28",
+    "fc00::/7",
+    "fe80::/10",
+)
+
+# ::ffff:0:0/96
+IPV4_MAPPED_PREFIX = 0xFFFF
+
+DEFAULT_CACHE_SIZE = 65536
+
+
+def _merge_ranges(ranges: Iterable[tuple[int, int]]) -> tuple[list[int], list[int]]:
+    starts: list[int] = []
+    ends: list[int] = []
+    for start, end in sorted(ranges):
+        if ends and start <= ends[-1] + 1:
+            ends[-1] = max(ends[-1], end)
+        else:
+            starts.append(start)
+            ends.append(end)
+
+    return starts, ends
+
+
+def parse_ip(value: Any) -> tuple[int, int] | None:
+    """
+    Pack an IP address into an integer.
+
+    Args:
+        value: Any
+
+    Returns:
+        tuple[int, int] | None: the version and the integer value of the address, None if the value is not an IP
+    """
+    if isinstance(value, str):
+        for family, version in ((socket.AF_INET, 4), (socket.AF_INET6, 6)):
+            try:
+                return version, int.from_bytes(socket.inet_pton(family, value), "big")
+            except OSError:
+                pass
+
+    # the slow path, for the less common notations (integers, scoped IPv6 addresses, ...)
+    try:
+        address = ipaddress.ip_address(value)
+    except ValueError:
+        return None
+
+    return address.version, int(address)
+
+
+class IPClassifier:
+    """
+    Classify IP addresses as private or public.
+
+    The addresses are packed into integers and compared with the sorted ranges of the private networks,
+    a whole batch at a time. The classification of the recent addresses is kept in a LRU.
+    """
+
+    def __init__(self, networks: Sequence[str] = PRIVATE_NETWORKS, cache_size: int = DEFAULT_CACHE_SIZE) -> None:
+        ranges: dict[int, list[tuple[int, int]]] = {4: [], 6: []}
+        for network in map(ipaddress.ip_network, networks):
+            ranges[network.version].append((int(network.network_address), int(network.broadcast_address)))
+
+        ipv4_starts, ipv4_ends = _merge_ranges(ranges[4])
+        self._ipv4_starts = numpy.array(ipv4_starts, dtype=numpy.uint32)
+        self._ipv4_ends = numpy.array(ipv4_ends, dtype=numpy.uint32)
+
+        # numpy has no 128 bits integers, the IPv6 addresses are looked up with bisect
+        self._ipv6_starts, self._ipv6_ends = _merge_ranges(ranges[6])
+
+        self.cache_size = cache_size
+        self._cache: OrderedDict[Any, bool | None] = OrderedDict()
+        self._lock = Lock()
+
+    def _classify_ipv4(self, addresses: Sequence[int]) -> list[bool]:
+        values = numpy.array(addresses, dtype=numpy.uint32)
+        indexes = numpy.searchsorted(self._ipv4_starts, values, side="right") - 1
+        in_range = (indexes >= 0) & (values <= self._ipv4_ends[numpy.maximum(indexes, 0)])
+        return in_range.tolist()
+
+    def _classify_ipv6(self, address: int) -> bool:
+        index = bisect.bisect_right(self._ipv6_starts, address) - 1
+        return index >= 0 and address <= self._ipv6_ends[index]
+
+    def _classify(self, values: Sequence[Any]) -> dict[Any, bool | None]:
+        results: dict[Any, bool | None] = {}
+        ipv4_values: list[Any] = []
+        ipv4_addresses: list[int] = []
+
+        for value in values:
+            parsed = parse_ip(value)
+            if parsed is None:
+                results[value] = None
+            elif parsed[0] == 4:
+                ipv4_values.append(value)
+                ipv4_addresses.append(parsed[1])
+            elif parsed[1] >> 32 == IPV4_MAPPED_PREFIX:
+                # as `ipaddress`, classify the IPv4-mapped addresses as their IPv4 address
+                ipv4_values.append(value)
+                ipv4_addresses.append(parsed[1] & 0xFFFFFFFF)
+            else:
+                results[value] = self._classify_ipv6(parsed[1])
+
+        if ipv4_addresses:
+            results.update(zip(ipv4_values, self._classify_ipv4(ipv4_addresses)))
+
+        return results
+
+    def classify(self, values: Iterable[Any]) -> list[bool | None]:
+        """
+        Classify the values as private or public IP addresses.
+
+        Args:
+            values: Iterable[Any]
+
+        Returns:
+            list[bool | None]: True for private addresses, False for public ones, None for values that are not IPs
+        """
+        values = list(values)
+        results: dict[Any, bool | None] = {}
+        missing: list[Any] = []
+
+        with self._lock:
+            for value in dict.fromkeys(values):
+                if value in self._cache:
+                    self._cache.move_to_end(value)
+                    results[value] = self._cache[value]
+                else:
+                    missing.append(value)
+
+        if missing:
+            classified = self._classify(missing)
+            results.update(classified)
+
+            with self._lock:
+                self._cache.update(classified)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+
+        return [results[value] for value in values]
+
+    def is_private(self, value: Any) -> bool | None:
+        """
+        Classify the value as a private or public IP address.
+
+        Args:
+            value: Any
+
+        Returns:
+            bool | None: True for a private address, False for a public one, None if the value is not an IP
+        """
+        return self.classify((value,))[0]
+
+    def all_private(self, values: Iterable[Any]) -> bool:
+        """
+        Check if all the IPs in the values are private. The values that are not IPs are omitted.
+
+        Args:
+            values: Iterable[Any]
+
+        Returns:
+            bool:
+        """
+        return all(result is not False for result in self.classify(values))
+
+    def all_private_in_text(self, text: str, separator: str = " ") -> bool:
+        """
+        Check if all the IPs in the text are private. The words that are not IPs are omitted.
+
+        Args:
+            text: str
+            separator: str
+
+        Returns:
+            bool:
+        """
+        return self.all_private(word for word in text.split(separator) if "." in word or ":" in word)
+
+
+# classifier shared by the flow logs triggers
+ip_classifier = IPClassifier()
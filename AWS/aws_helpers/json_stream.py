@@ -0,0 +1,166 @@
+"""Incremental reading of JSON documents."""
+
+import re
+from collections.abc import AsyncGenerator
+from typing import Any
+
+import orjson
+
+from aws_helpers.utils import DEFAULT_CHUNK_SIZE, AsyncReader
+
+# a complete string, or a structural character. A lone quote is the start of an incomplete string.
+_TOKEN = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"|["{}\[\]]')
+_STRING = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"')
+_WHITESPACES = re.compile(rb"\s*")
+_SEPARATORS = re.compile(rb"[\s,]*")
+_SCALAR = re.compile(rb"[^\s,\]]+")
+
+_QUOTE = ord('"')
+_COLON = ord(":")
+_OPENING_BRACE = ord("{")
+_OPENING_BRACKET = ord("[")
+_CLOSING_BRACKET = ord("]")
+_CONTAINERS = (_OPENING_BRACE, _OPENING_BRACKET)
+
+
+async def async_iter_array_items(
+    stream: AsyncReader, key: str, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> AsyncGenerator[tuple[bytes, dict[str, Any]], None]:
+    """
+    Read the objects of an array, at the top level of a JSON document, without loading the document.
+
+    Each object is yielded as its original bytes, along with its parsed content.
+    Only the current object is kept in memory. The items that are not objects are skipped.
+
+    Args:
+        stream: AsyncReader
+        key: str: the key of the array in the document
+        chunk_size: int
+
+    Yields:
+        tuple[bytes, dict[str, Any]]: the object, and its parsed content
+    """
+    raw_key = orjson.dumps(key)
+
+    buffer = bytearray()
+    pos = 0
+    eof = False
+
+    async def read_more() -> int:
+        """
+        Read the next chunk, appended to the buffer.
+
+        The data before the current position is dropped only once it is the larger part of the buffer,
+        so a large item is not copied again on each chunk.
+
+        Returns:
+            int: the number of bytes dropped, -1 at the end of the stream
+        """
+        nonlocal pos, eof
+        if eof:
+            return -1
+
+        dropped = 0
+        if pos > 0 and pos >= len(buffer) // 2:
+            dropped = pos
+            del buffer[:pos]
+            pos = 0
+
+        chunk = await stream.read(chunk_size)
+        eof = not chunk
+        buffer.extend(chunk)
+        return -1 if eof else dropped
+
+    # look for the array in the top level object
+    depth = 0
+    while True:
+        match = _TOKEN.search(buffer, pos)
+        if match is None or match.group() == b'"':
+            # no token, or an incomplete string
+            pos = match.start() if match is not None else len(buffer)
+            if await read_more() < 0:
+                return
+
+            continue
+
+        token = match.group()
+        if token == raw_key and depth == 1:
+            colon = _WHITESPACES.match(buffer, match.end()).end()
+            value_start = _WHITESPACES.match(buffer, colon + 1).end()
+            if value_start >= len(buffer):
+                # not enough data to know if the string is the key
+                pos = match.start()
+                if await read_more() < 0:
+                    return
+
+                continue
+
+            if buffer[colon] == _COLON:
+                if buffer[value_start] != _OPENING_BRACKET:
+                    return
+
+                pos = value_start + 1
+                break
+
+        elif token in (b"{", b"["):
+            depth += 1
+        elif token in (b"}", b"]"):
+            depth -= 1
+
+        pos = match.end()
+
+    # read the items of the array
+    while True:
+        pos = _SEPARATORS.match(buffer, pos).end()
+        if pos >= len(buffer):
+            if await read_more() < 0:
+                raise ValueError("The JSON document is truncated")
+
+            continue
+
+        first_character = buffer[pos]
+        if first_character == _CLOSING_BRACKET:
+            return
+
+        if first_character not in _CONTAINERS:
+            # skip the scalar items
+            skipped = _STRING.match(buffer, pos) if first_character == _QUOTE else _SCALAR.match(buffer, pos)
+            if skipped is None or skipped.end() >= len(buffer):
+                if await read_more() < 0:
+                    raise ValueError("The JSON document is truncated")
+
+                continue
+
+            pos = skipped.end()
+            continue
+
+        # the object, or the array, ends at the closing character that brings the depth back to zero.
+        # The strings are skipped as a whole, so their content is never taken for a structural character.
+        depth = 0
+        search_from = pos
+        while True:
+            match = _TOKEN.search(buffer, search_from)
+            if match is None or match.group() == b'"':
+                # resume from the incomplete string, or from the end of the buffer, with more data
+                search_from = match.start() if match is not None else len(buffer)
+                dropped = await read_more()
+                if dropped < 0:
+                    raise ValueError("The JSON document is truncated")
+
+                search_from -= dropped
+                continue
+
+            search_from = match.end()
+            token = match.group()
+            if token in (b"{", b"["):
+                depth += 1
+            elif token in (b"}", b"]"):
+                depth -= 1
+                if depth == 0:
+                    break
+
+        item = bytes(buffer[pos:search_from])
+        pos = search_from
+        if first_character == _OPENING_BRACE:
+            # skip the items that are not objects
+            yield item, orjson.loads(item)
@@ -0,0 +1,112 @@
+"""Helpers to read parquet files by batches."""
+
+import tempfile
+from collections.abc import AsyncGenerator, Sequence
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from aws_helpers.ip_classifier import IPClassifier, ip_classifier
+from aws_helpers.utils import DEFAULT_CHUNK_SIZE, AsyncReader
+
+DEFAULT_BATCH_SIZE = 10000
+
+
+async def async_iter_record_batches(
+    stream: AsyncReader, batch_size: int = DEFAULT_BATCH_SIZE
+) -> AsyncGenerator[pa.RecordBatch, None]:
+    """
+    Read a parquet file by batches of rows, row group by row group.
+
+    The metadata of a parquet file being at its end, the stream is spooled in a temporary file
+    rather than loaded in memory.
+
+    Args:
+        stream: AsyncReader
+        batch_size: int
+
+    Yields:
+        pa.RecordBatch:
+    """
+    with tempfile.TemporaryFile() as spool:
+        while chunk := await stream.read(DEFAULT_CHUNK_SIZE):
+            spool.write(chunk)
+
+        if spool.tell() == 0:
+            return
+
+        spool.seek(0)
+        parquet_file = pq.ParquetFile(spool)
+        for batch in parquet_file.iter_batches(batch_size=batch_size):
+            yield batch
+
+
+def all_ips_are_private_mask(
+    batch: pa.RecordBatch, names: Sequence[str], classifier: IPClassifier = ip_classifier
+) -> pa.BooleanArray:
+    """
+    Compute, for each row of the batch, if all the IPs in the columns are private.
+
+    Values that are not IPs are omitted. The distinct values of each column are classified at once,
+    then the mask is computed on the whole column.
+
+    Args:
+        batch: pa.RecordBatch
+        names: Sequence[str]
+        classifier: IPClassifier
+
+    Returns:
+        pa.BooleanArray:
+    """
+    mask = pa.array([True] * batch.num_rows, type=pa.bool_())
+
+    for name in names:
+        if name not in batch.schema.names:
+            continue
+
+        column = batch.column(name)
+        values = pc.drop_null(pc.unique(column)).to_pylist()
+        value_set = pa.array(
+            [value for value, is_private in zip(values, classifier.classify(values)) if is_private is not False],
+            type=column.type,
+        )
+        mask = pc.and_(mask, pc.or_(pc.is_null(column), pc.is_in(column, value_set=value_set)))
+
+    return mask
+
+
+def _epoch_ms_type(data_type: pa.DataType, timestamp_type: pa.DataType) -> pa.DataType:
+    if pa.types.is_timestamp(data_type):
+        return timestamp_type
+
+    if pa.types.is_struct(data_type):
+        return pa.struct(
+            [field.with_type(_epoch_ms_type(field.type, timestamp_type)) for field in data_type]  # type: ignore
+        )
+
+    if pa.types.is_list(data_type):
+        return pa.list_(data_type.value_field.with_type(_epoch_ms_type(data_type.value_type, timestamp_type)))
+
+    return data_type
+
+
+def timestamps_to_epoch_ms(batch: pa.RecordBatch) -> pa.Table:
+    """
+    Convert the timestamps of the batch, including the nested ones, into milliseconds since the epoch.
+
+    Args:
+        batch: pa.RecordBatch
+
+    Returns:
+        pa.Table:
+    """
+    table = pa.Table.from_batches([batch])
+    schema = table.schema
+
+    ms_schema = pa.schema([field.with_type(_epoch_ms_type(field.type, pa.timestamp("ms"))) for field in schema])
+    if ms_schema.equals(schema):
+        return table
+
+    epoch_ms_schema = pa.schema([field.with_type(_epoch_ms_type(field.type, pa.int64())) for field in schema])
+    return table.cast(ms_schema, safe=False).cast(epoch_ms_schema)
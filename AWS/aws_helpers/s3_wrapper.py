@@ -1,17 +1,14 @@
 """Aws s3 wrapper."""
 
 import asyncio
-import gzip
-import io
 from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
 
-from aiofiles.threadpool.binary import AsyncBufferedReader
 from loguru import logger
 from pydantic.v1 import Field
 from sekoia_automation.aio.helpers.aws.client import AwsClient, AwsConfiguration
 
-from aws_helpers.utils import is_gzip_compressed, async_gzip_open, AsyncReader
+from aws_helpers.utils import DEFAULT_CHUNK_SIZE, AsyncReader, AsyncStreamingReader
 
 
 class S3Configuration(AwsConfiguration):
@@ -35,17 +32,25 @@ class S3Wrapper(AwsClient[S3Configuration]):
 
     @asynccontextmanager
     async def read_key(
-        self, key: str, bucket: str | None = None, loop: asyncio.AbstractEventLoop | None = None
+        self,
+        key: str,
+        bucket: str | None = None,
+        loop: asyncio.AbstractEventLoop | None = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
     ) -> AsyncGenerator[AsyncReader, None]:
         """
-        Reads text file from S3 bucket.
+        Reads file from S3 bucket.
+
+        The object is streamed by chunks of `chunk_size` bytes and decompressed on the fly
+        if gzip compressed, so the memory used doesn't depend on the size of the object.
 
         Args:
             key: str
             bucket: str | None: if not provided, then use default bucket from configuration
+            chunk_size: int
 
         Yields:
-            str:
+            AsyncReader:
         """
         bucket = bucket or self._configuration.bucket
 
@@ -57,12 +62,8 @@ class S3Wrapper(AwsClient[S3Configuration]):
         async with self.get_client("s3") as s3:
             response = await s3.get_object(Bucket=bucket, Key=key)
             async with response["Body"] as stream:
-                with io.BytesIO(await stream.read()) as content:
-                    if is_gzip_compressed(content.getbuffer()):
-                        async_reader = await async_gzip_open(content, loop=loop)
-                    else:
-                        async_reader = AsyncBufferedReader(content, loop=loop, executor=None)
-                    try:
-                        yield async_reader
-                    finally:
-                        await async_reader.close()
+                async_reader = AsyncStreamingReader(stream, chunk_size, loop=loop)
+                try:
+                    yield async_reader
+                finally:
+                    await async_reader.close()
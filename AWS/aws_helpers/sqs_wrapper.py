@@ -78,7 +78,8 @@ class SqsWrapper(AwsClient[SqsConfiguration]):
         """
         Receive SQS messages.
 
-        After processing messages they will be deleted from queue if delete_consumed_messages is True.
+        After processing messages they will be deleted from queue if delete_consumed_messages is True,
+        unless their processing raised an error.
 
         Example of usage:
         with sqs.receive_messages() as messages:
@@ -117,16 +118,16 @@ class SqsWrapper(AwsClient[SqsConfiguration]):
 
             result = []
 
-            try:
-                for message in response.get("Messages", []):
-                    result.append((message["Body"], int(message["Attributes"]["SentTimestamp"])))
+            for message in response.get("Messages", []):
+                result.append((message["Body"], int(message["Attributes"]["SentTimestamp"])))
 
-                logger.info(f"Received {len(result)} messages from sqs queue {self._configuration.queue_name}")
+            logger.info(f"Received {len(result)} messages from sqs queue {self._configuration.queue_name}")
 
-                yield result
-            finally:
-                # We should delete messages from queue after releasing context manager if it is configured
-                if delete_consumed_messages and response.get("Messages", []):
-                    logger.info("Deleting consumed messages from sqs")
-                    for message in response.get("Messages", []):
-                        await sqs.delete_message(QueueUrl=queue_url, ReceiptHandle=message["ReceiptHandle"])
+            yield result
+
+            # We should delete messages from queue after releasing context manager if it is configured.
+            # The messages are kept if their processing failed, so they are received again.
+            if delete_consumed_messages and response.get("Messages", []):
+                logger.info("Deleting consumed messages from sqs")
+                for message in response.get("Messages", []):
+                    await sqs.delete_message(QueueUrl=queue_url, ReceiptHandle=message["ReceiptHandle"])
@@ -1,7 +1,9 @@
 import asyncio
 import io
 import gzip
+import zlib
 from abc import abstractmethod
+from collections.abc import AsyncGenerator
 from concurrent.futures import Executor
 from functools import partial
 from typing import Any, BinaryIO, Protocol
@@ -61,6 +63,150 @@ class AsyncReader(Protocol):
         return NotImplemented
 
 
+DEFAULT_CHUNK_SIZE = 256 * 1024
+
+
+class AsyncStreamingReader:
+    """
+    Read a stream by chunks, decompressing it on the fly if it is gzip compressed.
+
+    Only a chunk of the raw stream and its decompressed content are kept in memory,
+    whatever the size of the stream. Concatenated gzip members are supported.
+    """
+
+    def __init__(
+        self,
+        stream: AsyncReader,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        *,
+        loop: asyncio.AbstractEventLoop | None = None,
+        executor: Executor | None = None,
+    ) -> None:
+        self._stream = stream
+        self._chunk_size = chunk_size
+        self._loop = loop
+        self._executor = executor
+        self._buffer = bytearray()
+        self._pending = b""
+        self._stream_exhausted = False
+        self._compressed: bool | None = None
+        self._decompressor: Any = None
+
+    async def _read_raw(self) -> bytes:
+        if self._pending:
+            data, self._pending = self._pending, b""
+            return data
+
+        if self._stream_exhausted:
+            return b""
+
+        data: bytes = await self._stream.read(self._chunk_size)
+        if not data:
+            self._stream_exhausted = True
+
+        return data
+
+    async def _detect_compression(self) -> None:
+        head = b""
+        while len(head) < 2 and not self._stream_exhausted:
+            head += await self._read_raw()
+
+        self._pending = head
+        self._compressed = is_gzip_compressed(head)
+
+    async def _decompress(self, data: bytes) -> bytes:
+        # zlib releases the GIL, so decompress out of the event loop
+        loop = self._loop or asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._decompressor.decompress, data, self._chunk_size)
+
+    async def _next_chunk(self) -> bytes:
+        """
+        Return the next chunk of content, or an empty chunk at the end of the stream.
+
+        Decompressed chunks are at most `chunk_size` bytes long, whatever the compression ratio.
+        """
+        if self._compressed is None:
+            await self._detect_compression()
+
+        if not self._compressed:
+            return await self._read_raw()
+
+        while True:
+            if self._decompressor is None or self._decompressor.eof:
+                # start a new gzip member
+                data = (self._decompressor.unused_data if self._decompressor else b"") or await self._read_raw()
+                if not data:
+                    return b""
+
+                self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            else:
+                data = self._decompressor.unconsumed_tail or await self._read_raw()
+
+            chunk = await self._decompress(data)
+            if chunk:
+                return chunk
+
+            if not data and not self._decompressor.eof:
+                raise EOFError("Compressed stream ended before the end-of-stream marker was reached")
+
+    async def read(self, size: int = -1, /) -> bytes:
+        """
+        Read up to `size` bytes of content, or the remaining content if `size` is negative.
+
+        Args:
+            size: int
+
+        Returns:
+            bytes:
+        """
+        while size < 0 or len(self._buffer) < size:
+            chunk = await self._next_chunk()
+            if not chunk:
+                break
+
+            self._buffer += chunk
+
+        if size < 0:
+            size = len(self._buffer)
+
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    async def close(self) -> None:
+        self._buffer.clear()
+        self._pending = b""
+
+
+async def async_read_records(
+    stream: AsyncReader, separator: str, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> AsyncGenerator[str, None]:
+    """
+    Read the records of a stream, split on the separator, chunk by chunk.
+
+    Empty records are skipped.
+
+    Args:
+        stream: AsyncReader
+        separator: str
+        chunk_size: int
+
+    Yields:
+        str:
+    """
+    raw_separator = separator.encode("utf-8")
+    remainder = b""
+
+    while chunk := await stream.read(chunk_size):
+        *records, remainder = (remainder + chunk).split(raw_separator)
+        for record in records:
+            if record:
+                yield record.decode("utf-8")
+
+    if remainder:
+        yield remainder.decode("utf-8")
+
+
 # mypy: ignore-errors
 async def async_gzip_open(
     file: BinaryIO,
@@ -1,5 +1,6 @@
 """Package for all s3 connectors impl."""
 
+import asyncio
 import os
 from abc import ABCMeta
 from asyncio import BoundedSemaphore
@@ -100,31 +101,101 @@ class AbstractAwsS3QueuedConnector(AbstractAwsConnector, metaclass=ABCMeta):
             "object", {}
         ).get("key")
 
+    async def _forward_objects(self, notifications: list[dict[str, Any]]) -> int:
+        """
+        Fetch and parse the S3 objects of the notifications concurrently, and push their events to the intakes.
+
+        At most `s3_max_fetch_concurrency` objects are read at the same time. The events are pushed
+        as soon as `limit_of_events_to_push` events were collected, and the remaining ones once
+        all the objects were read.
+
+        Args:
+            notifications: list[dict[str, Any]]
+
+        Returns:
+            int: the number of pushed events
+        """
+        records: list[str] = []
+        result = 0
+
+        async def push(events: list[str]) -> None:
+            nonlocal result
+            result += len(await self.push_data_to_intakes(events=events))
+
+        async def forward_object(notification: dict[str, Any]) -> None:
+            nonlocal records
+            pushing = False
+            try:
+                s3_bucket, s3_key = self._get_object_from_notification(notification)
+
+                if s3_bucket is None:
+                    raise ValueError("Bucket is undefined", notification)
+
+                if s3_key is None:
+                    raise ValueError("Key is undefined", notification)
+
+                normalized_key = normalize_s3_key(s3_key)
+
+                async with (
+                    self.s3_fetch_concurrency_sem,
+                    self.s3_wrapper.read_key(bucket=s3_bucket, key=normalized_key) as stream,
+                ):
+                    async for event in self._parse_content(stream):
+                        records.append(event)
+
+                        if len(records) >= self.limit_of_events_to_push:
+                            # swap the buffer before awaiting, so the other fetches keep filling a new one
+                            events, records = records, []
+                            pushing = True
+                            await push(events)
+                            pushing = False
+
+            except Exception as e:
+                # the events were not pushed: fail the batch, so its messages are received again
+                if pushing:
+                    raise
+
+                self.log(
+                    message=f"Failed to fetch content of {notification}: {str(e)}",
+                    level="warning",
+                )
+
+        tasks = [asyncio.create_task(forward_object(notification)) for notification in notifications]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+
+            raise
+
+        if records:
+            await push(records)
+
+        return result
+
     async def next_batch(self, previous_processing_end: float | None = None) -> tuple[int, list[int]]:
         """
         Get next batch of messages.
 
         Contains main logic of the connector.
 
+        The S3 objects notified by the received SQS messages are fetched concurrently,
+        and the messages are deleted only once the events of their objects were pushed.
+
         Args:
             previous_processing_end: float | None
 
         Returns:
             tuple[int, list[int]]:
         """
-        records = []
         result = 0
         timestamps_to_log: list[int] = []
 
-        continue_receiving = True
-
-        while continue_receiving:
+        while True:
             async with self.sqs_wrapper.receive_messages(max_messages=self.sqs_max_messages) as messages:
                 message_records = []
 
-                if not messages:
-                    continue_receiving = False
-
                 for message_data in messages:
                     message, message_timestamp = message_data
 
@@ -136,43 +207,15 @@ class AbstractAwsS3QueuedConnector(AbstractAwsConnector, metaclass=ABCMeta):
                         self.log_exception(e, message=f"Invalid JSON in message.\nInvalid message is: {message}")
 
                 if not message_records:
-                    continue_receiving = False
+                    break
 
                 INCOMING_EVENTS.labels(intake_key=self.configuration.intake_key).inc(len(message_records))
-                for record in message_records:
-                    try:
-                        s3_bucket, s3_key = self._get_object_from_notification(record)
-
-                        if s3_bucket is None:
-                            raise ValueError("Bucket is undefined", record)
 
-                        if s3_key is None:
-                            raise ValueError("Key is undefined", record)
+                # push the events before leaving the context, so the messages are deleted only once forwarded
+                nb_pushed_events = await self._forward_objects(message_records)
+                result += nb_pushed_events
 
-                        normalized_key = normalize_s3_key(s3_key)
-
-                        async with (
-                            self.s3_fetch_concurrency_sem,
-                            self.s3_wrapper.read_key(bucket=s3_bucket, key=normalized_key) as stream,
-                        ):
-                            async for event in self._parse_content(stream):
-                                records.append(event)
-
-                                if len(records) >= self.limit_of_events_to_push:
-                                    continue_receiving = False
-                                    result += len(await self.push_data_to_intakes(events=records))
-                                    records = []
-
-                    except Exception as e:
-                        self.log(
-                            message=f"Failed to fetch content of {record}: {str(e)}",
-                            level="warning",
-                        )
-
-            if not records:
-                continue_receiving = False
-
-        if records:
-            result += len(await self.push_data_to_intakes(events=records))
+            if nb_pushed_events == 0 or result >= self.limit_of_events_to_push:
+                break
 
         return result, timestamps_to_log
@@ -1,11 +1,16 @@
-"""Contains base implementation of workers and threads."""
+"""Contains base implementation of workers and their scheduler."""
 
+import heapq
+import itertools
+import os
 import time
 from abc import ABCMeta, abstractmethod
-from collections.abc import Generator, Sequence
+from collections.abc import Generator, Iterable, Sequence
+from concurrent.futures import ThreadPoolExecutor
 from functools import cached_property
 from pathlib import Path
-from threading import Event, Thread
+from queue import Empty, Queue
+from threading import Lock
 from typing import Any, Optional
 
 from botocore.client import BaseClient
@@ -17,8 +22,99 @@ from aws_helpers.base import AWSConnector
 from aws_helpers.utils import get_content
 
 
-class AwsS3Worker(Thread, metaclass=ABCMeta):  # pragma: no cover
-    """Implements logic for AwsS3Worker."""
+class AwsS3MarkerStore:
+    """Keep the markers of all the prefixes in a single checkpoint file."""
+
+    def __init__(self, data_path: Path, filename: str = "markers.json") -> None:
+        """Initialize AwsS3MarkerStore."""
+        self.context = PersistentJSON(filename, data_path)
+        self._lock = Lock()
+
+    def get(self, prefix: str | None) -> str | None:
+        """
+        Get the marker of the prefix.
+
+        Args:
+            prefix: str | None
+
+        Returns:
+            str | None:
+        """
+        with self._lock, self.context as markers:
+            result: str | None = markers.get(prefix or "default")
+
+            return result
+
+    def set(self, prefix: str | None, marker: str) -> None:
+        """
+        Save the marker of the prefix.
+
+        Args:
+            prefix: str | None
+            marker: str
+        """
+        with self._lock, self.context as markers:
+            markers[prefix or "default"] = marker
+
+
+class AwsS3PrefixScheduler:
+    """
+    Order the turns of the prefixes by due time.
+
+    The prefixes due at the same time are served in the order they were scheduled,
+    so a prefix with a backlog is put behind the others instead of starving them.
+    """
+
+    def __init__(self) -> None:
+        """Initialize AwsS3PrefixScheduler."""
+        self._queue: list[tuple[float, int, str]] = []
+        self._counter = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def schedule(self, prefix: str, delay: float = 0.0) -> None:
+        """
+        Schedule the next turn of the prefix.
+
+        Args:
+            prefix: str
+            delay: float: the number of seconds to wait before the turn
+        """
+        heapq.heappush(self._queue, (time.monotonic() + delay, next(self._counter), prefix))
+
+    def pop_due(self) -> str | None:
+        """
+        Get the next prefix whose turn is due.
+
+        Returns:
+            str | None: the prefix, None if no turn is due
+        """
+        if not self._queue or self._queue[0][0] > time.monotonic():
+            return None
+
+        return heapq.heappop(self._queue)[2]
+
+    def next_due_in(self) -> float | None:
+        """
+        Get the time to wait before the next turn.
+
+        Returns:
+            float | None: the number of seconds, None if nothing is scheduled
+        """
+        if not self._queue:
+            return None
+
+        return max(self._queue[0][0] - time.monotonic(), 0.0)
+
+
+class AwsS3Worker(metaclass=ABCMeta):
+    """
+    Implements logic for AwsS3Worker.
+
+    A worker holds the state of a prefix. Its turns are run by the scheduler of the trigger
+    and download the objects with the downloaders shared by all the prefixes.
+    """
 
     data_path: Path
 
@@ -29,29 +125,13 @@ class AwsS3Worker(Thread, metaclass=ABCMeta):  # pragma: no cover
         data_path: Path | None = None,
     ) -> None:
         """Initialize AwsS3Worker."""
-        super().__init__()
         self.trigger = trigger
         self.prefix = prefix
         self.data_path = data_path or get_data_path()
-        self.context = PersistentJSON("context.json", self.storage)
+        self.markers = trigger.markers
         self.marker: str | None = self.read_marker()
-        self.alive = Event()
-
-    @cached_property
-    def storage(self) -> Path:
-        """
-        Get the storage directory.
-
-        Returns:
-            Path:
-        """
-        path = self.prefix or "default"
-        directory = self.data_path.joinpath(path)
-
-        if not directory.exists():
-            directory.mkdir(parents=True, exist_ok=True)
-
-        return directory
+        self.initialized = False
+        self.has_more = False
 
     @cached_property
     def bucket_name(self) -> str:
@@ -81,7 +161,16 @@ class AwsS3Worker(Thread, metaclass=ABCMeta):  # pragma: no cover
         Returns:
             str | None:
         """
-        with self.context as variables:
+        marker = self.markers.get(self.prefix)
+        if marker is not None:
+            return marker
+
+        # fallback on the context of the prefix, where the marker was saved by the previous versions
+        legacy_context = self.data_path.joinpath(self.prefix or "default", "context.json")
+        if not legacy_context.is_file():
+            return None
+
+        with PersistentJSON(legacy_context) as variables:
             result: str | None = variables.get("marker")
 
             return result
@@ -89,8 +178,7 @@ class AwsS3Worker(Thread, metaclass=ABCMeta):  # pragma: no cover
     def commit_marker(self) -> None:
         """Save the current marker."""
         if self.marker is not None:
-            with self.context as variables:
-                variables["marker"] = self.marker
+            self.markers.set(self.prefix, self.marker)
 
     def _list_of_objects(self, marker: str | None = None) -> Paginator:
         kwargs = {
@@ -138,28 +226,30 @@ class AwsS3Worker(Thread, metaclass=ABCMeta):  # pragma: no cover
             list_of_objects = [obj["Key"] for obj in response.get("Contents", []) if obj["Size"] > 0]
             yield from list_of_objects
 
-    def _fetch_events(self, bucket_name: str, objects: Generator[str, None, None]) -> Generator[Any, None, None]:
+    def _fetch_events(self, bucket_name: str, objects: Iterable[str]) -> Generator[Any, None, None]:
         """
         Fetch events from the list of objects as a generator
 
+        The objects are downloaded concurrently by the downloaders of the trigger,
+        and parsed in their order.
+
         Args:
             bucket_name: str
-            objects: Generator[str, None, None]
+            objects: Iterable[str]
 
         Yields:
             Any:
         """
-        for key in objects:
-            content = self._read_object(bucket_name, key)
-
+        contents = self.trigger.downloaders.map(lambda key: self._read_object(bucket_name, key), objects)
+        for content in contents:
             yield from self._parse_content(content)
 
-    def _move_marker(self, objects: Generator[str, None, None]) -> Generator[str, None, None]:
+    def _move_marker(self, objects: Iterable[str]) -> Generator[str, None, None]:
         """
         Move the marker according the objects fetched
 
         Args:
-            objects: Generator[str, None, None]
+            objects: Iterable[str]
 
         Yields:
             str:
@@ -202,12 +292,17 @@ class AwsS3Worker(Thread, metaclass=ABCMeta):  # pragma: no cover
             yield chunk
 
     def forward_events(self) -> None:
-        # get next objects
-        objects = self._fetch_next_objects(self.marker)
+        # get next objects, up to the limit of a turn
+        self.has_more = False
+        max_objects = self.trigger.max_objects_per_turn
+        objects = itertools.islice(self._fetch_next_objects(self.marker), max_objects)
 
         # get and forward events
         try:
-            events = self._fetch_events(self.bucket_name, self._move_marker(objects))
+            keys = list(self._move_marker(objects))
+            self.has_more = len(keys) >= max_objects
+
+            events = self._fetch_events(self.bucket_name, keys)
             chunks = self._chunk_events(list(events), self.configuration.chunk_size or 10000)
             for records in chunks:
                 self.log(message=f"forwarding {len(records)} records", level="info")
@@ -218,10 +313,7 @@ class AwsS3Worker(Thread, metaclass=ABCMeta):  # pragma: no cover
         except Exception as ex:
             self.log_exception(ex, message=f"Failed to forward events from {self.bucket_name}")
 
-    def stop(self) -> None:
-        self.alive.set()
-
-    def run(self) -> None:
+    def initialize(self) -> None:
         self.log(message=f"{self.trigger.name} worker for '{self.prefix}' has started", level="info")
 
         # get the last key on the Bucket from the marker
@@ -234,16 +326,18 @@ class AwsS3Worker(Thread, metaclass=ABCMeta):  # pragma: no cover
             message=f"Start fetching events from {self.marker} for '{self.prefix}'",
             level="info",
         )
+        self.initialized = True
 
-        while not self.alive.is_set():
-            try:
-                self.commit_marker()
-                self.forward_events()
-            except Exception as ex:
-                self.log_exception(ex, message="An unknown exception occurred")
-                raise
+    def run_turn(self) -> None:
+        """Forward the next objects of the prefix and save the marker."""
+        try:
+            if not self.initialized:
+                self.initialize()
 
-            time.sleep(self.configuration.frequency)
+            self.forward_events()
+            self.commit_marker()
+        except Exception as ex:
+            self.log_exception(ex, message="An unknown exception occurred")
 
 
 class AwsS3FetcherConfiguration(BaseModel):
@@ -253,7 +347,7 @@ class AwsS3FetcherConfiguration(BaseModel):
     bucket_name: str
 
 
-class AwsS3FetcherTrigger(AWSConnector, metaclass=ABCMeta):  # pragma: no cover
+class AwsS3FetcherTrigger(AWSConnector, metaclass=ABCMeta):
     """
     This trigger fetches content from objects stored on a S3 Bucket
     and forward them to the playbook run.
@@ -261,11 +355,29 @@ class AwsS3FetcherTrigger(AWSConnector, metaclass=ABCMeta):  # pragma: no cover
     Quick notes
     - depends on boto3
     - Pulling relies on local instance variable {marker}, hence this variable is logs when the triggers stops.
+    - The prefixes are served by a bounded number of turns at the same time, and their objects
+      are downloaded by a bounded pool of downloaders shared by all the prefixes.
     """
 
     configuration: AwsS3FetcherConfiguration
     worker_class: type = AwsS3Worker
-    workers: dict[str, AwsS3Worker] = {}
+
+    def __init__(self, *args: Any, **kwargs: Optional[Any]) -> None:
+        """Init AwsS3FetcherTrigger."""
+        super().__init__(*args, **kwargs)
+        self.workers: dict[str, AwsS3Worker] = {}
+        self.max_downloaders = int(os.getenv("AWS_S3_FETCHER_MAX_DOWNLOADERS", 16))
+        self.max_concurrent_prefixes = int(os.getenv("AWS_S3_FETCHER_MAX_CONCURRENT_PREFIXES", 4))
+        self.max_objects_per_turn = int(os.getenv("AWS_S3_FETCHER_MAX_OBJECTS_PER_TURN", 100))
+        self.prefixes_refresh_interval = 900
+
+    @cached_property
+    def markers(self) -> AwsS3MarkerStore:
+        return AwsS3MarkerStore(self._data_path)
+
+    @cached_property
+    def downloaders(self) -> ThreadPoolExecutor:
+        return ThreadPoolExecutor(max_workers=self.max_downloaders, thread_name_prefix="s3-downloader")
 
     @property
     @abstractmethod
@@ -298,34 +410,72 @@ class AwsS3FetcherTrigger(AWSConnector, metaclass=ABCMeta):  # pragma: no cover
 
         return {self.prefix_pattern.format(account_id=account_id, region=region) for region in regions}
 
-    def start_worker(self, prefix: str) -> None:
-        # Check if the worker is already running
+    def start_worker(self, prefix: str) -> bool:
+        """
+        Create the worker of the prefix, if not already created.
+
+        Args:
+            prefix: str
+
+        Returns:
+            bool: True if the worker was created
+        """
         if prefix in self.workers:
-            w = self.workers[prefix]
-            if w.is_alive():
-                return
+            return False
 
         self.log(f"Starting {self.name} worker for '{prefix}'", level="info")
-        w = self.worker_class(self, prefix, data_path=self._data_path)
-        self.workers[prefix] = w
-        w.start()
+        self.workers[prefix] = self.worker_class(self, prefix, data_path=self._data_path)
+        return True
 
-    def manage_workers(self) -> None:
+    def manage_workers(self, scheduler: AwsS3PrefixScheduler) -> None:
         for prefix in self.prefixes():
-            self.start_worker(prefix)
+            if self.start_worker(prefix):
+                scheduler.schedule(prefix)
 
     def run(self) -> None:
         self.log(message=f"Starting {self.name} Trigger", level="info")
 
+        # on a restart, the workers of the previous run are scheduled again
+        scheduler = AwsS3PrefixScheduler()
+        for prefix in self.workers:
+            scheduler.schedule(prefix)
+
+        turns = ThreadPoolExecutor(max_workers=self.max_concurrent_prefixes, thread_name_prefix="s3-fetcher")
+        completed: Queue[str] = Queue()
+        in_progress: set[str] = set()
+        next_refresh = 0.0
+
         try:
-            while True:
-                self.manage_workers()
-                time.sleep(900)
+            while self.running:
+                if time.monotonic() >= next_refresh:
+                    self.manage_workers(scheduler)
+                    next_refresh = time.monotonic() + self.prefixes_refresh_interval
+
+                # start the turns of the due prefixes, within the limit of concurrent turns
+                while len(in_progress) < self.max_concurrent_prefixes and (prefix := scheduler.pop_due()) is not None:
+                    in_progress.add(prefix)
+                    future = turns.submit(self.workers[prefix].run_turn)
+                    future.add_done_callback(lambda _, prefix=prefix: completed.put(prefix))  # type: ignore
+
+                # wait for a turn to complete, or for the next turn to be due
+                next_due_in = scheduler.next_due_in()
+                if next_due_in is None or len(in_progress) >= self.max_concurrent_prefixes:
+                    next_due_in = 1.0
+
+                try:
+                    prefix = completed.get(timeout=min(next_due_in, 1.0))
+                except Empty:
+                    continue
+
+                # a prefix with a backlog gets a new turn right away, behind the prefixes already due
+                in_progress.discard(prefix)
+                scheduler.schedule(prefix, 0 if self.workers[prefix].has_more else self.configuration.frequency)
         finally:
             self.log(message=f"Stopping {self.name} Trigger", level="info")
 
-            for worker in self.workers.values():
-                worker.stop()
+            turns.shutdown(wait=True, cancel_futures=True)
 
-            for worker in self.workers.values():
-                worker.join()
+            # the downloaders are shut down with the run: the next run creates new ones
+            downloaders = self.__dict__.pop("downloaders", None)
+            if downloaders is not None:
+                downloaders.shutdown(wait=True, cancel_futures=True)
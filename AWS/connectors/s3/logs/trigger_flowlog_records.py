@@ -3,6 +3,8 @@ The Flowlog records trigger reads the next batch of logs published on the S3 buc
 and forward them to the playbook run.
 """
 
+from aws_helpers.ip_classifier import ip_classifier
+
 from .base import AwsS3FetcherTrigger, AwsS3Worker
 
 
@@ -19,7 +21,10 @@ class FlowlogRecordsWorker(AwsS3Worker):
         Returns:
             list[str]:
         """
-        return content.decode("utf-8").split("\n")[1:]
+        records = content.decode("utf-8").split("\n")[1:]
+
+        # discard the flows between private addresses
+        return [record for record in records if not ip_classifier.all_private_in_text(record)]
 
 
 class FlowlogRecordsTrigger(AwsS3FetcherTrigger):
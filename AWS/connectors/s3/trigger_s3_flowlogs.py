@@ -1,10 +1,9 @@
 """Contains AwsS3FlowLogsTrigger."""
 
-import ipaddress
 from collections.abc import AsyncGenerator
-from itertools import islice
 
-from aws_helpers.utils import AsyncReader
+from aws_helpers.ip_classifier import ip_classifier
+from aws_helpers.utils import AsyncReader, async_read_records
 from connectors.metrics import DISCARDED_EVENTS
 from connectors.s3 import AbstractAwsS3QueuedConnector, AwsS3QueuedConfiguration
 
@@ -34,14 +33,8 @@ class AwsS3FlowLogsTrigger(AbstractAwsS3QueuedConnector):
         Returns:
             bool:
         """
-        ips = []
-        for ip in input_str.split(" "):
-            try:
-                ips.append(ipaddress.ip_address(ip))
-            except ValueError:  # if substring is not IP then just omit it
-                pass
-
-        return all([ip.is_private for ip in ips])
+        # if substring is not IP then just omit it
+        return ip_classifier.all_private_in_text(input_str)
 
     async def _parse_content(self, stream: AsyncReader) -> AsyncGenerator[str, None]:
         """
@@ -53,18 +46,18 @@ class AwsS3FlowLogsTrigger(AbstractAwsS3QueuedConnector):
         Returns:
              Generator:
         """
-        content = await stream.read()
+        nb_records_to_skip = self.configuration.skip_first
+
+        async for record in async_read_records(stream, self.configuration.separator):
+            if self.check_all_ips_are_private(record):
+                DISCARDED_EVENTS.labels(intake_key=self.configuration.intake_key).inc()
+                continue
 
-        records: list[str] = []
-        for record in content.decode("utf-8").split(self.configuration.separator):
-            if len(record) > 0:
-                if not self.check_all_ips_are_private(record):
-                    records.append(record)
-                else:
-                    DISCARDED_EVENTS.labels(intake_key=self.configuration.intake_key).inc()
+            if self.configuration.ignore_comments and record.strip().startswith("#"):  # pragma: no cover
+                continue
 
-        if self.configuration.ignore_comments:  # pragma: no cover
-            records = [record for record in records if not record.strip().startswith("#")]
+            if nb_records_to_skip > 0:
+                nb_records_to_skip -= 1
+                continue
 
-        for record in list(islice(records, self.configuration.skip_first, None)):
             yield record
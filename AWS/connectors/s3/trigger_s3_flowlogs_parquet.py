@@ -1,13 +1,13 @@
 """Contains AwsS3ParquetRecordsTrigger."""
 
-import io
-import ipaddress
 from collections.abc import AsyncGenerator, Sequence
 from typing import Any
 
 import orjson
-import pandas
+import pyarrow.compute as pc
 
+from aws_helpers.ip_classifier import ip_classifier
+from aws_helpers.parquet import all_ips_are_private_mask, async_iter_record_batches
 from aws_helpers.utils import AsyncReader
 from connectors.metrics import DISCARDED_EVENTS
 from connectors.s3 import AbstractAwsS3QueuedConnector
@@ -28,15 +28,8 @@ class AwsS3FlowLogsParquetRecordsTrigger(AbstractAwsS3QueuedConnector):
         Returns:
             bool:
         """
-        ips = []
-        for name in names:
-            if name in record:
-                try:
-                    ips.append(ipaddress.ip_address(record[name]))
-                except ValueError:  # if substring is not IP then just omit it
-                    pass
-
-        return all([ip.is_private for ip in ips])
+        # values that are not IPs are omitted
+        return ip_classifier.all_private(record[name] for name in names if name in record)
 
     async def _parse_content(self, stream: AsyncReader) -> AsyncGenerator[str, None]:
         """
@@ -48,16 +41,15 @@ class AwsS3FlowLogsParquetRecordsTrigger(AbstractAwsS3QueuedConnector):
         Returns:
              Generator:
         """
-        content = await stream.read()
-        if len(content) == 0:
-            return
-
-        reader = io.BytesIO(content)
-        df = pandas.read_parquet(reader)
-
-        for record in df.to_dict(orient="records"):
-            if len(record) > 0:
-                if not self.check_all_ips_are_private(record, ("srcaddr", "dstaddr")):
-                    yield orjson.dumps(record).decode("utf-8")
-                else:
-                    DISCARDED_EVENTS.labels(intake_key=self.configuration.intake_key).inc()
+        async for batch in async_iter_record_batches(stream):
+            if batch.num_columns == 0:
+                continue
+
+            private_mask = all_ips_are_private_mask(batch, ("srcaddr", "dstaddr"))
+
+            nb_discarded_records = pc.sum(private_mask).as_py() or 0
+            if nb_discarded_records > 0:
+                DISCARDED_EVENTS.labels(intake_key=self.configuration.intake_key).inc(nb_discarded_records)
+
+            for record in batch.filter(pc.invert(private_mask)).to_pylist():
+                yield orjson.dumps(record).decode("utf-8")
@@ -1,9 +1,8 @@
 """Contains AwsS3LogsTrigger."""
 
 from collections.abc import AsyncGenerator
-from itertools import islice
 
-from aws_helpers.utils import AsyncReader
+from aws_helpers.utils import AsyncReader, async_read_records
 from connectors.s3 import AbstractAwsS3QueuedConnector, AwsS3QueuedConfiguration
 
 
@@ -31,12 +30,14 @@ class AwsS3LogsTrigger(AbstractAwsS3QueuedConnector):
         Returns:
              Generator:
         """
-        content = await stream.read()
+        nb_records_to_skip = self.configuration.skip_first
 
-        records = [record for record in content.decode("utf-8").split(self.configuration.separator) if len(record) > 0]
+        async for record in async_read_records(stream, self.configuration.separator):
+            if self.configuration.ignore_comments and record.strip().startswith("#"):
+                continue
 
-        if self.configuration.ignore_comments:
-            records = [record for record in records if not record.strip().startswith("#")]
+            if nb_records_to_skip > 0:
+                nb_records_to_skip -= 1
+                continue
 
-        for record in list(islice(records, self.configuration.skip_first, None)):
             yield record
@@ -1,12 +1,11 @@
 """Contains AwsS3ParquetRecordsTrigger."""
 
-import io
 from collections.abc import AsyncGenerator
 from typing import Any
 
 import orjson
-import pandas
 
+from aws_helpers.parquet import async_iter_record_batches, timestamps_to_epoch_ms
 from aws_helpers.utils import AsyncReader
 from connectors.s3 import AbstractAwsS3QueuedConnector
 
@@ -40,15 +39,10 @@ class AwsS3OcsfTrigger(AbstractAwsS3QueuedConnector):
         Returns:
              Generator:
         """
-        content = await stream.read()
+        async for batch in async_iter_record_batches(stream):
+            if batch.num_columns == 0:
+                continue
 
-        if len(content) == 0:
-            return
-
-        reader = io.BytesIO(content)
-        df = pandas.read_parquet(reader)
-        records = orjson.loads(df.to_json(orient="records"))
-
-        for record in records:
-            if len(record) > 0:
+            # timestamps are forwarded as milliseconds since the epoch
+            for record in timestamps_to_epoch_ms(batch).to_pylist():
                 yield orjson.dumps(record).decode("utf-8")
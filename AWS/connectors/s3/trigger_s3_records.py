@@ -3,8 +3,7 @@
 from collections.abc import AsyncGenerator
 from typing import Any
 
-import orjson
-
+from aws_helpers.json_stream import async_iter_array_items
 from aws_helpers.utils import AsyncReader
 from connectors.s3 import AbstractAwsS3QueuedConnector
 
@@ -90,14 +89,10 @@ class AwsS3RecordsTrigger(AbstractAwsS3QueuedConnector):
         Returns:
              Generator:
         """
-        content = await stream.read()
-
-        if len(content) == 0:
-            return
-
-        for data in orjson.loads(content).get("Records", []):
+        # The records are read one by one and forwarded as their original JSON
+        async for record, data in async_iter_array_items(stream, "Records"):
             # https://docs.aws.amazon.com/awscloudtrail/latest/userguide/cloudtrail-log-file-examples.html
             # Go through each element in list and add to result_data if it is a valid payload based on this
             # https://github.com/SEKOIA-IO/automation-library/issues/346
             if len(data) > 0 and self.is_valid_payload(data):
-                yield orjson.dumps(data).decode("utf-8")
+                yield record.decode("utf-8")
@@ -1095,3 +1095,92 @@ def test_update_checkpoint_integration(test_aws_device_asset_connector):
 
     # Verify logging was called
     test_aws_device_asset_connector.log.assert_called_with(f"Checkpoint updated with date: {test_date}", level="info")
+
+
+def _instances_page(*instance_ids):
+    return {
+        "Reservations": [
+            {
+                "OwnerId": "111111111111",
+                "Instances": [
+                    {
+                        "InstanceId": instance_id,
+                        "InstanceType": "t2.micro",
+                        "PlatformDetails": "Linux/UNIX",
+                        "LaunchTime": isoparse("2023-10-01T12:00:00Z"),
+                    }
+                    for instance_id in instance_ids
+                ],
+            }
+        ]
+    }
+
+
+def test_get_aws_devices_all_regions(test_aws_device_asset_connector):
+    """Test AWS devices collection over all the enabled regions."""
+    test_aws_device_asset_connector.configuration.all_regions = True
+    pages = {"eu-west-1": [_instances_page("i-1", "i-2")], "us-east-1": [_instances_page("i-3")], "eu-north-1": []}
+
+    def regional_client(service, region_name=None):
+        client = mock.MagicMock()
+        client.describe_regions.return_value = {"Regions": [{"RegionName": region} for region in pages]}
+        client.get_paginator.return_value.paginate.return_value = pages.get(region_name, [])
+        return client
+
+    with mock.patch("boto3.Session") as mock_session:
+        mock_session.return_value.client.side_effect = regional_client
+        devices = list(test_aws_device_asset_connector.get_aws_devices())
+
+    assert sorted(device.device.uid for batch in devices for device in batch) == ["i-1", "i-2", "i-3"]
+    assert sorted(len(batch) for batch in devices) == [1, 2]
+    assert {call.kwargs.get("region_name") for call in mock_session.return_value.client.call_args_list} == {
+        None,
+        "eu-west-1",
+        "us-east-1",
+        "eu-north-1",
+    }
+    test_aws_device_asset_connector.log.assert_any_call("Successfully collected 3 AWS devices", level="info")
+
+
+def test_get_aws_devices_assumed_roles(test_aws_device_asset_connector):
+    """Test AWS devices collection over the accounts of assumed roles."""
+    test_aws_device_asset_connector.configuration.role_arns = ["arn:aws:iam::222222222222:role/inventory"]
+
+    with mock.patch("boto3.Session") as mock_session:
+        client = mock_session.return_value.client.return_value
+        client.assume_role.return_value = {
+            "Credentials": {"AccessKeyId": "key", "SecretAccessKey": "secret", "SessionToken": "token"}
+        }
+        client.get_paginator.return_value.paginate.return_value = [_instances_page("i-1")]
+        devices = list(test_aws_device_asset_connector.get_aws_devices())
+
+    assert len(devices) == 2
+    client.assume_role.assert_called_once_with(
+        RoleArn="arn:aws:iam::222222222222:role/inventory", RoleSessionName="sekoiaio-aws-device-assets"
+    )
+    mock_session.assert_any_call(
+        aws_access_key_id="key", aws_secret_access_key="secret", aws_session_token="token", region_name="eu-north-1"
+    )
+
+
+def test_get_aws_devices_failing_region(test_aws_device_asset_connector):
+    """Test the other regions are collected when a region fails."""
+    test_aws_device_asset_connector.configuration.regions = ["eu-west-1", "us-east-1"]
+    error = ClientError({"Error": {"Code": "UnauthorizedOperation", "Message": "Access denied"}}, "DescribeInstances")
+
+    def regional_client(service, region_name=None):
+        client = mock.MagicMock()
+        if region_name == "us-east-1":
+            client.get_paginator.return_value.paginate.side_effect = error
+        else:
+            client.get_paginator.return_value.paginate.return_value = [_instances_page("i-1")]
+        return client
+
+    devices = []
+    with mock.patch("boto3.Session") as mock_session:
+        mock_session.return_value.client.side_effect = regional_client
+        with pytest.raises(ClientError):
+            for batch in test_aws_device_asset_connector.get_aws_devices():
+                devices.append(batch)
+
+    assert [device.device.uid for batch in devices for device in batch] == ["i-1"]
@@ -0,0 +1,70 @@
+"""Test IP classifier."""
+
+import ipaddress
+
+import pytest
+from faker import Faker
+
+from aws_helpers.ip_classifier import IPClassifier, parse_ip
+
+
+def test_parse_ip():
+    assert parse_ip("10.0.0.1") == (4, 167772161)
+    assert parse_ip("::1") == (6, 1)
+    assert parse_ip("fe80::1%eth0") == (6, int(ipaddress.ip_address("fe80::1")))
+    assert parse_ip(167772161) == (4, 167772161)
+    assert parse_ip("-") is None
+    assert parse_ip(None) is None
+
+
+def test_classify_as_ipaddress(session_faker: Faker):
+    classifier = IPClassifier()
+    addresses = [session_faker.ipv4() for _ in range(500)] + [session_faker.ipv6() for _ in range(500)]
+    addresses += [
+        "0.1.2.3",
+        "10.255.255.255",
+        "172.15.255.255",
+        "172.16.0.0",
+        "172.31.255.255",
+        "172.32.0.0",
+        "192.0.0.171",
+        "255.255.255.255",
+        "::",
+        "::ffff:8.8.8.8",
+        "2001:db8::1",
+        "fd12:3456::1",
+        "fe80::1",
+        "2606:4700::1111",
+    ]
+
+    assert classifier.classify(addresses) == [ipaddress.ip_address(address).is_private for address in addresses]
+
+
+def test_classify_values_not_ip():
+    classifier = IPClassifier()
+
+    assert classifier.classify(["8.8.8.8", "-", None, "10.0.0.1", "8.8.8.8"]) == [False, None, None, True, False]
+    assert classifier.is_private("eni-0a479835a7588c9ca") is None
+
+
+def test_classifier_cache():
+    classifier = IPClassifier(cache_size=2)
+
+    classifier.classify(["10.0.0.1", "8.8.8.8", "1.1.1.1"])
+    assert list(classifier._cache) == ["8.8.8.8", "1.1.1.1"]
+
+    assert classifier.is_private("8.8.8.8") is False
+    classifier.classify(["192.168.0.1"])
+    assert list(classifier._cache) == ["8.8.8.8", "192.168.0.1"]
+
+
+@pytest.mark.parametrize(
+    "text,expected",
+    [
+        ("2 111111111111 eni-0a479835a7588c9ca 10.0.0.1 172.31.39.167 58757 39045 6 1 40 REJECT OK", True),
+        ("2 111111111111 eni-0a479835a7588c9ca 79.124.62.82 172.31.39.167 58757 39045 6 1 40 REJECT OK", False),
+        ("2 111111111111 eni-0a479835a7588c9ca - - - - - - - NODATA", True),
+    ],
+)
+def test_all_private_in_text(text: str, expected: bool):
+    assert IPClassifier().all_private_in_text(text) is expected
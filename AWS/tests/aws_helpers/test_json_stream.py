@@ -0,0 +1,98 @@
+"""Test the incremental reading of JSON documents."""
+
+from unittest.mock import patch
+
+import orjson
+import pytest
+
+from aws_helpers.json_stream import async_iter_array_items
+from tests.helpers import async_bytesIO, async_list
+
+RECORDS = [
+    {"eventName": "GetObject", "requestParameters": {"key": "a}, {b"}, "resources": [{"ARN": "arn"}, {}]},
+    "not an object",
+    {"eventName": "PutObject", "tags": ["]}", {"nested": [1, 2]}]},
+    [{"eventName": "InArray"}],
+    None,
+    {},
+]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 64, 65536])
+@pytest.mark.parametrize("option", [None, orjson.OPT_INDENT_2])
+async def test_async_iter_array_items(chunk_size, option):
+    content = orjson.dumps({"Other": [{"eventName": "Other"}], "Records": RECORDS, "After": {}}, option=option)
+
+    items = await async_list(async_iter_array_items(await async_bytesIO(content), "Records", chunk_size=chunk_size))
+
+    assert [payload for _, payload in items] == [record for record in RECORDS if isinstance(record, dict)]
+    assert [orjson.loads(item) for item, _ in items] == [payload for _, payload in items]
+
+
+@pytest.mark.asyncio
+async def test_async_iter_array_items_keeps_original_bytes():
+    content = b'{"Records": [{"b": 1,  "a": 2.50}]}'
+
+    items = await async_list(async_iter_array_items(await async_bytesIO(content), "Records"))
+
+    assert items == [(b'{"b": 1,  "a": 2.50}', {"b": 1, "a": 2.5})]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "content",
+    [b"", b"{}", b'{"Other": {"Records": [{"a": 1}]}}', b'{"Records": {}}', b'{"Records": []}'],
+)
+async def test_async_iter_array_items_without_items(content):
+    assert await async_list(async_iter_array_items(await async_bytesIO(content), "Records")) == []
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("chunk_size", [7, 65536])
+async def test_async_iter_array_items_with_nested_records(chunk_size):
+    deep: dict = {"value": 'a "quoted" \\ } string'}
+    for _ in range(100):
+        deep = {"nested": [deep]}
+
+    records = [
+        {
+            "eventName": "DeleteObjects",
+            "requestParameters": {"delete": {"objects": [{"key": f"{i}"} for i in range(5000)]}},
+        },
+        {"eventName": "Deep", "responseElements": deep},
+        {"eventName": "Last"},
+    ]
+    content = orjson.dumps({"Records": records})
+
+    # each record is parsed once, whatever the number of its nested objects
+    with patch("aws_helpers.json_stream.orjson.loads", side_effect=orjson.loads) as loads:
+        items = await async_list(
+            async_iter_array_items(await async_bytesIO(content), "Records", chunk_size=chunk_size)
+        )
+
+    assert [payload for _, payload in items] == records
+    assert loads.call_count == len(records)
+
+
+@pytest.mark.asyncio
+async def test_async_iter_array_items_truncated_document():
+    content = b'{"Records": [{"a": 1}, {"b": 2'
+
+    with pytest.raises(ValueError):
+        await async_list(async_iter_array_items(await async_bytesIO(content), "Records", chunk_size=4))
+
+
+@pytest.mark.asyncio
+async def test_async_iter_array_items_with_large_record():
+    records = [
+        {"eventName": "First"},
+        {"eventName": "Large", "resources": [{"ARN": f"arn:{i}", "tags": ["x" * 100]} for i in range(5000)]},
+        {"eventName": "Last"},
+    ]
+    content = orjson.dumps({"Records": records})
+
+    items = await async_list(async_iter_array_items(await async_bytesIO(content), "Records", chunk_size=256))
+
+    assert [payload for _, payload in items] == records
+    assert [orjson.loads(item) for item, _ in items] == records
@@ -0,0 +1,71 @@
+"""Test parquet helpers."""
+
+import io
+from datetime import datetime, timezone
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from aws_helpers.parquet import all_ips_are_private_mask, async_iter_record_batches, timestamps_to_epoch_ms
+from tests.helpers import async_bytesIO, async_list
+
+
+def to_parquet(table: pa.Table, **kwargs) -> bytes:
+    buffer = io.BytesIO()
+    pq.write_table(table, buffer, **kwargs)
+    return buffer.getvalue()
+
+
+@pytest.mark.asyncio
+async def test_async_iter_record_batches():
+    table = pa.table({"value": list(range(100))})
+
+    stream = await async_bytesIO(to_parquet(table, row_group_size=30))
+    batches = await async_list(async_iter_record_batches(stream, batch_size=20))
+
+    assert len(batches) > 1
+    assert all(batch.num_rows <= 20 for batch in batches)
+    assert pa.Table.from_batches(batches) == table
+
+
+@pytest.mark.asyncio
+async def test_async_iter_record_batches_empty_content():
+    assert await async_list(async_iter_record_batches(await async_bytesIO(b""))) == []
+
+
+def test_all_ips_are_private_mask():
+    batch = pa.RecordBatch.from_pydict(
+        {
+            "srcaddr": ["10.0.0.1", "8.8.8.8", "192.168.1.1", "-", None, "fd00::1"],
+            "dstaddr": ["172.16.0.1", "10.0.0.1", "2606:4700::1111", "-", "1.1.1.1", "::1"],
+        }
+    )
+
+    assert all_ips_are_private_mask(batch, ("srcaddr", "dstaddr", "unknown")).to_pylist() == [
+        True,
+        False,
+        False,
+        True,
+        False,
+        True,
+    ]
+
+
+def test_timestamps_to_epoch_ms():
+    time = datetime(2024, 1, 2, 3, 4, 5, 678000, tzinfo=timezone.utc)
+    batch = pa.RecordBatch.from_pydict(
+        {
+            "time_dt": pa.array([time], type=pa.timestamp("us", tz="UTC")),
+            "metadata": pa.array([{"processed_time_dt": time, "version": "1.1.0"}]),
+            "severity_id": [1],
+        }
+    )
+
+    assert timestamps_to_epoch_ms(batch).to_pylist() == [
+        {
+            "time_dt": 1704164645678,
+            "metadata": {"processed_time_dt": 1704164645678, "version": "1.1.0"},
+            "severity_id": 1,
+        }
+    ]
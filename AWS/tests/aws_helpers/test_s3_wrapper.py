@@ -38,7 +38,7 @@ async def test_read_key(session_faker: Faker):
 
         s3_response = {"Body": AsyncMock()}
         s3_response["Body"].__aenter__.return_value = s3_response["Body"]
-        s3_response["Body"].read = AsyncMock(return_value=text.encode("utf-8"))
+        s3_response["Body"].read = AsyncMock(side_effect=[text.encode("utf-8"), b""])
 
         mock_s3.get_object.return_value = s3_response
 
@@ -79,7 +79,7 @@ async def test_read_compressed_encoding_key(session_faker: Faker):
 
         s3_response = {"Body": AsyncMock(), "ContentEncoding": "gzip"}
         s3_response["Body"].__aenter__.return_value = s3_response["Body"]
-        s3_response["Body"].read = AsyncMock(return_value=gzip.compress(text.encode("utf-8")))
+        s3_response["Body"].read = AsyncMock(side_effect=[gzip.compress(text.encode("utf-8")), b""])
 
         mock_s3.get_object.return_value = s3_response
 
@@ -121,7 +121,7 @@ async def test_read_compressed_content_key(session_faker: Faker, content_type: s
 
         s3_response = {"Body": AsyncMock(), "ContentType": content_type}
         s3_response["Body"].__aenter__.return_value = s3_response["Body"]
-        s3_response["Body"].read = AsyncMock(return_value=gzip.compress(text.encode("utf-8")))
+        s3_response["Body"].read = AsyncMock(side_effect=[gzip.compress(text.encode("utf-8")), b""])
 
         mock_s3.get_object.return_value = s3_response
 
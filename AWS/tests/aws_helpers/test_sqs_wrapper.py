@@ -178,3 +178,36 @@ async def test_receive_messages(sqs_wrapper, sqs_wrapper_configuration, session_
 
         mock_sqs.delete_message.assert_any_call(QueueUrl=queue_url, ReceiptHandle=receipt_handle_1)
         mock_sqs.delete_message.assert_any_call(QueueUrl=queue_url, ReceiptHandle=receipt_handle_2)
+
+
+@pytest.mark.asyncio
+async def test_receive_messages_keeps_messages_on_error(sqs_wrapper, session_faker):
+    """
+    Test receive_messages method does not delete the messages when their processing failed.
+
+    Args:
+        sqs_wrapper: SqsWrapper
+        session_faker: Faker
+    """
+    expected_response = {
+        "Messages": [
+            {
+                "Body": session_faker.sentence(),
+                "ReceiptHandle": session_faker.word(),
+                "Attributes": {"SentTimestamp": session_faker.pyint(min_value=1, max_value=1000)},
+            },
+        ]
+    }
+
+    with patch("aws_helpers.sqs_wrapper.SqsWrapper.get_client") as mock_client:
+        mock_sqs = MagicMock()
+        mock_sqs.receive_message = AsyncMock(return_value=expected_response)
+        mock_sqs.delete_message = AsyncMock(return_value={})
+        mock_sqs.get_queue_url = AsyncMock(return_value={"QueueUrl": session_faker.url()})
+        mock_client.return_value.__aenter__.return_value = mock_sqs
+
+        with pytest.raises(ValueError):
+            async with sqs_wrapper.receive_messages(max_messages=1):
+                raise ValueError("processing failed")
+
+        mock_sqs.delete_message.assert_not_called()
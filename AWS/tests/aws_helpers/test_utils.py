@@ -8,7 +8,15 @@ import aiofiles
 import pytest
 from faker import Faker
 
-from aws_helpers.utils import async_gzip_open, get_content, is_gzip_compressed, normalize_s3_key
+from aws_helpers.utils import (
+    AsyncStreamingReader,
+    async_gzip_open,
+    async_read_records,
+    get_content,
+    is_gzip_compressed,
+    normalize_s3_key,
+)
+from tests.helpers import async_bytesIO, async_list
 
 
 def test_normalize_s3_key():
@@ -66,3 +74,38 @@ async def test_async_gzip_reader():
 
         reader = await async_gzip_open(io.BytesIO(await f.read()))
         assert await reader.read() == content
+
+
+@pytest.mark.asyncio
+async def test_async_streaming_reader():
+    content = b"line 1\nline 2\nline 3\n" * 100
+
+    reader = AsyncStreamingReader(await async_bytesIO(content), chunk_size=7)
+    assert await reader.read(10) == content[:10]
+    assert await reader.read() == content[10:]
+    assert await reader.read() == b""
+
+
+@pytest.mark.asyncio
+async def test_async_streaming_reader_decompress_gzip_members():
+    member_1 = b"line 1\nline 2\n" * 100
+    member_2 = b"line 3\nline 4\n" * 100
+
+    reader = AsyncStreamingReader(await async_bytesIO(compress(member_1) + compress(member_2)), chunk_size=16)
+    assert await reader.read() == member_1 + member_2
+
+
+@pytest.mark.asyncio
+async def test_async_streaming_reader_truncated_gzip():
+    reader = AsyncStreamingReader(await async_bytesIO(compress(b"data" * 100)[:-10]), chunk_size=16)
+
+    with pytest.raises(EOFError):
+        await reader.read()
+
+
+@pytest.mark.asyncio
+async def test_async_read_records():
+    content = "record 1\n\nrecord 2 é\nrecord 3".encode("utf-8")
+
+    records = await async_list(async_read_records(await async_bytesIO(content), "\n", chunk_size=3))
+    assert records == ["record 1", "record 2 é", "record 3"]
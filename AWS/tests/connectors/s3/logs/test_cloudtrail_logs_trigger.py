@@ -350,9 +350,9 @@ def test_commit_marker(prefix: str, worker: CloudTrailLogsWorker, symphony_stora
     with mocked_client.handler_for("s3", S3Mock):
         worker.forward_events()
         worker.commit_marker()
-        context = PersistentJSON("context.json", data_path=symphony_storage.joinpath(prefix))
-        with context as variables:
-            assert variables.get("marker") == list(S3Objects.keys()).pop()
+        context = PersistentJSON("markers.json", data_path=symphony_storage)
+        with context as markers:
+            assert markers.get(prefix) == list(S3Objects.keys()).pop()
 
 
 def test_read_marker(faker: Faker, aws_module: AwsModule, symphony_storage: Path, aws_mock):
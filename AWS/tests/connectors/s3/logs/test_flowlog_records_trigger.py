@@ -232,3 +232,19 @@ def test_prefixes_integration(faker: Faker, aws_module: AwsModule, symphony_stor
         assert len(prefixes) > 0
         pattern = re.compile(r"^AWSLogs/\d{12}/vpcflowlogs/[a-z0-9-]+/")
         assert all([pattern.match(prefix) is not None for prefix in prefixes])
+
+
+def test_parse_content_discard_private_flows(worker: FlowlogRecordsWorker):
+    """
+    Test the flows between private addresses are discarded.
+
+    Args:
+        worker: FlowlogRecordsWorker
+    """
+    content = b"""version account-id interface-id srcaddr dstaddr srcport dstport protocol packets bytes start end action log-status
+2 111111111111 eni-0a479835a7588c9ca 79.124.62.82 172.31.39.167 58757 39045 6 1 40 1645469669 1645469724 REJECT OK
+2 111111111111 eni-0a479835a7588c9ca 172.31.39.167 172.31.39.168 44789 123 17 1 76 1645469669 1645469724 ACCEPT OK"""
+
+    assert worker._parse_content(content) == [
+        "2 111111111111 eni-0a479835a7588c9ca 79.124.62.82 172.31.39.167 58757 39045 6 1 40 1645469669 1645469724 REJECT OK"
+    ]
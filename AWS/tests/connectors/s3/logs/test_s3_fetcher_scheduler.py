@@ -0,0 +1,146 @@
+"""Tests related to the scheduling of the AwsS3FetcherTrigger workers."""
+
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+from faker import Faker
+from sekoia_automation.storage import PersistentJSON
+
+from connectors import AwsModule
+from connectors.s3.logs.base import AwsS3PrefixScheduler
+from connectors.s3.logs.trigger_cloudtrail_logs import CloudTrailLogsTrigger, CloudTrailLogsWorker
+
+from .base import read_file
+from .mock import mocked_client
+from .test_cloudtrail_logs_trigger import S3Mock, S3Objects
+
+
+@pytest.fixture
+def trigger(faker: Faker, aws_module: AwsModule, symphony_storage: Path) -> CloudTrailLogsTrigger:
+    """
+    Args:
+        faker: Faker
+        aws_module: AwsModule
+        symphony_storage: Path
+
+    Returns:
+        CloudTrailLogsTrigger:
+    """
+    trigger = CloudTrailLogsTrigger(module=aws_module, data_path=symphony_storage)
+
+    trigger.configuration = {
+        "frequency": faker.pyint(min_value=1, max_value=100),
+        "bucket_name": faker.word(),
+        "intake_key": faker.word(),
+    }
+
+    trigger.send_event = MagicMock()
+    trigger.log = MagicMock()
+    trigger.log_exception = MagicMock()
+
+    return trigger
+
+
+def test_prefix_scheduler_serves_due_prefixes_in_order():
+    scheduler = AwsS3PrefixScheduler()
+    scheduler.schedule("prefix-1")
+    scheduler.schedule("prefix-2")
+
+    assert scheduler.pop_due() == "prefix-1"
+
+    # a prefix with a backlog is put behind the prefixes already due
+    scheduler.schedule("prefix-1")
+    assert scheduler.pop_due() == "prefix-2"
+    assert scheduler.pop_due() == "prefix-1"
+    assert scheduler.pop_due() is None
+    assert scheduler.next_due_in() is None
+
+
+def test_prefix_scheduler_with_delay():
+    scheduler = AwsS3PrefixScheduler()
+    scheduler.schedule("prefix-1", delay=60)
+
+    assert scheduler.pop_due() is None
+    assert 0 < scheduler.next_due_in() <= 60
+    assert len(scheduler) == 1
+
+
+def test_forward_events_limits_objects_per_turn(trigger: CloudTrailLogsTrigger, symphony_storage: Path, aws_mock):
+    trigger.max_objects_per_turn = 1
+    worker = CloudTrailLogsWorker(trigger, "prefix", data_path=symphony_storage)
+    keys = list(S3Objects.keys())
+
+    with mocked_client.handler_for("s3", S3Mock):
+        worker.forward_events()
+        assert worker.marker == keys[0]
+        assert worker.has_more is True
+
+        worker.forward_events()
+        assert worker.marker == keys[1]
+        assert worker.has_more is True
+
+        worker.forward_events()
+        assert worker.marker == keys[1]
+        assert worker.has_more is False
+
+    records = [
+        record
+        for call in trigger.send_event.call_args_list
+        for record in read_file(symphony_storage, call.kwargs["directory"], call.kwargs["event"]["records_path"])
+    ]
+    assert len(trigger.send_event.call_args_list) == 2
+    assert [record["eventID"] for record in records] == [
+        "414cdb47-e739-4842-9d13-ddbe947a61f9",
+        "e35394be-60a9-4ebc-955b-ab2618bb8020",
+        "9eb7b17e-9434-434f-9cbc-9982be377594",
+        "e600c469-ca11-4d19-8151-a782ba8b95cd",
+        "e783e1c9-c9fc-4359-b6e1-0f5ad5620098",
+    ]
+
+
+def test_run_turn_starts_from_the_last_key(trigger: CloudTrailLogsTrigger, symphony_storage: Path, aws_mock):
+    worker = CloudTrailLogsWorker(trigger, "prefix", data_path=symphony_storage)
+
+    with mocked_client.handler_for("s3", S3Mock):
+        worker.run_turn()
+
+    assert worker.initialized is True
+    assert worker.marker == list(S3Objects.keys()).pop()
+    assert trigger.send_event.called is False
+    assert trigger.log_exception.called is False
+
+
+def test_markers_of_the_prefixes_are_kept_in_one_store(trigger: CloudTrailLogsTrigger, symphony_storage: Path):
+    workers = [CloudTrailLogsWorker(trigger, prefix, data_path=symphony_storage) for prefix in ("prefix-1", None)]
+    for index, worker in enumerate(workers):
+        worker.marker = f"key-{index}"
+        worker.commit_marker()
+
+    with PersistentJSON("markers.json", data_path=symphony_storage) as markers:
+        assert markers == {"prefix-1": "key-0", "default": "key-1"}
+
+    assert [CloudTrailLogsWorker(trigger, worker.prefix).read_marker() for worker in workers] == ["key-0", "key-1"]
+
+
+def test_run_reschedules_the_workers_on_restart(trigger: CloudTrailLogsTrigger):
+    worker = MagicMock()
+    worker.has_more = False
+    trigger.worker_class = MagicMock(return_value=worker)
+    trigger.prefixes_refresh_interval = 0
+    # the refresh of the prefixes fails during the first run
+    trigger.prefixes = MagicMock(side_effect=[{"prefix-1"}, Exception("refresh failed"), {"prefix-1"}])
+
+    worker.run_turn.side_effect = lambda: trigger.downloaders
+    with pytest.raises(Exception, match="refresh failed"):
+        trigger.run()
+
+    assert worker.run_turn.call_count == 1
+    assert "downloaders" not in trigger.__dict__
+
+    # the worker created by the first run gets turns in the second run
+    worker.run_turn.side_effect = trigger.stop
+    trigger.run()
+
+    assert worker.run_turn.call_count == 2
+    assert trigger.worker_class.call_count == 1
@@ -1,7 +1,9 @@
 """Contains tests for AbstractAwsS3QueuedConnector."""
 
+import asyncio
 import os
 from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
 from pathlib import Path
 from typing import BinaryIO
 from unittest.mock import AsyncMock, MagicMock
@@ -293,3 +295,134 @@ async def test_abstract_aws_s3_queued_connector_next_batch_with_empty_data_in_s3
     result = await abstract_queued_connector.next_batch()
 
     assert result == (0, [message[1] for message in valid_messages])
+
+
+async def test_abstract_aws_s3_queued_connector_next_batch_fetch_objects_concurrently(
+    session_faker: Faker, abstract_queued_connector: AbstractAwsS3QueuedConnector, sqs_message: str
+):
+    """
+    Test AbstractAwsS3QueuedConnector next_batch fetches the objects concurrently, up to the limit.
+
+    Args:
+        session_faker: Faker
+        abstract_queued_connector: AbstractAwsS3QueuedConnector
+        sqs_message: str
+    """
+    abstract_queued_connector.limit_of_events_to_push = 1000
+    abstract_queued_connector.s3_fetch_concurrency_sem = asyncio.BoundedSemaphore(3)
+
+    sqs_messages = [(sqs_message, session_faker.pyint(min_value=1, max_value=1000)) for _ in range(10)]
+    data_content = session_faker.word()
+
+    abstract_queued_connector.sqs_wrapper = MagicMock()
+    abstract_queued_connector.sqs_wrapper.receive_messages = MagicMock()
+    abstract_queued_connector.sqs_wrapper.receive_messages.return_value.__aenter__.side_effect = [sqs_messages, []]
+
+    concurrent_reads = 0
+    max_concurrent_reads = 0
+
+    @asynccontextmanager
+    async def read_key(bucket: str, key: str):
+        nonlocal concurrent_reads, max_concurrent_reads
+        concurrent_reads += 1
+        max_concurrent_reads = max(max_concurrent_reads, concurrent_reads)
+        await asyncio.sleep(0.01)
+        try:
+            yield await async_bytesIO(data_content.encode("utf-8"))
+        finally:
+            concurrent_reads -= 1
+
+    abstract_queued_connector.s3_wrapper = MagicMock()
+    abstract_queued_connector.s3_wrapper.read_key = read_key
+
+    result = await abstract_queued_connector.next_batch()
+
+    assert result == (10, [message[1] for message in sqs_messages])
+    assert max_concurrent_reads == 3
+    abstract_queued_connector.push_data_to_intakes.assert_awaited_once_with(events=[data_content] * 10)
+
+
+async def test_abstract_aws_s3_queued_connector_next_batch_deletes_messages_after_push(
+    session_faker: Faker, abstract_queued_connector: AbstractAwsS3QueuedConnector, sqs_message: str
+):
+    """
+    Test AbstractAwsS3QueuedConnector next_batch pushes the events before the SQS messages are deleted.
+
+    Args:
+        session_faker: Faker
+        abstract_queued_connector: AbstractAwsS3QueuedConnector
+        sqs_message: str
+    """
+    abstract_queued_connector.limit_of_events_to_push = 1000
+    sqs_messages = [(sqs_message, session_faker.pyint(min_value=1, max_value=1000))]
+    data_content = session_faker.word()
+    calls = []
+
+    received_messages = [sqs_messages, []]
+
+    @asynccontextmanager
+    async def receive_messages(max_messages: int):
+        messages = received_messages.pop(0)
+        yield messages
+        if messages:
+            calls.append("delete")
+
+    push_data_to_intakes = abstract_queued_connector.push_data_to_intakes
+
+    async def push(events: list[str]) -> list[str]:
+        calls.append("push")
+        return await push_data_to_intakes(events=events)
+
+    abstract_queued_connector.push_data_to_intakes = push
+    abstract_queued_connector.sqs_wrapper = MagicMock()
+    abstract_queued_connector.sqs_wrapper.receive_messages = receive_messages
+
+    async def read_key():
+        return await async_bytesIO(data_content.encode("utf-8"))
+
+    abstract_queued_connector.s3_wrapper = MagicMock()
+    abstract_queued_connector.s3_wrapper.read_key = MagicMock()
+    abstract_queued_connector.s3_wrapper.read_key.return_value.__aenter__.side_effect = read_key
+
+    result = await abstract_queued_connector.next_batch()
+
+    assert result == (1, [sqs_messages[0][1]])
+    assert calls == ["push", "delete"]
+
+
+async def test_abstract_aws_s3_queued_connector_next_batch_keeps_messages_on_push_error(
+    session_faker: Faker, abstract_queued_connector: AbstractAwsS3QueuedConnector, sqs_message: str
+):
+    """
+    Test AbstractAwsS3QueuedConnector next_batch keeps the SQS messages when their events failed to be pushed.
+
+    Args:
+        session_faker: Faker
+        abstract_queued_connector: AbstractAwsS3QueuedConnector
+        sqs_message: str
+    """
+    abstract_queued_connector.limit_of_events_to_push = 1
+    sqs_messages = [(sqs_message, session_faker.pyint(min_value=1, max_value=1000))]
+    data_content = session_faker.word()
+    calls = []
+
+    @asynccontextmanager
+    async def receive_messages(max_messages: int):
+        yield sqs_messages
+        calls.append("delete")
+
+    abstract_queued_connector.push_data_to_intakes = AsyncMock(side_effect=ConnectionError("intake unavailable"))
+    abstract_queued_connector.sqs_wrapper = MagicMock()
+    abstract_queued_connector.sqs_wrapper.receive_messages = receive_messages
+
+    async def read_key():
+        return await async_bytesIO(data_content.encode("utf-8"))
+
+    abstract_queued_connector.s3_wrapper = MagicMock()
+    abstract_queued_connector.s3_wrapper.read_key = MagicMock()
+    abstract_queued_connector.s3_wrapper.read_key.return_value.__aenter__.side_effect = read_key
+
+    with pytest.raises(ConnectionError):
+        await abstract_queued_connector.next_batch()
+
+    assert calls == []
@@ -3,7 +3,7 @@ import os
 import time
 from datetime import datetime, timezone
 from functools import cached_property
-from typing import Any, Optional, Union, cast
+from typing import Any, Optional, cast
 
 import orjson
 from azure.core.exceptions import ResourceExistsError, ResourceNotFoundError
@@ -65,6 +65,83 @@ class Client(object):
             self._client = None
 
 
+class PartitionPipeline(object):
+    """
+    Push the batches of a partition in background, while the next batches are received
+
+    The received batches are buffered in a bounded queue, so the reception is paused when the pushes lag behind.
+    The checkpoint only moves to the last event of a pushed batch, at most every `checkpoint_interval` seconds.
+    """
+
+    def __init__(
+        self,
+        trigger: "AzureEventsHubTrigger",
+        partition_context: PartitionContext,
+        max_batches: int,
+        checkpoint_interval: float,
+    ) -> None:
+        self.trigger = trigger
+        self.partition_context = partition_context
+        self.checkpoint_interval = checkpoint_interval
+        self.error: Exception | None = None
+        self._queue: asyncio.Queue[list[EventData] | None] = asyncio.Queue(maxsize=max_batches)
+        self._last_pushed_event: EventData | None = None
+        self._last_checkpoint = time.monotonic()
+        self._task = asyncio.create_task(self._run())
+
+    async def put(self, messages: list[EventData]) -> None:
+        """
+        Buffer a batch of messages, waiting for room in the buffer if full
+        """
+        if self.error is not None:
+            raise self.error
+
+        await self._queue.put(messages)
+
+    async def checkpoint(self, force: bool = False) -> None:
+        """
+        Move the checkpoint to the last pushed event, if the checkpoint interval is elapsed
+        """
+        if self._last_pushed_event is None:
+            return
+
+        if not force and time.monotonic() - self._last_checkpoint < self.checkpoint_interval:
+            return
+
+        event, self._last_pushed_event = self._last_pushed_event, None
+        await self.partition_context.update_checkpoint(event)
+        self._last_checkpoint = time.monotonic()
+
+    async def _run(self) -> None:
+        while (messages := await self._queue.get()) is not None:
+            try:
+                await self.trigger.forward_events(messages)
+            except Exception as error:
+                self.error = error
+                self.trigger.log_exception(error, message="Failed to forward events")
+
+                # discard the buffered batches, so the reception is not blocked on a full buffer
+                while not self._queue.empty():
+                    self._queue.get_nowait()
+
+                # restart the consumption from the last checkpoint, so the batches not pushed are received again
+                await self.trigger.client.close()
+                return
+
+            self._last_pushed_event = messages[-1]
+            await self.checkpoint()
+
+    async def close(self) -> None:
+        """
+        Wait for the buffered batches to be pushed, then checkpoint the last pushed event
+        """
+        if not self._task.done():
+            await self._queue.put(None)
+            await self._task
+
+        await self.checkpoint(force=True)
+
+
 class AzureEventsHubTrigger(AsyncConnector):
     """
     This trigger consumes messages from Microsoft Azure EventHub
@@ -78,6 +155,15 @@ class AzureEventsHubTrigger(AsyncConnector):
         self._frequency = int(os.environ.get("FREQUENCY_MAX_TIME", "10"), 10)
         self._has_more_events = True
 
+        # number of batches buffered per partition while the previous ones are pushed, 0 to push them inline
+        self._pipeline_max_batches = int(os.environ.get("PIPELINE_MAX_BATCHES", "0"), 10)
+        # minimum number of seconds between two checkpoints of a partition, 0 to checkpoint each batch
+        self._checkpoint_interval = float(os.environ.get("CHECKPOINT_INTERVAL", "0"))
+        self._pipelines: dict[str, PartitionPipeline] = {}
+        self._last_checkpoints: dict[str, float] = {}
+        # last pushed event of the partitions not checkpointed yet
+        self._pending_checkpoints: dict[str, tuple[PartitionContext, EventData]] = {}
+
     @cached_property
     def client(self) -> Client:
         return Client(self.configuration)
@@ -109,12 +195,20 @@ class AzureEventsHubTrigger(AsyncConnector):
         """
         Handle new messages
         """
-        if len(messages) > 0:
+        if len(messages) > 0 and self._pipeline_max_batches > 0:
+            # got messages, we buffer them and receive the next ones while they are forwarded
+            await self._get_pipeline(partition_context).put(messages)
+        elif len(messages) > 0:
             # got messages, we forward them
             await self.forward_events(messages)
 
-            # acknowledge the messages
-            await partition_context.update_checkpoint()
+            # acknowledge the messages, at most every checkpoint interval
+            partition_id = partition_context.partition_id
+            last_checkpoint = self._last_checkpoints.get(partition_id)
+            if last_checkpoint is None or time.monotonic() - last_checkpoint >= self._checkpoint_interval:
+                await self._checkpoint(partition_context, messages[-1])
+            else:
+                self._pending_checkpoints[partition_id] = (partition_context, messages[-1])
         else:  # pragma: no cover
             # We reached the max_wait_time, close the current client
             self.log(
@@ -125,15 +219,55 @@ class AzureEventsHubTrigger(AsyncConnector):
             EVENTS_LAG.labels(intake_key=self.configuration.intake_key).set(0)
             MESSAGES_AGE.labels(intake_key=self.configuration.intake_key).set(0)
 
+            # acknowledge the messages left behind by the checkpoint interval
+            await self._flush_checkpoint(partition_context)
+
+    def _get_pipeline(self, partition_context: PartitionContext) -> PartitionPipeline:
+        pipeline = self._pipelines.get(partition_context.partition_id)
+        if pipeline is None:
+            pipeline = PartitionPipeline(
+                self, partition_context, self._pipeline_max_batches, self._checkpoint_interval
+            )
+            self._pipelines[partition_context.partition_id] = pipeline
+
+        return pipeline
+
+    async def _checkpoint(self, partition_context: PartitionContext, event: EventData) -> None:
+        await partition_context.update_checkpoint(event)
+        self._last_checkpoints[partition_context.partition_id] = time.monotonic()
+        self._pending_checkpoints.pop(partition_context.partition_id, None)
+
+    async def _flush_checkpoint(self, partition_context: PartitionContext) -> None:
+        if (pipeline := self._pipelines.get(partition_context.partition_id)) is not None:
+            await pipeline.checkpoint(force=True)
+        elif (pending_checkpoint := self._pending_checkpoints.get(partition_context.partition_id)) is not None:
+            await self._checkpoint(*pending_checkpoint)
+
+    async def flush_partitions(self) -> None:
+        """
+        Push the buffered batches of all the partitions and checkpoint the pushed events
+        """
+        pipelines, self._pipelines = self._pipelines, {}
+        pending_checkpoints, self._pending_checkpoints = self._pending_checkpoints, {}
+
+        try:
+            for pipeline in pipelines.values():
+                await pipeline.close()
+
+            for partition_context, event in pending_checkpoints.values():
+                await self._checkpoint(partition_context, event)
+        except Exception as error:
+            self.log_exception(error, message="Failed to checkpoint the pushed events")
+
     @staticmethod
     def get_records_from_message(message: EventData) -> tuple[list[Any], str]:
         """
         Return the records according to the body of the message
         """
-        body: Union[str, dict[str, Any]]
+        body: Any
 
         try:
-            body = message.body_as_json()
+            body = orjson.loads(message.body_as_str())
             if isinstance(body, list):  # handle list of events
                 return body, "json"
             elif isinstance(body, dict) and "records" in body:  # handle wrapped events
@@ -146,31 +280,59 @@ class AzureEventsHubTrigger(AsyncConnector):
             body = message.body_as_str()
             return [body], "str"
 
+    def is_filtered_out(self, record: Any) -> bool:
+        """
+        Check if the record is a dict with a category that is not in the configured list
+        """
+        categories = self.configuration.categories
+        return len(categories) > 0 and isinstance(record, dict) and record.get("category") not in categories
+
+    def get_events_from_message(self, message: EventData) -> list[str]:
+        """
+        Return the events of the message, serialized
+
+        The body is parsed once with orjson. A body holding a single event is forwarded as received,
+        only the records of the lists and of the wrapped events are serialized again.
+        """
+        content = message.body_as_str()
+        try:
+            body = orjson.loads(content)
+        except orjson.JSONDecodeError:
+            return [content]
+
+        if isinstance(body, list):  # handle list of events
+            records = body
+        elif isinstance(body, dict) and isinstance(body.get("records"), list):  # handle wrapped events
+            records = body["records"]
+        elif isinstance(body, dict) and body.get("type") == "heartbeat":  # exclude heartbeat messages
+            return []
+        elif isinstance(body, dict) and not self.is_filtered_out(body):
+            return [content]
+        elif isinstance(body, dict):
+            records = [body]
+        else:
+            return [content]
+
+        events = [
+            orjson.dumps(record).decode("utf-8")
+            for record in records
+            if record is not None and not self.is_filtered_out(record)
+        ]
+
+        nb_skipped = sum(1 for record in records if record is not None) - len(events)
+        if nb_skipped > 0:
+            self.log(
+                message=f"Skip {nb_skipped} records as their category is not in allowed categories {self.configuration.categories}",
+                level="debug",
+            )
+
+        return events
+
     async def forward_events(self, messages: list[EventData]) -> None:
         INCOMING_MESSAGES.labels(intake_key=self.configuration.intake_key).inc(len(messages))
         start = time.time()
 
-        records = []
-        for message in messages:
-            body, body_type = self.get_records_from_message(message)
-            for record in body:
-                if record is not None:
-                    if body_type == "json":
-                        # Check if the record is a dict and has a category that is in the configured list
-                        if (
-                            len(self.configuration.categories) > 0
-                            and isinstance(record, dict)
-                            and record.get("category") not in self.configuration.categories
-                        ):
-                            self.log(
-                                message=f"Skip record as its category {record.get('category')} not in allowed categories {self.configuration.categories}",
-                                level="debug",
-                            )
-                            continue
-
-                        records.append(orjson.dumps(record).decode("utf-8"))
-                    else:
-                        records.append(record)
+        records = [event for message in messages for event in self.get_events_from_message(message)]
 
         if len(records) > 0:
             self.log(f"Forward {len(records)} events")
@@ -214,6 +376,9 @@ class AzureEventsHubTrigger(AsyncConnector):
         except ResourceNotFoundError as e:  # pragma: no cover
             self.log(str(e), level="warning")
 
+        finally:
+            await self.flush_partitions()
+
     def stop(self, *args: Any, **kwargs: Optional[Any]) -> None:  # pragma: no cover
         """
         Stop the connector
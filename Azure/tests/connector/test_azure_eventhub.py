@@ -328,3 +328,127 @@ def test_get_records_from_message_str():
     # assert
     assert len(records[0]) == 1
     assert records[0][0] == "teststring"
+
+
+@pytest.mark.asyncio
+async def test_handle_messages_pipelined(trigger):
+    # arrange
+    trigger._pipeline_max_batches = 2
+    pushed = asyncio.Event()
+    release = asyncio.Event()
+
+    async def push_data_to_intakes(events):
+        pushed.set()
+        await release.wait()
+        return events
+
+    trigger.push_data_to_intakes = AsyncMock(side_effect=push_data_to_intakes)
+    messages: list[EventData] = [EventData('{"name": "record1"}'), EventData('{"name": "record2"}')]
+    partition_context = AsyncMock()
+    partition_context.partition_id = "0"
+
+    # act
+    await trigger.handle_messages(partition_context, messages)
+    await pushed.wait()
+
+    # assert: the batch is being pushed and not acknowledged yet
+    assert not partition_context.update_checkpoint.called
+
+    release.set()
+    await trigger.flush_partitions()
+
+    partition_context.update_checkpoint.assert_awaited_once_with(messages[-1])
+    calls = [record for call in trigger.push_data_to_intakes.await_args_list for record in call.kwargs["events"]]
+    assert calls == ['{"name": "record1"}', '{"name": "record2"}']
+
+
+@pytest.mark.asyncio
+async def test_handle_messages_pipelined_with_error(trigger):
+    # arrange
+    trigger._pipeline_max_batches = 1
+    trigger.push_data_to_intakes = AsyncMock(side_effect=ValueError("Error"))
+    trigger.client.close = AsyncMock()
+    partition_context = AsyncMock()
+    partition_context.partition_id = "0"
+
+    # act
+    await trigger.handle_messages(partition_context, [EventData('{"name": "record1"}')])
+    await asyncio.sleep(0)
+
+    # assert: the batch is not acknowledged and the consumption is restarted
+    with pytest.raises(ValueError):
+        await trigger.handle_messages(partition_context, [EventData('{"name": "record2"}')])
+
+    await trigger.flush_partitions()
+    assert not partition_context.update_checkpoint.called
+    trigger.client.close.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_handle_messages_with_checkpoint_interval(trigger):
+    # arrange
+    trigger._checkpoint_interval = 3600
+    partition_context = AsyncMock()
+    partition_context.partition_id = "0"
+
+    # act
+    for _ in range(3):
+        await trigger.handle_messages(partition_context, [EventData('{"name": "record1"}')])
+
+    # assert: only the first batch is acknowledged, the last one when flushed
+    assert partition_context.update_checkpoint.await_count == 1
+
+    await trigger.flush_partitions()
+    assert partition_context.update_checkpoint.await_count == 2
+    assert trigger.push_data_to_intakes.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_handle_messages_with_checkpoint_interval_and_error(trigger):
+    # arrange
+    trigger._checkpoint_interval = 3600
+    trigger.push_data_to_intakes = AsyncMock(side_effect=[None, None, ValueError("Error")])
+    partition_context = AsyncMock()
+    partition_context.partition_id = "0"
+    batches = [[EventData(f'{{"name": "record{index}"}}')] for index in range(3)]
+
+    # act
+    await trigger.handle_messages(partition_context, batches[0])
+    await trigger.handle_messages(partition_context, batches[1])
+    with pytest.raises(ValueError):
+        await trigger.handle_messages(partition_context, batches[2])
+
+    await trigger.flush_partitions()
+
+    # assert: the checkpoint stops at the last pushed event
+    assert partition_context.update_checkpoint.await_args_list[-1].args == (batches[1][-1],)
+
+
+@pytest.mark.parametrize(
+    "body,expected",
+    [
+        ('{"name": "record1"}', ['{"name": "record1"}']),
+        ('{"type": "heartbeat"}', []),
+        ('[{"name": "record1"}, null, "record2"]', ['{"name":"record1"}', '"record2"']),
+        (
+            '{"records": [{"name": "record1"}, null, {"name": "record2"}]}',
+            ['{"name":"record1"}', '{"name":"record2"}'],
+        ),
+        ("teststring", ["teststring"]),
+        ("123", ["123"]),
+    ],
+)
+def test_get_events_from_message(trigger, body, expected):
+    assert trigger.get_events_from_message(EventData(body=body)) == expected
+
+
+def test_get_events_from_message_with_filtering(trigger):
+    trigger.configuration.categories = ["test1"]
+
+    assert trigger.get_events_from_message(EventData('{"name": "record1", "category": "test1"}')) == [
+        '{"name": "record1", "category": "test1"}'
+    ]
+    assert trigger.get_events_from_message(EventData('{"name": "record2", "category": "test2"}')) == []
+    assert trigger.get_events_from_message(
+        EventData('{"records": [{"name": "record1", "category": "test1"}, {"name": "record2", "category": "test2"}]}')
+    ) == ['{"name":"record1","category":"test1"}']
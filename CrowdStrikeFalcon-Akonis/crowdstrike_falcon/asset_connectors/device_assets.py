@@ -1,10 +1,16 @@
+import hashlib
+import os
+from collections import deque
+from collections.abc import Generator, Iterable
+from concurrent.futures import Future, ThreadPoolExecutor
 from functools import cached_property
-from collections.abc import Generator
+from itertools import islice
 from typing import Any, Literal
 from datetime import datetime
 
 from dateutil.parser import isoparse
 from sekoia_automation.asset_connector import AssetConnector
+from sekoia_automation.asset_connector.models.connector import AssetList
 from sekoia_automation.asset_connector.models.ocsf.base import (
     Metadata,
     Product,
@@ -31,17 +37,45 @@ class CrowdstrikeDeviceAssetConnector(AssetConnector):
     PRODUCT_VERSION = "N/A"
     OCSF_VERSION: str = "1.6.0"
     LIMIT: int = 100
+    # incremental synchronization
+    SCROLL_LIMIT: int = 5000
+    DETAILS_CHUNK_SIZE: int = 5000
+    FETCH_CONCURRENCY: int = 4
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.context = PersistentJSON("context.json", self._data_path)
+        self.fingerprints_store = PersistentJSON("devices_fingerprints.json", self._data_path)
         self._latest_id = None
+        self._latest_modified_timestamp: str | None = None
+        # fingerprints of the devices yielded but not pushed yet, and of the batch being pushed
+        self._pending_fingerprints: dict[str, str] = {}
+        self._batch_fingerprints: dict[str, str] | None = None
+        # once a batch failed, the watermark doesn't move forward until the next cycle
+        self._batch_failed = False
 
     @property
     def most_recent_device_id(self) -> str | None:
         with self.context as cache:
             return cache.get("most_recent_device_id", None)
 
+    @property
+    def most_recent_modified_timestamp(self) -> str | None:
+        with self.context as cache:
+            return cache.get("most_recent_modified_timestamp", None)
+
+    @cached_property
+    def incremental_sync(self) -> bool:
+        return os.getenv("DEVICE_ASSETS_INCREMENTAL_SYNC", "false").lower() == "true"
+
+    @cached_property
+    def fingerprints(self) -> dict[str, str]:
+        """
+        The fingerprints of the devices already sent, by device id
+        """
+        with self.fingerprints_store as store:
+            return dict(store)
+
     @cached_property
     def _http_default_headers(self) -> dict[str, str]:
         return {
@@ -138,6 +172,10 @@ class CrowdstrikeDeviceAssetConnector(AssetConnector):
         return device_ocsf
 
     def update_checkpoint(self) -> None:
+        if self.incremental_sync:
+            self.update_incremental_checkpoint()
+            return
+
         self.log("Updating the device id !!", level="info")
         if self._latest_id is None:
             return
@@ -145,6 +183,30 @@ class CrowdstrikeDeviceAssetConnector(AssetConnector):
             cache["most_recent_device_id"] = self._latest_id
             self.log(f"Device id was updated to {self._latest_id}", level="info")
 
+    def update_incremental_checkpoint(self) -> None:
+        """
+        Record the devices of the batch sent and move the watermark forward
+        """
+        if self._batch_fingerprints is not None:
+            self.fingerprints.update(self._batch_fingerprints)
+            self._batch_fingerprints = None
+
+        # the devices of a failed batch are fetched again from the watermark on the next cycle
+        if self._batch_failed or self._latest_modified_timestamp is None:
+            return
+        with self.context as cache:
+            cache["most_recent_modified_timestamp"] = self._latest_modified_timestamp
+            self.log(f"Device watermark was updated to {self._latest_modified_timestamp}", level="info")
+
+    def save_fingerprints(self) -> None:
+        with self.fingerprints_store as store:
+            store.clear()
+            store.update(self.fingerprints)
+
+    def compute_fingerprint(self, asset: DeviceOCSFModel) -> str:
+        # the time of the event defaults to now when the first seen date is missing
+        return hashlib.sha256(asset.model_dump_json(exclude={"time"}).encode()).hexdigest()
+
     def next_devices(self) -> Generator[dict[str, Any], None, None]:
         last_first_uuid = self.most_recent_device_id
         uuids_batch: list[str] = []
@@ -173,7 +235,93 @@ class CrowdstrikeDeviceAssetConnector(AssetConnector):
             for device_info in self.client.get_devices_infos(uuids_batch):
                 yield device_info
 
+    def _fetch_devices_infos(self, device_uuids: list[str]) -> list[dict[str, Any]]:
+        devices = list(self.client.get_devices_infos(device_uuids))
+        # the API doesn't preserve the order of the identifiers
+        devices.sort(key=lambda device: device.get("modified_timestamp") or "")
+        return devices
+
+    def next_modified_devices(self) -> Generator[dict[str, Any], None, None]:
+        """
+        Iterate over the devices modified since the watermark, by ascending modification time
+        """
+        watermark = self.most_recent_modified_timestamp
+        # the lower bound is inclusive to not miss devices modified at the same time.
+        # Already sent devices are filtered out with their fingerprint
+        fql_filter = f"modified_timestamp:>='{watermark}'" if watermark else None
+
+        device_uuids: Iterable[str] = self.client.scroll_devices_uuids(
+            filter=fql_filter, sort="modified_timestamp.asc", limit=self.SCROLL_LIMIT
+        )
+
+        # fetch the details of the chunks concurrently, but yield them in order
+        with ThreadPoolExecutor(max_workers=self.FETCH_CONCURRENCY) as executor:
+            in_flight: deque[Future] = deque()
+            iterator = iter(device_uuids)
+            while chunk := list(islice(iterator, self.DETAILS_CHUNK_SIZE)):
+                self.log(f"Found {len(chunk)} modified devices !!", level="info")
+                in_flight.append(executor.submit(self._fetch_devices_infos, chunk))
+                if len(in_flight) >= self.FETCH_CONCURRENCY:
+                    yield from in_flight.popleft().result()
+
+            while in_flight:
+                yield from in_flight.popleft().result()
+
+    def get_modified_assets(self) -> Generator[DeviceOCSFModel, None, None]:
+        for device in self.next_modified_devices():
+            if modified_timestamp := device.get("modified_timestamp"):
+                self._latest_modified_timestamp = modified_timestamp
+
+            asset = self.map_device_fields(device)
+            device_id = device.get("device_id")
+            fingerprint = self.compute_fingerprint(asset)
+            if device_id and self.fingerprints.get(device_id) == fingerprint:
+                # the device didn't change since it was last sent
+                continue
+
+            if device_id:
+                self._pending_fingerprints[device_id] = fingerprint
+            yield asset
+
+        # no device remains to send: the watermark can move forward
+        if not self._pending_fingerprints:
+            self.update_incremental_checkpoint()
+
     def get_assets(self) -> Generator[DeviceOCSFModel, None, None]:
         self.log("Start the getting assets generator !!", level="info")
+        if self.incremental_sync:
+            yield from self.get_modified_assets()
+            return
+
         for device in self.next_devices():
             yield self.map_device_fields(device)
+
+    def push_assets_to_sekoia(self, assets: AssetList) -> None:
+        if not self.incremental_sync:
+            super().push_assets_to_sekoia(assets)
+            return
+
+        # the checkpoint is updated only when the batch was posted
+        self._batch_fingerprints = {
+            asset.device.uid: self._pending_fingerprints.pop(asset.device.uid)
+            for asset in assets.items
+            if asset.device.uid in self._pending_fingerprints
+        }
+        super().push_assets_to_sekoia(assets)
+
+        if self._batch_fingerprints is not None:
+            self.log(
+                f"Failed to push {len(self._batch_fingerprints)} devices, they will be sent on the next cycle",
+                level="warning",
+            )
+            self._batch_fingerprints = None
+            self._batch_failed = True
+
+    def asset_fetch_cycle(self) -> None:
+        self._batch_failed = False
+        self._pending_fingerprints = {}
+        super().asset_fetch_cycle()
+
+        # persist the fingerprints once per cycle rather than after every batch
+        if self.incremental_sync:
+            self.save_fingerprints()
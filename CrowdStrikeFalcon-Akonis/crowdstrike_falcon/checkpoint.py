@@ -0,0 +1,186 @@
+import os
+import threading
+from pathlib import Path
+
+import orjson
+
+from crowdstrike_falcon.logging import get_logger
+
+logger = get_logger()
+
+
+class StreamOffsetsCheckpoint:
+    """
+    Keep the offsets of the event streams in memory and persist them in background
+
+    The offsets are written on disk every `flush_interval` seconds, or as soon as
+    `flush_every` commits were done since the last write. The file is replaced atomically,
+    so a crash during a write never corrupts the checkpoint.
+    """
+
+    def __init__(
+        self,
+        data_path: Path | str,
+        filename: str = "cache.json",
+        flush_interval: float = 5.0,
+        flush_every: int = 10,
+    ):
+        self._filepath = Path(data_path) / filename
+        self.flush_interval = flush_interval
+        self.flush_every = flush_every
+        self._offsets: dict[str, int] = self._load()
+        self._nb_commits_since_flush = 0
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._flush_requested = threading.Event()
+        self._stop_event = threading.Event()
+        self._flusher: threading.Thread | None = None
+
+    def _load(self) -> dict[str, int]:
+        if not self._filepath.is_file():
+            return {}
+
+        try:
+            return orjson.loads(self._filepath.read_bytes())
+        except orjson.JSONDecodeError:
+            logger.warning("The checkpoint file is corrupted, ignore it", filepath=str(self._filepath))
+            return {}
+
+    def get(self, stream_root_url: str, default: int = 0) -> int:
+        with self._lock:
+            return self._offsets.get(stream_root_url, default)
+
+    def commit(self, offsets: dict[str, int]) -> None:
+        """
+        Record the offsets of events acknowledged by the intake
+
+        :param dict offsets: The last acknowledged offset for each stream
+        """
+        if not offsets:
+            return
+
+        with self._lock:
+            self._offsets.update(offsets)
+            self._dirty = True
+            self._nb_commits_since_flush += 1
+            if self._nb_commits_since_flush >= self.flush_every:
+                self._flush_requested.set()
+
+    def flush(self) -> None:
+        """
+        Write the offsets on disk, if changed since the last write
+        """
+        with self._lock:
+            if not self._dirty:
+                return
+
+            content = orjson.dumps(self._offsets)
+            self._dirty = False
+            self._nb_commits_since_flush = 0
+
+        tmp_filepath = self._filepath.with_name(f"{self._filepath.name}.tmp")
+        try:
+            tmp_filepath.write_bytes(content)
+            os.replace(tmp_filepath, self._filepath)
+        except OSError:
+            # retry on the next flush
+            with self._lock:
+                self._dirty = True
+            raise
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            self._flush_requested.wait(self.flush_interval)
+            self._flush_requested.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Failed to persist the offsets of the streams")
+
+    def start(self) -> None:
+        if self._flusher is None or not self._flusher.is_alive():
+            self._stop_event.clear()
+            self._flusher = threading.Thread(target=self._run, name="offsets-checkpoint", daemon=True)
+            self._flusher.start()
+
+    def stop(self) -> None:
+        """
+        Stop the background writes and persist the last offsets
+        """
+        self._stop_event.set()
+        self._flush_requested.set()
+        if self._flusher is not None:
+            self._flusher.join()
+            self._flusher = None
+
+        self.flush()
+
+
+class OrderedOffsetsCommitter:
+    """
+    Commit the offsets of batches forwarded concurrently, in the order the batches were created
+
+    Each batch registers a sequence number when created. Its offsets are committed only once
+    all the previous batches are completed, so a stream offset never goes past a batch still
+    being forwarded. Once a batch completes without being acknowledged, the offsets of the
+    later batches are no longer committed: the events from this batch are read again on restart.
+    """
+
+    def __init__(self, checkpoint: StreamOffsetsCheckpoint):
+        self.checkpoint = checkpoint
+        self._next_sequence = 0
+        self._next_sequence_to_commit = 0
+        self._completed: dict[int, dict[str, int]] = {}
+        self._unacknowledged_sequence: int | None = None
+        self._lock = threading.Lock()
+
+    def register(self) -> int:
+        """
+        Return the sequence number of a new batch
+        """
+        with self._lock:
+            sequence = self._next_sequence
+            self._next_sequence += 1
+            return sequence
+
+    def complete(self, sequence: int, offsets: dict[str, int] | None) -> None:
+        """
+        Mark the batch as completed
+
+        :param int sequence: The sequence number of the batch
+        :param dict offsets: The last offset for each stream of the batch, None if the batch was not acknowledged
+        """
+        with self._lock:
+            if offsets is None:
+                if self._unacknowledged_sequence is None or sequence < self._unacknowledged_sequence:
+                    self._unacknowledged_sequence = sequence
+            elif self._unacknowledged_sequence is None or sequence < self._unacknowledged_sequence:
+                self._completed[sequence] = offsets
+
+            # commit the offsets of the consecutive completed batches, up to the first unacknowledged one
+            while self._next_sequence_to_commit in self._completed:
+                batch_offsets = self._completed.pop(self._next_sequence_to_commit)
+                self._next_sequence_to_commit += 1
+                if batch_offsets:
+                    self.checkpoint.commit(batch_offsets)
+
+            # the batches after the unacknowledged one will never be committed
+            if self._unacknowledged_sequence is not None:
+                for later_sequence in [seq for seq in self._completed if seq > self._unacknowledged_sequence]:
+                    del self._completed[later_sequence]
+
+    @property
+    def blocked(self) -> bool:
+        """
+        Whether a batch was not acknowledged, so the offsets are no longer committed
+        """
+        with self._lock:
+            return self._unacknowledged_sequence is not None
+
+    @property
+    def pending(self) -> int:
+        """
+        Number of batches registered but not committed yet
+        """
+        with self._lock:
+            return self._next_sequence - self._next_sequence_to_commit
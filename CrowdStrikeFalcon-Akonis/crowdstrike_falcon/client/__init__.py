@@ -44,6 +44,26 @@ class ApiClient(requests.Session):
     def get_url(self, endpoint: str) -> str:
         return urljoin(self._base_url, endpoint.lstrip("/"))
 
+    def parse_response(self, response: requests.Response) -> dict[str, Any]:
+        """
+        Return the content of the response, raising an exception on errors
+        """
+        # raise exception according the status code
+        if not response.ok:
+            logger.error("CrowdStrike API error response: %s", response.text)
+        response.raise_for_status()
+
+        content = response.json()
+
+        # check for errors
+        errors = content.get("errors", [])
+        if errors and len(errors):
+            errors_str = "\n".join([f"{error['code']}: {error['message']}" for error in errors])
+            msg = f"The API returns the following errors: \n{errors_str}"
+            raise HTTPError(msg, response=response)  # type: ignore[call-arg]
+
+        return content
+
     def request_endpoint(self, method: str, endpoint: str, **kwargs) -> Generator[Any, None, None]:
         """
         Send the request and handle the response
@@ -67,20 +87,7 @@ class ApiClient(requests.Session):
                     new_params["offset"] = pagination["offset"]
 
             response = self.request(method=method, url=url, params=new_params, **kwargs)
-
-            # raise exception according the status code
-            if not response.ok:
-                logger.error("CrowdStrike API error response: %s", response.text)
-            response.raise_for_status()
-
-            content = response.json()
-
-            # check for errors
-            errors = content.get("errors", [])
-            if errors and len(errors):
-                errors_str = "\n".join([f"{error['code']}: {error['message']}" for error in errors])
-                msg = f"The API returns the following errors: \n{errors_str}"
-                raise HTTPError(msg, response=response)  # type: ignore[call-arg]
+            content = self.parse_response(response)
             yield from content.get("resources") or []
 
             pagination = content.get("meta", {}).get("pagination")
@@ -141,6 +148,14 @@ class CrowdstrikeFalconClient(ApiClient):
             **kwargs,
         )
 
+    def find_indicators_details(self, fql_filter: str, limit: int = 2000, **kwargs) -> Generator[dict, None, None]:
+        yield from self.request_endpoint(
+            "GET",
+            "/iocs/combined/indicator/v1",
+            params={"filter": fql_filter, "limit": limit},
+            **kwargs,
+        )
+
     def upload_indicators(self, indicators: list, **kwargs) -> Generator[dict, None, None]:
         yield from self.request_endpoint(
             "POST",
@@ -229,6 +244,32 @@ class CrowdstrikeFalconClient(ApiClient):
             **kwargs,
         )
 
+    def scroll_devices_uuids(
+        self, filter: str | None = None, sort: str | None = None, limit: int = 5000, **kwargs
+    ) -> Generator[str, None, None]:
+        """
+        Iterate over the identifiers of the devices with the scroll API
+
+        Unlike the other endpoints, the offset of the scroll API is an opaque token.
+        """
+        params: dict[str, Any] = {"limit": limit}
+        if filter:
+            params["filter"] = filter
+        if sort:
+            params["sort"] = sort
+
+        url = self.get_url("/devices/queries/devices-scroll/v1")
+        while True:
+            content = self.parse_response(self.request(method="GET", url=url, params=params, **kwargs))
+            resources = content.get("resources") or []
+            yield from resources
+
+            offset = content.get("meta", {}).get("pagination", {}).get("offset")
+            if not offset or len(resources) < limit:
+                break
+
+            params["offset"] = offset
+
     def get_devices_infos(self, ids: list[str], **kwargs) -> Generator[dict[str, Any], None, None]:
         yield from self.request_endpoint(
             "POST",
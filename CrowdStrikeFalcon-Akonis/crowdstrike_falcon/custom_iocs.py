@@ -1,13 +1,172 @@
 import json
+import time
 from collections import defaultdict
+from collections.abc import Callable, Generator
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, timedelta
 from posixpath import join as urljoin
 from typing import Dict, List
 
+from dateutil.parser import isoparse
+
 from crowdstrike_falcon.action import CrowdstrikeAction
+from crowdstrike_falcon.client import CrowdstrikeFalconClient
 from crowdstrike_falcon.helpers import stix_to_indicators
 
 
+def chunked(items: list, size: int) -> Generator[list, None, None]:
+    for index in range(0, len(items), size):
+        yield items[index : index + size]
+
+
+def build_values_filter(values: list[str]) -> str:
+    """
+    Build the FQL filter matching the indicators with one of the values
+    """
+    escaped_values = ",".join("'{0}'".format(value.replace("'", "\\'")) for value in values)
+    return f"value:[{escaped_values}]"
+
+
+class IndicatorsBulkSync:
+    """
+    Synchronize a large set of indicators with Crowdstrike Falcon
+
+    The existing indicators are looked up by chunks of values, then compared with the desired ones
+    to only create, update or delete what changed. The writes are sent by batches, concurrently.
+    """
+
+    LOOKUP_CHUNK_SIZE = 100
+    WRITE_BATCH_SIZE = 200
+    MAX_WORKERS = 4
+    # the fields compared to decide if an existing indicator must be updated
+    COMPARED_FIELDS = ("action", "severity", "description", "expiration", "source", "platforms", "tags")
+
+    def __init__(self, client: CrowdstrikeFalconClient, log: Callable, max_workers: int = MAX_WORKERS):
+        self.client = client
+        self.log = log
+        self.max_workers = max_workers
+
+    @staticmethod
+    def get_key(indicator: dict) -> tuple[str, str]:
+        return (indicator.get("type", ""), indicator.get("value", ""))
+
+    def find_existing_indicators(self, executor: ThreadPoolExecutor, values: list[str]) -> dict[tuple, dict]:
+        """
+        Return the existing indicators matching the values, by type and value
+        """
+        existing: dict[tuple, dict] = {}
+        filters = [build_values_filter(chunk) for chunk in chunked(sorted(set(values)), self.LOOKUP_CHUNK_SIZE)]
+        for indicators in executor.map(lambda fql: list(self.client.find_indicators_details(fql)), filters):
+            for indicator in indicators:
+                existing[self.get_key(indicator)] = indicator
+
+        return existing
+
+    @staticmethod
+    def is_same_date(desired: str, existing: str | None) -> bool:
+        """
+        Compare two ISO 8601 dates whatever their precision, e.g. `...T00:00:00.000Z` and `...T00:00:00Z`
+        """
+        try:
+            return existing is not None and isoparse(desired) == isoparse(existing)
+        except (TypeError, ValueError):
+            return desired == existing
+
+    def needs_update(self, desired: dict, existing: dict) -> bool:
+        for field in self.COMPARED_FIELDS:
+            desired_value = desired.get(field)
+            # empty values are not sent to Crowdstrike
+            if desired_value in (None, "", [], {}):
+                continue
+
+            existing_value = existing.get(field)
+            if field == "expiration":
+                if not self.is_same_date(desired_value, existing_value):
+                    return True
+            elif isinstance(desired_value, list):
+                if sorted(desired_value) != sorted(existing_value or []):
+                    return True
+            elif desired_value != existing_value:
+                return True
+
+        return False
+
+    def get_update_payload(self, desired: dict, existing: dict) -> dict:
+        payload = {field: desired.get(field) for field in self.COMPARED_FIELDS}
+        payload = {k: v for k, v in payload.items() if v is not None and v != "" and v != []}
+        payload["id"] = existing["id"]
+        return payload
+
+    def sync(self, desired: list[dict], revoked: list[dict]) -> dict[str, float]:
+        """
+        Create or update the desired indicators and delete the revoked ones
+
+        :return: The number of indicators created, updated, deleted and unchanged, and the duration in seconds
+        """
+        started_at = time.monotonic()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            existing = self.find_existing_indicators(
+                executor, [indicator["value"] for indicator in [*desired, *revoked]]
+            )
+
+            to_create: list[dict] = []
+            to_update: list[dict] = []
+            nb_unchanged = 0
+            for indicator in desired:
+                existing_indicator = existing.get(self.get_key(indicator))
+                if existing_indicator is None:
+                    to_create.append(indicator)
+                elif self.needs_update(indicator, existing_indicator):
+                    to_update.append(self.get_update_payload(indicator, existing_indicator))
+                else:
+                    nb_unchanged += 1
+
+            # a value both revoked and desired is kept, as it was recreated once deleted
+            desired_keys = {self.get_key(indicator) for indicator in desired}
+            to_delete = [
+                existing[key]["id"]
+                for key in map(self.get_key, revoked)
+                if key in existing and key not in desired_keys
+            ]
+
+            self.log(
+                f"Synchronizing indicators: {len(to_create)} to create, {len(to_update)} to update, "
+                f"{len(to_delete)} to delete, {nb_unchanged} unchanged"
+            )
+
+            # remove the revoked indicators before adding new ones, in case we are near the limit in CrowdStrike
+            deletions = [
+                executor.submit(lambda batch: list(self.client.delete_indicators(batch)), batch)
+                for batch in chunked(to_delete, self.WRITE_BATCH_SIZE)
+            ]
+            for future in deletions:
+                future.result()
+
+            writes = [
+                executor.submit(lambda batch: list(self.client.create_indicators(indicators=batch)), batch)
+                for batch in chunked(to_create, self.WRITE_BATCH_SIZE)
+            ] + [
+                executor.submit(lambda batch: list(self.client.update_indicators(indicators=batch)), batch)
+                for batch in chunked(to_update, self.WRITE_BATCH_SIZE)
+            ]
+            for future in writes:
+                future.result()
+
+        report = {
+            "created": len(to_create),
+            "updated": len(to_update),
+            "deleted": len(to_delete),
+            "unchanged": nb_unchanged,
+            "duration": round(time.monotonic() - started_at, 3),
+        }
+        self.log(
+            f"Synchronized indicators in {report['duration']}s: {report['created']} created, "
+            f"{report['updated']} updated, {report['deleted']} deleted, {report['unchanged']} unchanged"
+        )
+        return report
+
+
 class CrowdstrikeActionIOC(CrowdstrikeAction):
     ACTION = "no_action"
     DEFAULT_SEVERITY = "high"
@@ -37,19 +196,22 @@ class CrowdstrikeActionIOC(CrowdstrikeAction):
 
     def remove_indicators(self, indicators: list):
         ids_to_remove = []
-        # Get the indicator IDs in Crowdstrike
-        for indicator in indicators:
-            fql_filter = f"value:\"{indicator['value']}\""
-            result = next(self.client.find_indicators(fql_filter=fql_filter))
-            if result:
-                ids_to_remove.append(result)
-            else:
-                self.log(f"IOC with value {indicator['value']} not found, skipping delete")
+        # Get the indicator IDs in Crowdstrike, looking up several values at once
+        values = [indicator["value"] for indicator in indicators]
+        found_values = set()
+        for chunk in chunked(values, IndicatorsBulkSync.LOOKUP_CHUNK_SIZE):
+            for result in self.client.find_indicators_details(fql_filter=build_values_filter(chunk)):
+                ids_to_remove.append(result["id"])
+                found_values.add(result.get("value"))
+
+        for value in values:
+            if value not in found_values:
+                self.log(f"IOC with value {value} not found, skipping delete")
 
         # Delete the IOCs in Crowdstrike
-        if len(ids_to_remove) > 0:
-            self.log(f"Removing {len(ids_to_remove)} existing indicators from Crowdstrike Falcon")
-            next(self.client.delete_indicators(ids_to_remove))
+        for batch in chunked(ids_to_remove, IndicatorsBulkSync.WRITE_BATCH_SIZE):
+            self.log(f"Removing {len(batch)} existing indicators from Crowdstrike Falcon")
+            list(self.client.delete_indicators(batch))
 
     def remove_expired_indicators(self):
         ids_to_remove = []
@@ -128,11 +290,6 @@ class CrowdstrikeActionIOC(CrowdstrikeAction):
         self.log("Pushing 1 new indicator to Crowdstrike Falcon")
         next(self.client.create_indicators(indicators=[indicator]))
 
-    def create_indicators_batch(self, indicators: list):
-        if len(indicators) > 0:
-            self.log(f"Pushing {len(indicators)} new indicators to Crowdstrike Falcon")
-            next(self.client.create_indicators(indicators=indicators))
-
 
 class CrowdstrikeActionPushIOCs(CrowdstrikeActionIOC):
     DEFAULT_SEKOIA_BASE_URL = "https://app.sekoia.io"
@@ -209,10 +366,9 @@ class CrowdstrikeActionPushIOCs(CrowdstrikeActionIOC):
         if len(indicators["valid"]) == 0 and len(indicators["revoked"]) == 0:
             self.log("Received indicators were not valid and/or not supported")
             return
-        # Remove revoked indicators before proceeding with adding new ones
-        # in case we are near the limit in CrowdStrike
-        self.remove_indicators(indicators["revoked"])
-        self.create_indicators_batch(indicators["valid"])
+        # Diff the indicators with the existing ones, then remove the revoked indicators
+        # before adding new ones in case we are near the limit in CrowdStrike
+        IndicatorsBulkSync(self.client, self.log).sync(desired=indicators["valid"], revoked=indicators["revoked"])
 
 
 class CrowdstrikeActionPushIOCsBlock(CrowdstrikeActionPushIOCs):
@@ -274,6 +430,7 @@ class CrowdstrikeActionMonitorIOC(CrowdstrikeActionAddIOC):
     SUPPORTED_TYPES = ["md5", "sha256", "ipv4", "ipv6", "domain"]
     ACTION = "detect"
 
+
 class CrowdstrikeActionGetIOCActions(CrowdstrikeAction):
     def run(self, arguments):
         ids: list[str] = arguments.get("ids", [])
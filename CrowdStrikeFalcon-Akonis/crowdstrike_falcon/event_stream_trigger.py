@@ -1,33 +1,95 @@
-import json
 import queue
 import threading
 import time
 import os
-from collections.abc import Generator
+from collections.abc import Callable, Generator
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
 from functools import cached_property
 
 import orjson
 from requests.auth import AuthBase
 from requests.exceptions import HTTPError, StreamConsumedError
 from sekoia_automation.connector import Connector
-from sekoia_automation.storage import PersistentJSON
 from sekoia_automation.timer import RepeatedTimer
 
 from crowdstrike_falcon import CrowdStrikeFalconModule
+from crowdstrike_falcon.checkpoint import OrderedOffsetsCommitter, StreamOffsetsCheckpoint
 from crowdstrike_falcon.client import CrowdstrikeFalconClient
 from crowdstrike_falcon.exceptions import StreamNotAvailable
 from crowdstrike_falcon.helpers import (
+    DetailsBatcher,
+    TTLCache,
     compute_refresh_interval,
     get_detection_id,
     get_epp_detection_composite_id,
     group_edges_by_verticle_type,
 )
 from crowdstrike_falcon.logging import get_logger
-from crowdstrike_falcon.metrics import EVENTS_LAG, INCOMING_DETECTIONS, INCOMING_VERTICLES, OUTCOMING_EVENTS
+from crowdstrike_falcon.metrics import (
+    BATCH_FILLING_DURATION,
+    ENRICHMENT_QUEUE_SIZE,
+    EVENTS_LAG,
+    FORWARD_EVENTS_DURATION,
+    FORWARDED_BATCH_BYTES,
+    FORWARDED_BATCH_SIZE,
+    INCOMING_DETECTIONS,
+    INCOMING_VERTICLES,
+    OUTCOMING_EVENTS,
+    THREATGRAPH_CACHE_HITS,
+    THREATGRAPH_CACHE_MISSES,
+)
 
 logger = get_logger()
 
 MAX_EVENTS_PER_BATCH = 1000
+MAX_BYTES_PER_BATCH = 5 * 1024 * 1024
+MAX_BATCH_LINGER = 1.0
+DEFAULT_VERTICLES_COLLECTION_CONCURRENCY = 4
+DEFAULT_VERTICLES_CACHE_SIZE = 10000
+DEFAULT_VERTICLES_CACHE_TTL = 600
+DEFAULT_ENRICHMENT_WORKERS = 2
+DEFAULT_FORWARDER_WORKERS = 1
+DEFAULT_ENRICHMENT_QUEUE_SIZE = 1000
+FORWARD_RETRY_DELAY = 5
+MAX_FORWARD_RETRY_DELAY = 60
+
+
+def forward_until_acknowledged(
+    forward: Callable[[], dict[str, int] | None],
+    stop_event: threading.Event,
+    log: Callable,
+    log_exception: Callable,
+) -> dict[str, int] | None:
+    """
+    Forward events to the intake, again until they are acknowledged
+
+    :param forward: Forward the events and return their offsets, None if they were not acknowledged by the intake
+    :return: The offsets of the events, None if the worker stopped before they were acknowledged
+    """
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            acknowledged_offsets = forward()
+            if acknowledged_offsets is not None:
+                return acknowledged_offsets
+        except Exception as error:
+            log_exception(error, message="Failed to forward events")
+
+        delay = min(FORWARD_RETRY_DELAY * attempt, MAX_FORWARD_RETRY_DELAY)
+        log(
+            message=f"The events were not acknowledged by the intake, forward them again in {delay} seconds",
+            level="warning",
+        )
+        if stop_event.wait(delay):
+            break
+
+    log(
+        message="The events were not acknowledged before stopping, they will be read again on restart",
+        level="warning",
+    )
+    return None
 
 
 class VerticlesCollector:
@@ -35,6 +97,9 @@ class VerticlesCollector:
         self,
         connector: "EventStreamTrigger",
         falcon_client: CrowdstrikeFalconClient | None = None,
+        max_workers: int = DEFAULT_VERTICLES_COLLECTION_CONCURRENCY,
+        cache_size: int = DEFAULT_VERTICLES_CACHE_SIZE,
+        cache_ttl: int = DEFAULT_VERTICLES_CACHE_TTL,
     ):
         self.connector = connector
         self.falcon_client = falcon_client or connector.client
@@ -42,6 +107,31 @@ class VerticlesCollector:
             "device",
             "hunting_lead",
         }
+        # The ThreatGraph requests are sent through the shared client,
+        # so the rate limit of its LimiterAdapter applies to all the workers
+        self.max_workers = max(1, max_workers)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="verticles-collector")
+        # consecutive detections on a host often share their processes:
+        # cache the edges per (graph id, edge type) and the verticles per (vertex id, vertex type)
+        self._edges_cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        self._verticles_cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        # the details of the detections and alerts, requested by the enrichment workers, are fetched by batches
+        self._detections_batcher = DetailsBatcher(
+            lambda ids: self.falcon_client.get_detection_details(detection_ids=ids),
+            id_field="detection_id",
+            log=self.log,
+        )
+        self._alerts_batcher = DetailsBatcher(
+            lambda ids: self.falcon_client.get_alert_details(composite_ids=ids),
+            id_field="composite_id",
+            log=self.log,
+        )
+
+    def shutdown(self) -> None:
+        """
+        Stop the workers of the collector
+        """
+        self._executor.shutdown(wait=False, cancel_futures=True)
 
     def log(self, *args, **kwargs):
         self.connector.log(*args, **kwargs)
@@ -98,34 +188,98 @@ class VerticlesCollector:
 
         return graph_ids
 
+    def list_edges(self, graph_id: str, edge_type: str) -> list[dict]:
+        """
+        Return the edges of the type starting from the graph id, from the cache if possible
+        """
+        intake_key = self.connector.configuration.intake_key
+        edges = self._edges_cache.get((graph_id, edge_type))
+        if edges is not None:
+            THREATGRAPH_CACHE_HITS.labels(intake_key=intake_key, cache="edges").inc()
+            return edges
+
+        THREATGRAPH_CACHE_MISSES.labels(intake_key=intake_key, cache="edges").inc()
+        edges = list(self.falcon_client.list_edges(graph_id, edge_type))
+        self._edges_cache.set((graph_id, edge_type), edges)
+        return edges
+
+    def get_verticles_details(self, verticle_ids: list[str], verticle_type: str) -> list[dict]:
+        """
+        Return the details of the verticles, only requesting the API for the ones missing from the cache
+        """
+        intake_key = self.connector.configuration.intake_key
+        verticles: list[dict] = []
+        missing_ids: list[str] = []
+        for verticle_id in verticle_ids:
+            vertex = self._verticles_cache.get((verticle_id, verticle_type))
+            if vertex is not None:
+                verticles.append(vertex)
+            else:
+                missing_ids.append(verticle_id)
+
+        THREATGRAPH_CACHE_HITS.labels(intake_key=intake_key, cache="verticles").inc(len(verticles))
+        if missing_ids:
+            THREATGRAPH_CACHE_MISSES.labels(intake_key=intake_key, cache="verticles").inc(len(missing_ids))
+            for vertex in self.falcon_client.get_verticles_details(missing_ids, verticle_type):
+                self._verticles_cache.set((vertex["id"], verticle_type), vertex)
+                verticles.append(vertex)
+
+        return verticles
+
+    def collect_verticles_from_edge_type(self, graph_id: str, edge_type: str) -> list[tuple[str, str, dict]]:
+        """
+        Collect the verticles linked to a graph id through one type of edges
+
+        :param str graph_id: The source of the edges
+        :param str edge_type: The type of edges to follow
+        :return: The verticles, along with the source vertex id and the type of edge
+        :rtype: list
+        """
+        verticles: list[tuple[str, str, dict]] = []
+        try:
+            # get edges starting from a graph id
+            edges = self.list_edges(graph_id, edge_type)
+            groups = group_edges_by_verticle_type(iter(edges))
+
+            # for each group, get the verticles
+            for verticle_type, list_of_edges in groups:
+                verticles_links = {edge["id"]: edge["source_vertex_id"] for edge in list_of_edges}
+                for vertex in self.get_verticles_details(list(verticles_links.keys()), verticle_type):
+                    verticles.append((verticles_links[vertex["id"]], edge_type, vertex))
+        except HTTPError as error:
+            self.log_exception(
+                error,
+                message=f"Failed to collect verticles for edge_type {edge_type} for graph_id {graph_id}",
+                level="warning",
+            )
+
+        return verticles
+
     def collect_verticles_from_graph_ids(self, graph_ids: set[str]) -> Generator[tuple[str, str, dict], None, None]:
         """
         Collect verticles from a list of graph ids
 
+        Each couple (graph id, edge type) is explored by the pool of workers,
+        the verticles are yielded as soon as their exploration is over.
+
         :param list: graph_ids: The list of sources to explore the graph
         """
-        for graph_id in graph_ids:
+        futures = [
+            self._executor.submit(self.collect_verticles_from_edge_type, graph_id, edge_type)
+            for graph_id in graph_ids
             # iter over each type of edges
-            for edge_type in self.edge_types:
-                try:
-                    # get edges starting from a graph id
-                    edges = self.falcon_client.list_edges(graph_id, edge_type)
-                    groups = group_edges_by_verticle_type(edges)
-
-                    # for each group, get the verticles
-                    for verticle_type, list_of_edges in groups:
-                        verticles_links = {edge["id"]: edge["source_vertex_id"] for edge in list_of_edges}
-                        for vertex in self.falcon_client.get_verticles_details(
-                            list(verticles_links.keys()), verticle_type
-                        ):
-                            INCOMING_VERTICLES.labels(intake_key=self.connector.configuration.intake_key).inc()
-                            yield (verticles_links[vertex["id"]], edge_type, vertex)
-                except HTTPError as error:
-                    self.log_exception(
-                        error,
-                        message=f"Failed to collect verticles for edge_type {edge_type} for graph_id {graph_id}",
-                        level="warning",
-                    )
+            for edge_type in self.edge_types
+        ]
+
+        try:
+            for future in as_completed(futures):
+                for verticle in future.result():
+                    INCOMING_VERTICLES.labels(intake_key=self.connector.configuration.intake_key).inc()
+                    yield verticle
+        finally:
+            # don't waste API calls if the consumer stopped early
+            for future in futures:
+                future.cancel()
 
     def collect_verticles_from_detection(self, detection_id: str) -> Generator[tuple[str, str, dict], None, None]:
         """
@@ -135,7 +289,10 @@ class VerticlesCollector:
         """
         try:
             # get detection details from its identifier
-            detection_details = next(self.falcon_client.get_detection_details(detection_ids=[detection_id]))
+            detection_details = self._detections_batcher.get(detection_id)
+            if detection_details is None:
+                self.log(level="warning", message=f"Detection {detection_id} not found")
+                return
 
             # get graph ids from detection
             graph_ids = self.get_graph_ids_from_detection(detection_details)
@@ -164,7 +321,10 @@ class VerticlesCollector:
         """
         try:
             # get alert details from its identifier
-            alert_details = next(self.falcon_client.get_alert_details(composite_ids=[composite_id]))
+            alert_details = self._alerts_batcher.get(composite_id)
+            if alert_details is None:
+                self.log(level="warning", message=f"Alert {composite_id} not found")
+                return
 
             # get graph ids from detection
             graph_ids = self.get_graph_ids_from_alert(alert_details)
@@ -315,24 +475,31 @@ class EventStreamReader(threading.Thread):
                 while self.running:
                     try:
                         for line in http_response.iter_lines():
-                            if line.strip():
+                            line = line.strip()
+                            if line:
                                 try:
-                                    decoded_line = line.strip().decode()
                                     # check the line is json
-                                    event = json.loads(decoded_line)
-                                    # store the new event in the queue along with it stream root url
-                                    self.events_queue.put((self.stream_root_url, decoded_line))
+                                    event = orjson.loads(line)
+                                    metadata = event.get("metadata", {})
+
+                                    # delegate the collection of the verticles to the enrichment workers,
+                                    # before queueing the event so the following offsets wait for it
+                                    self.submit_for_enrichment(event)
+
+                                    # store the new event in the queue along with it stream root url,
+                                    # its offset and its creation time
+                                    self.events_queue.put(
+                                        (
+                                            self.stream_root_url,
+                                            line.decode(),
+                                            metadata.get("offset"),
+                                            metadata.get("eventCreationTime"),
+                                        )
+                                    )
                                     INCOMING_DETECTIONS.labels(
                                         intake_key=self.connector.configuration.intake_key
                                     ).inc()
 
-                                    if self.connector.use_alert_api:
-                                        alert_id = get_epp_detection_composite_id(event)
-                                        self.collect_verticles_for_epp_detection(alert_id, event)
-
-                                    detection_id = get_detection_id(event)
-                                    self.collect_verticles(detection_id, event)
-
                                 except Exception as any_exception:
                                     logger.error(
                                         "failed to read line from event stream",
@@ -361,28 +528,146 @@ class EventStreamReader(threading.Thread):
                 level="info",
             )
 
-    def collect_verticles(self, detection_id: str | None, detection_event: dict):
-        if detection_id is None:
-            logger.info("Not a detection")
-            return
+    def submit_for_enrichment(self, event: dict) -> None:
+        """
+        Submit the detection to the enrichment workers
+
+        The detection registers a sequence in the offsets committer, completed once its verticles were
+        forwarded: the offsets of the events read from now on are not committed before.
+        The stream reading is paused while the enrichment queue is full.
 
+        :param dict event: The event read from the stream
+        """
         if self.verticles_collector is None:
-            logger.info("verticles collection disabled")
             return
 
-        logger.info("Collect verticles for detection", detection_id=detection_id)
+        is_detection = get_detection_id(event) is not None or (
+            self.connector.use_alert_api and get_epp_detection_composite_id(event) is not None
+        )
+        if not is_detection:
+            return
+
+        intake_key = self.connector.configuration.intake_key
+        sequence = self.connector.offsets_committer.register()
+        waiting = False
+        while True:
+            try:
+                self.connector.enrichment_queue.put((self.stream_root_url, event, sequence), timeout=1)
+                break
+            except queue.Full:
+                if not self.running:
+                    # the detection will be read and enriched again on restart
+                    self.connector.offsets_committer.complete(sequence, None)
+                    return
+
+                if not waiting:
+                    waiting = True
+                    logger.warning(
+                        "The enrichment queue is full, wait for the enrichment workers", stream=self.stream_root_url
+                    )
+
+        ENRICHMENT_QUEUE_SIZE.labels(intake_key=intake_key).set(self.connector.enrichment_queue.qsize())
+
+
+class DetectionEnricher(threading.Thread):
+    """
+    Collect the verticles of the detections submitted by the stream readers
+    and forward them as events
+    """
+
+    def __init__(
+        self,
+        connector: "EventStreamTrigger",
+        verticles_collector: VerticlesCollector,
+    ):
+        super().__init__()
+        self.connector = connector
+        self.verticles_collector = verticles_collector
+        self.enrichment_queue = connector.enrichment_queue
+        self._stop_event = threading.Event()
+
+    def stop(self):
+        self._stop_event.set()
+
+    @property
+    def running(self):
+        return not self._stop_event.is_set()
+
+    def log(self, *args, **kwargs):
+        self.connector.log(*args, **kwargs)
+
+    def log_exception(self, *args, **kwargs):
+        self.connector.log_exception(*args, **kwargs)
+
+    def run(self) -> None:
+        """
+        Consume the enrichment queue
+        """
+
+        while self.running:
+            try:
+                stream_root_url, detection_event, sequence = self.enrichment_queue.get(block=True, timeout=1)
+            except queue.Empty:
+                continue
+
+            # a failed collection doesn't hold the offsets back, only verticles not acknowledged by the intake
+            acknowledged: dict[str, int] | None = {}
+            try:
+                ENRICHMENT_QUEUE_SIZE.labels(intake_key=self.connector.configuration.intake_key).set(
+                    self.enrichment_queue.qsize()
+                )
+                if not self.enrich(stream_root_url, detection_event):
+                    acknowledged = None
+            except Exception as error:
+                self.log_exception(error, message="Failed to enrich detection")
+            finally:
+                self.connector.offsets_committer.complete(sequence, acknowledged)
+                self.enrichment_queue.task_done()
+
+    def enrich(self, stream_root_url: str, detection_event: dict) -> bool:
+        """
+        Collect and forward the verticles of the detection
+
+        :return: False if the enricher stopped before the verticles were acknowledged by the intake
+        """
+        forwarded = True
+        if self.connector.use_alert_api:
+            composite_id = get_epp_detection_composite_id(detection_event)
+            forwarded = self.collect_verticles_for_epp_detection(stream_root_url, composite_id, detection_event)
+
+        detection_id = get_detection_id(detection_event)
+        return self.collect_verticles(stream_root_url, detection_id, detection_event) and forwarded
 
+    def push_verticles(self, events: list[str]) -> dict[str, int] | None:
+        """
+        Push the verticles to the intake
+
+        :return: An empty dict, the verticles having no offset, or None if they were not all acknowledged
+        """
+        OUTCOMING_EVENTS.labels(intake_key=self.connector.configuration.intake_key).inc(len(events))
+        event_ids = self.connector.push_events_to_intakes(events=events)
+        if len(event_ids) < len(events):
+            self.log(
+                message=f"Only {len(event_ids)} of {len(events)} verticles were acknowledged by the intake",
+                level="warning",
+            )
+            return None
+
+        return {}
+
+    def forward_verticles(
+        self,
+        stream_root_url: str,
+        detection_id: str,
+        detection_event: dict,
+        verticles: Generator[tuple[str, str, dict], None, None],
+    ) -> bool:
         event_content = detection_event.get("event", {})
         severity_name = event_content.get("SeverityName")
         severity_code = event_content.get("Severity")
 
-        nb_verticles = 0
-        for (
-            source_vertex_id,
-            edge_type,
-            vertex,
-        ) in self.verticles_collector.collect_verticles_from_detection(detection_id):
-            nb_verticles += 1
+        events: list[str] = []
+        for source_vertex_id, edge_type, vertex in verticles:
             event = {
                 "metadata": {
                     "detectionIdString": detection_id,
@@ -392,54 +677,82 @@ class EventStreamReader(threading.Thread):
                 },
                 "event": vertex,
             }
-            self.events_queue.put((self.stream_root_url, orjson.dumps(event).decode()))
+            events.append(orjson.dumps(event).decode())
 
-        self.log(message=f"Collected {nb_verticles} vertex", level="info")
+        self.log(message=f"Collected {len(events)} vertex", level="info")
+        if len(events) == 0:
+            return True
+
+        # the verticles are pushed here, so the offsets of the stream can wait for their acknowledgement
+        return (
+            forward_until_acknowledged(
+                lambda: self.push_verticles(events), self._stop_event, self.log, self.log_exception
+            )
+            is not None
+        )
 
-    def collect_verticles_for_epp_detection(self, composite_id: str | None, detection_event: dict):
+    def collect_verticles(self, stream_root_url: str, detection_id: str | None, detection_event: dict) -> bool:
+        if detection_id is None:
+            logger.info("Not a detection")
+            return True
+
+        logger.info("Collect verticles for detection", detection_id=detection_id)
+        return self.forward_verticles(
+            stream_root_url,
+            detection_id,
+            detection_event,
+            self.verticles_collector.collect_verticles_from_detection(detection_id),
+        )
+
+    def collect_verticles_for_epp_detection(
+        self, stream_root_url: str, composite_id: str | None, detection_event: dict
+    ) -> bool:
         if composite_id is None:
             logger.info("Not a epp detection")
-            return
-
-        if self.verticles_collector is None:
-            logger.info("verticles collection disabled")
-            return
+            return True
 
         logger.info("Collect verticles for detection", composite_id=composite_id)
+        return self.forward_verticles(
+            stream_root_url,
+            composite_id,
+            detection_event,
+            self.verticles_collector.collect_verticles_from_alert(composite_id),
+        )
 
-        event_content = detection_event.get("event", {})
-        severity_name = event_content.get("SeverityName")
-        severity_code = event_content.get("Severity")
 
-        nb_verticles = 0
-        for (
-            source_vertex_id,
-            edge_type,
-            vertex,
-        ) in self.verticles_collector.collect_verticles_from_alert(composite_id):
-            nb_verticles += 1
-            event = {
-                "metadata": {
-                    "detectionIdString": composite_id,
-                    "eventType": "Vertex",
-                    "edge": {"sourceVertexId": source_vertex_id, "type": edge_type},
-                    "severity": {"name": severity_name, "code": severity_code},
-                },
-                "event": vertex,
-            }
-            self.events_queue.put((self.stream_root_url, orjson.dumps(event).decode()))
+@dataclass(frozen=True)
+class BatchingPolicy:
+    """
+    Limits of the batches of events forwarded to the intake
+
+    A batch is forwarded as soon as one of its limits is reached.
+    """
 
-        self.log(message=f"Collected {nb_verticles} vertex", level="info")
+    max_events: int = MAX_EVENTS_PER_BATCH
+    # the size of the events is approximated by their length, the events being mostly ascii
+    max_bytes: int = MAX_BYTES_PER_BATCH
+    # maximum time, in seconds, to wait for events once the first event of the batch was received
+    max_linger: float = MAX_BATCH_LINGER
+
+    @classmethod
+    def from_env(cls) -> "BatchingPolicy":
+        return cls(
+            max_events=int(os.getenv("EVENTS_BATCH_MAX_EVENTS", str(MAX_EVENTS_PER_BATCH))),
+            max_bytes=int(os.getenv("EVENTS_BATCH_MAX_BYTES", str(MAX_BYTES_PER_BATCH))),
+            max_linger=float(os.getenv("EVENTS_BATCH_MAX_LINGER", str(MAX_BATCH_LINGER))),
+        )
 
 
 class EventForwarder(threading.Thread):
     def __init__(
         self,
         connector: "EventStreamTrigger",
+        batching_policy: BatchingPolicy | None = None,
     ):
         super().__init__()
         self.connector = connector
         self.events_queue = connector.events_queue
+        self.batching_policy = batching_policy or connector.batching_policy
         self._stop_event = threading.Event()
 
     def stop(self):
@@ -455,6 +768,95 @@ class EventForwarder(threading.Thread):
     def log_exception(self, *args, **kwargs):
         self.connector.log_exception(*args, **kwargs)
 
+    def next_batch(self) -> list[tuple[str, str, int | None, int | None]]:
+        """
+        Wait for the next batch of events, according to the batching policy
+
+        Raise queue.Empty if no event was received
+        """
+        policy = self.batching_policy
+        first_item = self.events_queue.get(block=True, timeout=5)
+        started_at = time.monotonic()
+
+        batch = [first_item]
+        batch_size = len(first_item[1])
+        while len(batch) < policy.max_events and batch_size < policy.max_bytes:
+            remaining_time = policy.max_linger - (time.monotonic() - started_at)
+            if remaining_time <= 0:
+                break
+
+            try:
+                item = self.events_queue.get(block=True, timeout=remaining_time)
+            except queue.Empty:
+                break
+
+            batch.append(item)
+            batch_size += len(item[1])
+
+        intake_key = self.connector.configuration.intake_key
+        FORWARDED_BATCH_SIZE.labels(intake_key=intake_key).observe(len(batch))
+        FORWARDED_BATCH_BYTES.labels(intake_key=intake_key).observe(batch_size)
+        BATCH_FILLING_DURATION.labels(intake_key=intake_key).observe(time.monotonic() - started_at)
+        return batch
+
+    def forward_batch(self, batch: list[tuple[str, str, int | None, int | None]]) -> dict[str, int] | None:
+        """
+        Forward the batch to the intake
+
+        :return: The last offset for each stream of the batch, None if the batch was not acknowledged by the intake
+        """
+        # the offset and the creation time of the events were extracted by the stream readers
+        batch_of_events: list[str] = []
+        last_offset_per_stream: dict[str, int] = {}
+        last_creation_time_per_stream: dict[str, int] = {}
+        for stream_root_url, event, offset, creation_time in batch:
+            batch_of_events.append(event)
+            if offset:
+                last_offset_per_stream[stream_root_url] = offset
+            if creation_time:
+                last_creation_time_per_stream[stream_root_url] = creation_time
+
+        self.log(
+            message=f"Forward {len(batch_of_events)} events to the intake",
+            level="info",
+        )
+        OUTCOMING_EVENTS.labels(intake_key=self.connector.configuration.intake_key).inc(len(batch_of_events))
+        with FORWARD_EVENTS_DURATION.labels(intake_key=self.connector.configuration.intake_key).time():
+            event_ids = self.connector.push_events_to_intakes(events=batch_of_events)
+
+        now = time.time()
+        for stream_root_url, last_creation_time in last_creation_time_per_stream.items():
+            lag = now - (last_creation_time / 1000)
+            EVENTS_LAG.labels(intake_key=self.connector.configuration.intake_key, stream=stream_root_url).set(lag)
+
+        # the offsets are committed only if the whole batch was acknowledged
+        if len(event_ids) < len(batch_of_events):
+            self.log(
+                message=(
+                    f"Only {len(event_ids)} of {len(batch_of_events)} events were acknowledged "
+                    "by the intake, the offsets are not updated"
+                ),
+                level="warning",
+            )
+            return None
+
+        return last_offset_per_stream
+
+    def forward_batch_until_acknowledged(
+        self, batch: list[tuple[str, str, int | None, int | None]]
+    ) -> dict[str, int] | None:
+        """
+        Forward the batch to the intake, again until it is acknowledged
+
+        The offsets of the later batches are not committed meanwhile, so the checkpoint never skips this batch.
+
+        :return: The last offset for each stream of the batch, None if the forwarder stopped before the batch
+                 was acknowledged by the intake
+        """
+        return forward_until_acknowledged(
+            lambda: self.forward_batch(batch), self._stop_event, self.log, self.log_exception
+        )
+
     def run(self) -> None:
         """
         Forward the queue to the intake
@@ -462,50 +864,16 @@ class EventForwarder(threading.Thread):
 
         while self.running:
             try:
-                (stream_root_url, event) = self.events_queue.get(block=True, timeout=5)
-                batch_of_events = [event]
-                last_event_per_stream: dict[str, str] = {stream_root_url: event}
+                # the batches are created one at a time, so their sequence numbers follow the queue order
+                with self.connector.batching_lock:
+                    batch = self.next_batch()
+                    sequence = self.connector.offsets_committer.register()
 
+                acknowledged_offsets: dict[str, int] | None = None
                 try:
-                    while len(batch_of_events) < MAX_EVENTS_PER_BATCH:
-                        (stream_root_url, event) = self.events_queue.get(block=True, timeout=0.5)
-                        last_event_per_stream[stream_root_url] = event
-                        batch_of_events.append(event)
-
-                except queue.Empty:
-                    pass
-
-                if batch_of_events:
-                    self.log(
-                        message=f"Forward {len(batch_of_events)} events to the intake",
-                        level="info",
-                    )
-                    OUTCOMING_EVENTS.labels(intake_key=self.connector.configuration.intake_key).inc(
-                        len(batch_of_events)
-                    )
-                    self.connector.push_events_to_intakes(events=batch_of_events)
-
-                    now = time.time()
-
-                    # store the last offset for each stream
-                    with PersistentJSON("cache.json", self.connector._data_path) as cache:
-                        for (
-                            stream_root_url,
-                            last_event,
-                        ) in last_event_per_stream.items():
-                            metadata = orjson.loads(last_event).get("metadata", {})
-
-                            last_event_offset = metadata.get("offset")
-                            if last_event_offset:
-                                # update the offset in the cache file
-                                cache[stream_root_url] = last_event_offset
-
-                            creation_time = metadata.get("eventCreationTime")
-                            if creation_time:
-                                lag = now - (creation_time / 1000)
-                                EVENTS_LAG.labels(
-                                    intake_key=self.connector.configuration.intake_key, stream=stream_root_url
-                                ).set(lag)
+                    acknowledged_offsets = self.forward_batch_until_acknowledged(batch)
+                finally:
+                    self.connector.offsets_committer.complete(sequence, acknowledged_offsets)
             except queue.Empty:
                 pass
             except Exception as error:
@@ -527,6 +895,12 @@ class EventStreamTrigger(Connector):
         self.auth_token = None
 
         self.events_queue: queue.SimpleQueue = queue.SimpleQueue()
+        # the forwarders create their batches one at a time
+        self.batching_lock = threading.Lock()
+        # detections waiting for the collection of their verticles
+        self.enrichment_queue: queue.Queue = queue.Queue(
+            maxsize=int(os.getenv("VERTICLES_ENRICHMENT_QUEUE_SIZE", str(DEFAULT_ENRICHMENT_QUEUE_SIZE)))
+        )
         self.f_stop = threading.Event()
 
         self._network_sleep_on_retry = 60
@@ -562,13 +936,34 @@ class EventStreamTrigger(Connector):
             default_headers=self._http_default_headers,
         )
 
+    @cached_property
+    def batching_policy(self) -> BatchingPolicy:
+        return BatchingPolicy.from_env()
+
+    @cached_property
+    def checkpoint(self) -> StreamOffsetsCheckpoint:
+        return StreamOffsetsCheckpoint(self.data_path)
+
+    @cached_property
+    def offsets_committer(self) -> OrderedOffsetsCommitter:
+        return OrderedOffsetsCommitter(self.checkpoint)
+
     @cached_property
     def verticles_collector(self) -> VerticlesCollector | None:
         try:
             if os.getenv("ACTIVATE_VERTICLES_COLLECTION", "false").lower() == "false":
                 self.log(message="Verticles collection is disabled by configuration", level="info")
                 return None
-            verticles_collector = VerticlesCollector(self, self.client)
+            max_workers = int(
+                os.getenv("VERTICLES_COLLECTION_CONCURRENCY", str(DEFAULT_VERTICLES_COLLECTION_CONCURRENCY))
+            )
+            verticles_collector = VerticlesCollector(
+                self,
+                self.client,
+                max_workers=max_workers,
+                cache_size=int(os.getenv("VERTICLES_CACHE_SIZE", str(DEFAULT_VERTICLES_CACHE_SIZE))),
+                cache_ttl=int(os.getenv("VERTICLES_CACHE_TTL", str(DEFAULT_VERTICLES_CACHE_TTL))),
+            )
             return verticles_collector
         except HTTPError as error:
             if error.response.status_code == 403:
@@ -603,8 +998,7 @@ class EventStreamTrigger(Connector):
 
         for stream_root_url, stream_info in streams.items():
             # read the stream offset
-            with PersistentJSON("cache.json", self._data_path) as cache:
-                stream_offset = cache.get(stream_root_url, 0)
+            stream_offset = self.checkpoint.get(stream_root_url, 0)
 
             stream_threads[stream_root_url] = EventStreamReader(
                 self,
@@ -634,8 +1028,7 @@ class EventStreamTrigger(Connector):
             for stream_root_url, stream_info in streams.items():
                 if stream_root_url not in stream_threads or not stream_threads[stream_root_url].is_alive():
                     # read the stream offset
-                    with PersistentJSON("cache.json", self._data_path) as cache:
-                        stream_offset = cache.get(stream_root_url, 0)
+                    stream_offset = self.checkpoint.get(stream_root_url, 0)
 
                     stream_threads[stream_root_url] = EventStreamReader(
                         self,
@@ -648,6 +1041,52 @@ class EventStreamTrigger(Connector):
                     )
                     stream_threads[stream_root_url].start()
 
+    def start_forwarders(self) -> list[EventForwarder]:
+        nb_workers = int(os.getenv("EVENTS_FORWARDER_WORKERS", str(DEFAULT_FORWARDER_WORKERS)))
+        forwarders = [EventForwarder(self) for _ in range(max(1, nb_workers))]
+        for forwarder in forwarders:
+            forwarder.start()
+
+        return forwarders
+
+    def supervise_forwarders(self, forwarders: list[EventForwarder]):
+        # if a forwarder is down, we spawn a new one
+        for index, forwarder in enumerate(forwarders):
+            if not forwarder.is_alive():
+                self.log(message="Event forwarder failed", level="error")
+                forwarders[index] = EventForwarder(self)
+                forwarders[index].start()
+
+    def stop_forwarders(self, forwarders: list[EventForwarder]):
+        for forwarder in forwarders:
+            forwarder.stop()
+
+        for forwarder in forwarders:
+            forwarder.join()
+
+    def start_enrichers(self) -> list[DetectionEnricher]:
+        if self.verticles_collector is None:
+            return []
+
+        nb_workers = int(os.getenv("VERTICLES_ENRICHMENT_WORKERS", str(DEFAULT_ENRICHMENT_WORKERS)))
+        enrichers = [DetectionEnricher(self, self.verticles_collector) for _ in range(max(1, nb_workers))]
+        for enricher in enrichers:
+            enricher.start()
+
+        return enrichers
+
+    def supervise_enrichers(self, enrichers: list[DetectionEnricher]):
+        # if an enrichment worker is down, we spawn a new one
+        for index, enricher in enumerate(enrichers):
+            if not enricher.is_alive():
+                self.log(message="Detection enricher failed", level="error")
+                enrichers[index] = DetectionEnricher(self, enricher.verticles_collector)
+                enrichers[index].start()
+
+    def stop_enrichers(self, enrichers: list[DetectionEnricher]):
+        for enricher in enrichers:
+            enricher.stop()
+
     def stop_streams(self, stream_threads: dict):
         for stream_thread in stream_threads.values():
             if stream_thread.is_alive():
@@ -658,26 +1097,34 @@ class EventStreamTrigger(Connector):
             app_id: str = self.generate_app_id()
             streams: dict[str, dict] = self.get_streams(app_id)
 
-            # start a thread to consume the internal event queue
-            read_queue_thread = EventForwarder(self)
-            read_queue_thread.start()
+            # persist the offsets of the streams in background
+            self.checkpoint.start()
+
+            # start threads to consume the internal event queue
+            forwarders = self.start_forwarders()
+
+            # start threads to collect the verticles of the detections
+            enrichers = self.start_enrichers()
 
             # start threads to consume streams
             stream_threads = self.start_streams(streams, app_id)
 
             try:
                 while self.running:
-                    # if the read queue thread is down, we spawn a new one
-                    if not read_queue_thread.is_alive():
-                        self.log(message="Event forwarder failed", level="error")
-                        read_queue_thread = EventForwarder(self)
-                        read_queue_thread.start()
-
+                    self.supervise_forwarders(forwarders)
+                    self.supervise_enrichers(enrichers)
                     self.supervise_streams(streams, stream_threads)
                     time.sleep(5)
             finally:
                 self.stop_streams(stream_threads)
-                read_queue_thread.stop()
+                self.stop_enrichers(enrichers)
+                self.stop_forwarders(forwarders)
+                self.checkpoint.stop()
+
+                # the collector is shut down with the run: the next run creates a new one
+                verticles_collector = self.__dict__.pop("verticles_collector", None)
+                if verticles_collector is not None:
+                    verticles_collector.shutdown()
 
         except HTTPError as error:
             if error.response is not None and error.response.status_code == 429:
@@ -1,5 +1,9 @@
-from collections import defaultdict, namedtuple
-from collections.abc import Generator, Iterator
+import threading
+import time
+from collections import OrderedDict, defaultdict, namedtuple
+from collections.abc import Callable, Generator, Hashable, Iterable, Iterator
+from concurrent.futures import Future
+from typing import Any
 
 import six
 from stix2patterns.pattern import Pattern
@@ -172,3 +176,133 @@ def compute_refresh_interval(interval: int) -> int:
     """
     delta = min(300, int(interval / 6))
     return max(30, interval - delta)
+
+
+class TTLCache:
+    """
+    A thread-safe LRU cache whose entries expire after a time-to-live
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Return the value of the key if present and not expired, the default value otherwise
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+
+            expire_at, value = entry
+            if expire_at <= time.monotonic():
+                del self._entries[key]
+                return default
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """
+        Store the value of the key, evicting the least recently used entries if the cache is full
+        """
+        if self.maxsize <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+class DetailsBatcher:
+    """
+    Coalesce the lookups of details, requested concurrently by several threads,
+    into batched requests
+
+    A lookup is sent at once when no request is in progress. Otherwise, the identifiers
+    requested meanwhile are sent in one batch when the request in progress completes,
+    or as soon as they reach the maximum size of a batch.
+    """
+
+    def __init__(
+        self,
+        fetch_details: Callable[[list[str]], Iterable[dict]],
+        id_field: str,
+        max_batch_size: int = 100,
+        log: Callable[..., None] | None = None,
+    ):
+        self.fetch_details = fetch_details
+        self.id_field = id_field
+        self.max_batch_size = max_batch_size
+        self.log = log
+        self._pending: dict[str, Future] = {}
+        self._in_progress = False
+        self._lock = threading.Lock()
+
+    def get(self, identifier: str) -> dict | None:
+        """
+        Return the details of the identifier, None if not found
+
+        Raise the exception raised while fetching the batch containing the identifier
+        """
+        batch = None
+        send_next_batches = False
+        with self._lock:
+            future = self._pending.get(identifier)
+            if future is None:
+                future = Future()
+                self._pending[identifier] = future
+
+            if not self._in_progress:
+                # no request to wait for: send the lookup now, and the ones received meanwhile afterwards
+                self._in_progress = True
+                batch, self._pending = self._pending, {}
+                send_next_batches = True
+            elif len(self._pending) >= self.max_batch_size:
+                batch, self._pending = self._pending, {}
+
+        if batch:
+            self._dispatch(batch)
+            if send_next_batches:
+                self._dispatch_pending()
+
+        return future.result()
+
+    def _dispatch_pending(self) -> None:
+        while True:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                if not batch:
+                    self._in_progress = False
+                    return
+
+            self._dispatch(batch)
+
+    def _dispatch(self, batch: dict[str, Future]) -> None:
+        try:
+            results = list(self.fetch_details(list(batch.keys())))
+        except Exception as error:
+            for future in batch.values():
+                future.set_exception(error)
+            return
+
+        details = {item.get(self.id_field): item for item in results}
+        unmatched = [identifier for identifier in batch if identifier not in details]
+        if len(batch) == 1 and len(results) == 1 and unmatched:
+            # a single lookup: the only result is the requested one, whatever its identifier
+            details[unmatched.pop()] = results[0]
+
+        if unmatched and self.log is not None:
+            self.log(message=f"No details were found for {', '.join(unmatched)}", level="warning")
+
+        for identifier, future in batch.items():
+            future.set_result(details.get(identifier))
@@ -1,4 +1,4 @@
-from prometheus_client import Counter, Gauge
+from prometheus_client import Counter, Gauge, Histogram
 
 # Declare prometheus metrics
 prom_namespace_crowdstrike = "symphony_module_crowdstrike"
@@ -17,6 +17,50 @@ INCOMING_VERTICLES = Counter(
     labelnames=["intake_key"],
 )
 
+THREATGRAPH_CACHE_HITS = Counter(
+    name="threatgraph_cache_hits",
+    documentation="Number of ThreatGraph edges and verticles lookups served by the cache",
+    namespace=prom_namespace_crowdstrike,
+    labelnames=["intake_key", "cache"],
+)
+
+THREATGRAPH_CACHE_MISSES = Counter(
+    name="threatgraph_cache_misses",
+    documentation="Number of ThreatGraph edges and verticles lookups sent to the API",
+    namespace=prom_namespace_crowdstrike,
+    labelnames=["intake_key", "cache"],
+)
+
+ENRICHMENT_QUEUE_SIZE = Gauge(
+    name="enrichment_queue_size",
+    documentation="Number of detections waiting for the collection of their verticles",
+    namespace=prom_namespace_crowdstrike,
+    labelnames=["intake_key"],
+)
+
+FORWARDED_BATCH_SIZE = Histogram(
+    name="forwarded_batch_size",
+    documentation="Number of events in the batches forwarded to Sekoia.io",
+    namespace=prom_namespace_crowdstrike,
+    labelnames=["intake_key"],
+    buckets=(1, 10, 50, 100, 250, 500, 1000, 2500, 5000, 10000),
+)
+
+FORWARDED_BATCH_BYTES = Histogram(
+    name="forwarded_batch_bytes",
+    documentation="Size, in bytes, of the batches forwarded to Sekoia.io",
+    namespace=prom_namespace_crowdstrike,
+    labelnames=["intake_key"],
+    buckets=(1024, 10240, 102400, 512000, 1048576, 2097152, 5242880, 10485760, 20971520),
+)
+
+BATCH_FILLING_DURATION = Histogram(
+    name="batch_filling_duration",
+    documentation="Duration, in seconds, between the first event of a batch and its forwarding",
+    namespace=prom_namespace_crowdstrike,
+    labelnames=["intake_key"],
+)
+
 # Declare common prometheus metrics
 prom_namespace = "symphony_module_common"
 
@@ -33,3 +77,10 @@ EVENTS_LAG = Gauge(
     namespace=prom_namespace,
     labelnames=["intake_key", "stream"],
 )
+
+FORWARD_EVENTS_DURATION = Histogram(
+    name="events_forward_duration",
+    documentation="Duration to forward events to Sekoia.io",
+    namespace=prom_namespace,
+    labelnames=["intake_key"],
+)
@@ -1,7 +1,8 @@
 import pytest
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
 
 from crowdstrike_falcon.asset_connectors.device_assets import CrowdstrikeDeviceAssetConnector
+from sekoia_automation.asset_connector.models.connector import AssetList
 from sekoia_automation.asset_connector.models.ocsf.device import (
     OSTypeId,
     OSTypeStr,
@@ -213,3 +214,113 @@ def test_get_assets_yields_mapped_models(monkeypatch, connector):
     assert results[1].device.uid == "d2"
     assert results[0].enrichments[0].data.Firewall_status == "Enabled"
     assert results[1].enrichments[0].data.Firewall_status == "Disabled"
+
+
+@pytest.fixture
+def incremental_connector(connector):
+    connector.fingerprints_store = _DummyContext()
+    connector.DETAILS_CHUNK_SIZE = 2
+    connector.FETCH_CONCURRENCY = 2
+    with patch.dict("os.environ", {"DEVICE_ASSETS_INCREMENTAL_SYNC": "true"}):
+        assert connector.incremental_sync is True
+    return connector
+
+
+def _push(connector, assets, succeeded=True):
+    # the SDK updates the checkpoint once the assets were posted
+    connector.asset_connector_endpoint = "https://api.fake.sekoia.io/api/v1/asset-connectors"
+    connector.post_assets_to_api = Mock(
+        side_effect=lambda assets, asset_connector_api_url: connector.update_checkpoint() or {} if succeeded else None
+    )
+    connector.push_assets_to_sekoia(AssetList(version=1, items=assets))
+
+
+def _device(device_id, modified_timestamp, hostname="host"):
+    return {
+        "device_id": device_id,
+        "hostname": hostname,
+        "platform_name": "Linux",
+        "modified_timestamp": modified_timestamp,
+    }
+
+
+def test_next_modified_devices_use_watermark_and_keep_order(incremental_connector):
+    incremental_connector.context.store["most_recent_modified_timestamp"] = "2024-01-01T00:00:00Z"
+    devices = {
+        "d1": _device("d1", "2024-01-01T00:00:01Z"),
+        "d2": _device("d2", "2024-01-01T00:00:02Z"),
+        "d3": _device("d3", "2024-01-01T00:00:03Z"),
+        "d4": _device("d4", "2024-01-01T00:00:04Z"),
+        "d5": _device("d5", "2024-01-01T00:00:05Z"),
+    }
+    client = Mock()
+    client.scroll_devices_uuids.return_value = iter(["d1", "d2", "d3", "d4", "d5"])
+    # the details are not returned in the order of the identifiers
+    client.get_devices_infos.side_effect = lambda ids: [devices[device_id] for device_id in reversed(ids)]
+    incremental_connector.client = client
+
+    collected = list(incremental_connector.next_modified_devices())
+
+    assert [device["device_id"] for device in collected] == ["d1", "d2", "d3", "d4", "d5"]
+    client.scroll_devices_uuids.assert_called_once_with(
+        filter="modified_timestamp:>='2024-01-01T00:00:00Z'", sort="modified_timestamp.asc", limit=5000
+    )
+    assert client.get_devices_infos.call_count == 3
+
+
+def test_get_assets_incremental_skip_unchanged_devices(incremental_connector):
+    devices = [_device("d1", "2024-01-01T00:00:01Z"), _device("d2", "2024-01-01T00:00:02Z")]
+    client = Mock()
+    client.scroll_devices_uuids.side_effect = lambda **kwargs: iter(["d1", "d2"])
+    client.get_devices_infos.side_effect = lambda ids: [device for device in devices if device["device_id"] in ids]
+    incremental_connector.client = client
+
+    # first sync: all the devices are sent
+    assets = list(incremental_connector.get_assets())
+    assert [asset.device.uid for asset in assets] == ["d1", "d2"]
+    _push(incremental_connector, assets)
+    assert incremental_connector.context.store["most_recent_modified_timestamp"] == "2024-01-01T00:00:02Z"
+
+    # second sync: only the modified device is sent
+    devices[1] = _device("d2", "2024-01-01T00:00:03Z", hostname="renamed")
+    assets = list(incremental_connector.get_assets())
+    assert [asset.device.uid for asset in assets] == ["d2"]
+    _push(incremental_connector, assets)
+
+    # third sync: nothing changed, the watermark moves forward anyway
+    devices[0] = _device("d1", "2024-01-01T00:00:04Z")
+    assert list(incremental_connector.get_assets()) == []
+    assert incremental_connector.context.store["most_recent_modified_timestamp"] == "2024-01-01T00:00:04Z"
+
+    incremental_connector.save_fingerprints()
+    assert set(incremental_connector.fingerprints_store.store.keys()) == {"d1", "d2"}
+
+
+def test_get_assets_incremental_failed_batch_is_sent_again(incremental_connector):
+    devices = [_device(f"d{i}", f"2024-01-01T00:00:0{i}Z") for i in range(1, 5)]
+    client = Mock()
+    client.scroll_devices_uuids.side_effect = lambda **kwargs: iter(
+        [device["device_id"] for device in devices if device["modified_timestamp"] >= kwargs["filter"].split("'")[1]]
+        if kwargs["filter"]
+        else [device["device_id"] for device in devices]
+    )
+    client.get_devices_infos.side_effect = lambda ids: [device for device in devices if device["device_id"] in ids]
+    incremental_connector.client = client
+
+    # the first batch is posted, the second one fails
+    assets = incremental_connector.get_assets()
+    _push(incremental_connector, [next(assets), next(assets)])
+    _push(incremental_connector, [next(assets), next(assets)], succeeded=False)
+    assert list(assets) == []
+
+    assert set(incremental_connector.fingerprints) == {"d1", "d2"}
+    assert incremental_connector.context.store["most_recent_modified_timestamp"] == "2024-01-01T00:00:02Z"
+
+    # next cycle: the devices of the failed batch are sent again
+    incremental_connector._batch_failed = False
+    assets = list(incremental_connector.get_assets())
+    assert [asset.device.uid for asset in assets] == ["d3", "d4"]
+    _push(incremental_connector, assets)
+
+    assert set(incremental_connector.fingerprints) == {"d1", "d2", "d3", "d4"}
+    assert incremental_connector.context.store["most_recent_modified_timestamp"] == "2024-01-01T00:00:04Z"
@@ -200,3 +200,43 @@ def test_find_indicators():
 
         indicators = client.find_indicators(fql_filter=f"source:Sekoia.io")
         assert list(indicators) == ["519b7236-8ed2-4c63-b5c4-0f72dc3f187e", "f6d85700-1b5b-450f-8df1-a8317fe7f137"]
+
+
+def test_scroll_devices_uuids():
+    base_url = "https://my.fake.sekoia"
+    client = CrowdstrikeFalconClient(base_url, "foo", "bar")
+
+    with requests_mock.Mocker() as mock:
+        mock.register_uri(
+            "POST",
+            f"{base_url}/oauth2/token",
+            json={"access_token": "foo-token", "token_type": "bearer", "expires_in": 1799},
+        )
+        mock.register_uri(
+            "GET",
+            f"{base_url}/devices/queries/devices-scroll/v1",
+            [
+                {
+                    "json": {
+                        "errors": [],
+                        "meta": {"pagination": {"total": 3, "offset": "token-1", "expires_at": 1}},
+                        "resources": ["d1", "d2"],
+                    }
+                },
+                {
+                    "json": {
+                        "errors": [],
+                        "meta": {"pagination": {"total": 3, "offset": "token-2", "expires_at": 1}},
+                        "resources": ["d3"],
+                    }
+                },
+            ],
+        )
+
+        uuids = list(
+            client.scroll_devices_uuids(filter="platform_name:'Linux'", sort="modified_timestamp.asc", limit=2)
+        )
+
+        assert uuids == ["d1", "d2", "d3"]
+        assert mock.request_history[-1].qs["offset"] == ["token-1"]
+        assert mock.request_history[-1].qs["filter"] == ["platform_name:'linux'"]
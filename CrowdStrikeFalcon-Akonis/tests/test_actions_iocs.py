@@ -1,6 +1,8 @@
 import os
 from datetime import date, timedelta
 
+from unittest.mock import MagicMock
+
 import pytest
 import requests_mock
 
@@ -18,6 +20,8 @@ from crowdstrike_falcon.custom_iocs import (
     CrowdstrikeActionPushIOCsDetect,
     CrowdstrikeActionSearchIndicators,
     CrowdstrikeActionUpdateIndicators,
+    IndicatorsBulkSync,
+    build_values_filter,
 )
 
 
@@ -450,19 +454,31 @@ def test_remove_indicators():
         )
         mock.register_uri(
             "GET",
-            "https://my.fake.sekoia/iocs/queries/indicators/v1",
-            json={"resources": ["0451b9c358b1404717f5060aea5711327cf169cd4c5648f5ac23f1a1fb740716"]},
+            "https://my.fake.sekoia/iocs/combined/indicator/v1",
+            json={
+                "resources": [
+                    {
+                        "id": "indicator-id-1",
+                        "type": "sha256",
+                        "value": "0451b9c358b1404717f5060aea5711327cf169cd4c5648f5ac23f1a1fb740716",
+                    }
+                ]
+            },
         )
-        mock.register_uri(
+        delete_mock = mock.register_uri(
             "DELETE",
             "https://my.fake.sekoia/iocs/entities/indicators/v1",
-            json={"resources": ["0451b9c358b1404717f5060aea5711327cf169cd4c5648f5ac23f1a1fb740716"]},
+            json={"resources": ["indicator-id-1"]},
         )
         sample_data = action.get_payload(
             type="sha256", value="0451b9c358b1404717f5060aea5711327cf169cd4c5648f5ac23f1a1fb740716"
         )
-        result = action.remove_indicators([sample_data])
+        missing_data = action.get_payload(type="domain", value="missing.com")
+        action.log = MagicMock()
+        result = action.remove_indicators([sample_data, missing_data])
         assert result is None
+        assert delete_mock.last_request.qs["ids"] == ["indicator-id-1"]
+        action.log.assert_any_call("IOC with value missing.com not found, skipping delete")
 
 
 def test_remove_expired_indicators():
@@ -641,7 +657,7 @@ def test_create_indicators():
         sample_data = action.get_payload(
             type="sha256", value="0451b9c358b1404717f5060aea5711327cf169cd4c5648f5ac23f1a1fb740716"
         )
-        result = action.create_indicators_batch([sample_data])
+        result = action.create_indicators(**sample_data)
         assert result is None
 
 
@@ -696,16 +712,107 @@ def test_run():
         )
 
         mock.register_uri(
+            "GET",
+            "https://my.fake.sekoia/iocs/combined/indicator/v1",
+            json={"resources": []},
+        )
+        creation_mock = mock.register_uri(
             "POST",
             "https://my.fake.sekoia/iocs/entities/indicators/v1",
             json={"resources": ["0451b9c358b1404717f5060aea5711327cf169cd4c5648f5ac23f1a1fb740716"]},
         )
-        sample_data = action.get_payload(
-            type="sha256", value="0451b9c358b1404717f5060aea5711327cf169cd4c5648f5ac23f1a1fb740716"
-        )
 
         results = action.run({"stix_objects": [STIX_OBJECT_IPv4, STIX_OBJECT_FILE_HASH], "valid_for": 7})
         assert results is None
+        assert creation_mock.call_count == 1
+
+
+def test_indicators_bulk_sync():
+    action = configured_action(CrowdstrikeActionPushIOCsDetect)
+    client = MagicMock()
+    existing_indicators = [
+        {
+            "id": "id-unchanged",
+            "type": "ipv4",
+            "value": "1.1.1.1",
+            "action": "detect",
+            "severity": "high",
+            "platforms": ["linux", "mac", "windows"],
+            "tags": ["Sekoia.io"],
+            "source": "Sekoia.io",
+        },
+        {"id": "id-outdated", "type": "ipv4", "value": "2.2.2.2", "action": "prevent", "severity": "high"},
+        {"id": "id-revoked", "type": "domain", "value": "evil.com", "action": "detect", "severity": "high"},
+    ]
+    client.find_indicators_details.side_effect = lambda fql: [
+        indicator for indicator in existing_indicators if f"'{indicator['value']}'" in fql
+    ]
+    client.create_indicators.side_effect = lambda indicators: iter(indicators)
+    client.update_indicators.side_effect = lambda indicators: iter(indicators)
+    client.delete_indicators.side_effect = lambda ids: iter(ids)
+
+    desired = [
+        action.get_payload(value="1.1.1.1", type="ipv4"),
+        action.get_payload(value="2.2.2.2", type="ipv4"),
+        *[action.get_payload(value=f"10.0.{i // 256}.{i % 256}", type="ipv4") for i in range(450)],
+    ]
+    revoked = [
+        action.get_payload(value="evil.com", type="domain"),
+        action.get_payload(value="gone.com", type="domain"),
+    ]
+
+    sync = IndicatorsBulkSync(client, MagicMock())
+    report = sync.sync(desired=desired, revoked=revoked)
+
+    assert {k: v for k, v in report.items() if k != "duration"} == {
+        "created": 450,
+        "updated": 1,
+        "deleted": 1,
+        "unchanged": 1,
+    }
+    # 454 values looked up by chunks of 100
+    assert client.find_indicators_details.call_count == 5
+    # the indicators are created by batches of 200
+    assert sorted(len(call.kwargs["indicators"]) for call in client.create_indicators.call_args_list) == [
+        50,
+        200,
+        200,
+    ]
+    update = client.update_indicators.call_args.kwargs["indicators"]
+    assert update[0]["id"] == "id-outdated" and update[0]["action"] == "detect"
+    client.delete_indicators.assert_called_once_with(["id-revoked"])
+
+
+def test_indicators_bulk_sync_revoked_and_desired_value():
+    action = configured_action(CrowdstrikeActionPushIOCsDetect)
+    client = MagicMock()
+    client.find_indicators_details.return_value = [
+        {"id": "id-outdated", "type": "ipv4", "value": "1.1.1.1", "action": "prevent", "severity": "high"}
+    ]
+    client.update_indicators.side_effect = lambda indicators: iter(indicators)
+
+    sync = IndicatorsBulkSync(client, MagicMock())
+    report = sync.sync(
+        desired=[action.get_payload(value="1.1.1.1", type="ipv4")],
+        revoked=[action.get_payload(value="1.1.1.1", type="ipv4")],
+    )
+
+    # the desired indicator is updated rather than deleted
+    assert report["updated"] == 1 and report["deleted"] == 0
+    assert not client.delete_indicators.called
+    assert client.update_indicators.call_args.kwargs["indicators"][0]["id"] == "id-outdated"
+
+
+def test_indicators_bulk_sync_compares_the_expiration_dates():
+    sync = IndicatorsBulkSync(MagicMock(), MagicMock())
+    existing = {"id": "id", "type": "ipv4", "value": "1.1.1.1", "expiration": "2030-01-01T00:00:00Z"}
+
+    assert not sync.needs_update({"expiration": "2030-01-01T00:00:00.000Z"}, existing)
+    assert sync.needs_update({"expiration": "2031-01-01T00:00:00.000Z"}, existing)
+
+
+def test_build_values_filter():
+    assert build_values_filter(["1.1.1.1", "it's"]) == "value:['1.1.1.1','it\\'s']"
 
 
 @pytest.mark.skipif(
@@ -0,0 +1,77 @@
+import time
+
+import orjson
+
+from crowdstrike_falcon.checkpoint import OrderedOffsetsCommitter, StreamOffsetsCheckpoint
+
+
+def test_checkpoint_load_existing_offsets(tmp_path):
+    (tmp_path / "cache.json").write_bytes(orjson.dumps({"stream-1": 42}))
+
+    checkpoint = StreamOffsetsCheckpoint(tmp_path)
+
+    assert checkpoint.get("stream-1") == 42
+    assert checkpoint.get("stream-2") == 0
+
+
+def test_checkpoint_ignore_corrupted_file(tmp_path):
+    (tmp_path / "cache.json").write_text("{not json")
+
+    checkpoint = StreamOffsetsCheckpoint(tmp_path)
+
+    assert checkpoint.get("stream-1", 10) == 10
+
+
+def test_checkpoint_flush_only_when_changed(tmp_path):
+    checkpoint = StreamOffsetsCheckpoint(tmp_path)
+
+    checkpoint.flush()
+    assert not (tmp_path / "cache.json").exists()
+
+    checkpoint.commit({"stream-1": 10})
+    checkpoint.commit({"stream-1": 12, "stream-2": 3})
+    checkpoint.flush()
+
+    assert orjson.loads((tmp_path / "cache.json").read_bytes()) == {"stream-1": 12, "stream-2": 3}
+    assert not (tmp_path / "cache.json.tmp").exists()
+
+
+def test_checkpoint_flush_in_background_after_several_commits(tmp_path):
+    checkpoint = StreamOffsetsCheckpoint(tmp_path, flush_interval=60, flush_every=2)
+    checkpoint.start()
+
+    checkpoint.commit({"stream-1": 10})
+    checkpoint.commit({"stream-1": 11})
+
+    time.sleep(0.5)
+    assert orjson.loads((tmp_path / "cache.json").read_bytes()) == {"stream-1": 11}
+
+    checkpoint.commit({"stream-1": 12})
+    checkpoint.stop()
+    assert orjson.loads((tmp_path / "cache.json").read_bytes()) == {"stream-1": 12}
+
+
+def test_ordered_offsets_committer_commit_in_creation_order(tmp_path):
+    checkpoint = StreamOffsetsCheckpoint(tmp_path)
+    committer = OrderedOffsetsCommitter(checkpoint)
+
+    first, second, third, fourth = (committer.register() for _ in range(4))
+
+    # the second batch is acknowledged before the first one
+    committer.complete(second, {"stream-1": 20})
+    assert checkpoint.get("stream-1") == 0
+    assert committer.pending == 4
+
+    committer.complete(first, {"stream-1": 10, "stream-2": 5})
+    assert checkpoint.get("stream-1") == 20
+    assert checkpoint.get("stream-2") == 5
+
+    # the offsets don't go past a batch not acknowledged, even once the next batches are acknowledged
+    committer.complete(fourth, {"stream-1": 40})
+    committer.complete(third, None)
+    assert checkpoint.get("stream-1") == 20
+    assert committer.blocked
+
+    fifth = committer.register()
+    committer.complete(fifth, {"stream-1": 50})
+    assert checkpoint.get("stream-1") == 20
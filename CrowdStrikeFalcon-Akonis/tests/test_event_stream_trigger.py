@@ -1,5 +1,6 @@
 import os
 import queue
+import threading
 import time
 from datetime import datetime
 from unittest.mock import MagicMock, Mock, patch
@@ -12,6 +13,8 @@ from requests.exceptions import HTTPError
 from crowdstrike_falcon import CrowdStrikeFalconModule
 from crowdstrike_falcon.client import CrowdstrikeFalconClient
 from crowdstrike_falcon.event_stream_trigger import (
+    BatchingPolicy,
+    DetectionEnricher,
     EventForwarder,
     EventStreamReader,
     EventStreamTrigger,
@@ -39,7 +42,7 @@ def trigger(symphony_storage):
 
 
 def test_read_queue(trigger):
-    trigger.events_queue.put(("fake-stream-url", '{"metadata": {"offset": 10}, "foo": "bar"}'))
+    trigger.events_queue.put(("fake-stream-url", '{"metadata": {"offset": 10}, "foo": "bar"}', 10, None))
 
     trigger.push_events_to_intakes = MagicMock()
     t = EventForwarder(trigger)
@@ -53,6 +56,119 @@ def test_read_queue(trigger):
     assert len(trigger.push_events_to_intakes.call_args.kwargs["events"]) == 1
 
 
+def test_read_queue_store_last_offset_per_stream(trigger, symphony_storage):
+    trigger.events_queue.put(("stream-1", '{"metadata": {"offset": 10}}', 10, 1657110865303))
+    trigger.events_queue.put(("stream-2", '{"metadata": {"offset": 3}}', 3, 1657110865303))
+    trigger.events_queue.put(("stream-1", '{"metadata": {"offset": 11}}', 11, 1657110865303))
+    # the verticles don't have offset
+    trigger.events_queue.put(("stream-1", '{"metadata": {"eventType": "Vertex"}}', None, None))
+
+    trigger.push_events_to_intakes = MagicMock(return_value=["id1", "id2", "id3", "id4"])
+    t = EventForwarder(trigger)
+    t.start()
+
+    time.sleep(2)
+
+    t.stop()
+    t.join()
+
+    assert len(trigger.push_events_to_intakes.call_args.kwargs["events"]) == 4
+    assert trigger.checkpoint.get("stream-1") == 11
+    assert trigger.checkpoint.get("stream-2") == 3
+
+
+def test_read_queue_forward_again_unacknowledged_events(trigger):
+    trigger.events_queue.put(("stream-1", '{"metadata": {"offset": 10}}', 10, None))
+    trigger.events_queue.put(("stream-1", '{"metadata": {"offset": 11}}', 11, None))
+
+    trigger.push_events_to_intakes = MagicMock(side_effect=[["id1"], ["id1", "id2"]])
+    t = EventForwarder(trigger)
+    with patch("crowdstrike_falcon.event_stream_trigger.FORWARD_RETRY_DELAY", 0):
+        t.start()
+        time.sleep(2)
+        t.stop()
+        t.join()
+
+    assert trigger.push_events_to_intakes.call_count == 2
+    assert trigger.checkpoint.get("stream-1") == 11
+
+
+def test_read_queue_forward_again_until_acknowledged(trigger):
+    trigger.events_queue.put(("stream-1", '{"metadata": {"offset": 10}}', 10, None))
+    trigger.events_queue.put(("stream-1", '{"metadata": {"offset": 11}}', 11, None))
+
+    trigger.push_events_to_intakes = MagicMock(side_effect=[[]] * 5 + [["id1", "id2"]])
+    t = EventForwarder(trigger)
+    with patch("crowdstrike_falcon.event_stream_trigger.FORWARD_RETRY_DELAY", 0):
+        t.start()
+        time.sleep(2)
+        t.stop()
+        t.join()
+
+    assert trigger.push_events_to_intakes.call_count == 6
+    assert trigger.checkpoint.get("stream-1") == 11
+    assert not trigger.offsets_committer.blocked
+
+
+def test_read_queue_dont_store_offsets_of_unacknowledged_events(trigger):
+    trigger.events_queue.put(("stream-1", '{"metadata": {"offset": 10}}', 10, None))
+    trigger.events_queue.put(("stream-1", '{"metadata": {"offset": 11}}', 11, None))
+
+    trigger.push_events_to_intakes = MagicMock(return_value=["id1"])
+    t = EventForwarder(trigger)
+    t.start()
+
+    time.sleep(2)
+
+    t.stop()
+    t.join()
+
+    assert trigger.checkpoint.get("stream-1") == 0
+
+
+def test_run_several_forwarders(trigger):
+    for offset in range(1, 101):
+        trigger.events_queue.put(("stream-1", '{"foo": "bar"}', offset, None))
+
+    trigger.push_events_to_intakes = MagicMock(side_effect=lambda events: [f"id{i}" for i in range(len(events))])
+    with patch.dict(os.environ, {"EVENTS_FORWARDER_WORKERS": "3", "EVENTS_BATCH_MAX_EVENTS": "10"}):
+        forwarders = trigger.start_forwarders()
+        time.sleep(2)
+        trigger.stop_forwarders(forwarders)
+
+    assert len(forwarders) == 3
+    assert sum(len(call.kwargs["events"]) for call in trigger.push_events_to_intakes.call_args_list) == 100
+    assert trigger.checkpoint.get("stream-1") == 100
+    assert trigger.offsets_committer.pending == 0
+
+
+def test_forwarder_next_batch_respects_batching_policy(trigger):
+    for offset in range(5):
+        trigger.events_queue.put(("stream-1", '{"foo": "bar"}', offset, None))
+
+    # limited by the number of events
+    forwarder = EventForwarder(trigger, BatchingPolicy(max_events=2, max_bytes=1000, max_linger=5))
+    assert [item[2] for item in forwarder.next_batch()] == [0, 1]
+
+    # limited by the size of the events
+    forwarder = EventForwarder(trigger, BatchingPolicy(max_events=100, max_bytes=20, max_linger=5))
+    assert [item[2] for item in forwarder.next_batch()] == [2, 3]
+
+    # limited by the linger time
+    forwarder = EventForwarder(trigger, BatchingPolicy(max_events=100, max_bytes=1000, max_linger=0.1))
+    started_at = time.monotonic()
+    assert [item[2] for item in forwarder.next_batch()] == [4]
+    assert time.monotonic() - started_at < 1
+
+
+def test_batching_policy_from_env():
+    with patch.dict(
+        os.environ,
+        {"EVENTS_BATCH_MAX_EVENTS": "500", "EVENTS_BATCH_MAX_BYTES": "1024", "EVENTS_BATCH_MAX_LINGER": "2.5"},
+    ):
+        assert BatchingPolicy.from_env() == BatchingPolicy(max_events=500, max_bytes=1024, max_linger=2.5)
+
+
 def test_get_streams(trigger):
     with requests_mock.Mocker() as mock:
         mock.register_uri(
@@ -208,6 +324,8 @@ def test_read_stream(trigger):
     assert trigger.events_queue.get() == (
         "https://firehose.eu-1.crowdstrike.com/sensors/entities/datafeed/v1/0",
         orjson.dumps(fake_event).decode(),
+        fake_event["metadata"]["offset"],
+        fake_event["metadata"]["eventCreationTime"],
     )
 
 
@@ -265,8 +383,125 @@ def test_read_stream_call_verticles_collector(trigger):
     assert trigger.events_queue.get() == (
         "https://firehose.eu-1.crowdstrike.com/sensors/entities/datafeed/v1/0",
         orjson.dumps(fake_event).decode(),
+        fake_event["metadata"]["offset"],
+        fake_event["metadata"]["eventCreationTime"],
     )
+    # the verticles collection is delegated to the enrichment workers
+    verticles_collector.collect_verticles_from_detection.assert_not_called()
+    assert trigger.enrichment_queue.get_nowait() == (
+        "https://firehose.eu-1.crowdstrike.com/sensors/entities/datafeed/v1/0",
+        fake_event,
+        0,
+    )
+
+
+def test_detection_enricher_call_verticles_collector(trigger):
+    detection_id = "ldt:00000000000000000000000000000000:1111111111"
+    detection_event = {
+        "metadata": {"eventType": "DetectionSummaryEvent"},
+        "event": {"DetectId": detection_id, "Severity": 5, "SeverityName": "Critical"},
+    }
+    verticles_collector = MagicMock()
+    verticles_collector.collect_verticles_from_detection.return_value = iter(
+        [("pid:0000:1", "child_process", {"id": "pid:0000:2"})]
+    )
+
+    trigger.push_events_to_intakes = MagicMock(side_effect=lambda events: [f"id{i}" for i in range(len(events))])
+
+    enricher = DetectionEnricher(trigger, verticles_collector)
+    enricher.start()
+    trigger.enrichment_queue.put(("fake-stream-url", detection_event, trigger.offsets_committer.register()))
+    trigger.enrichment_queue.join()
+    enricher.stop()
+    enricher.join()
+
     verticles_collector.collect_verticles_from_detection.assert_called_with(detection_id)
+    (vertex_event,) = trigger.push_events_to_intakes.call_args.kwargs["events"]
+    assert orjson.loads(vertex_event) == {
+        "metadata": {
+            "detectionIdString": detection_id,
+            "eventType": "Vertex",
+            "edge": {"sourceVertexId": "pid:0000:1", "type": "child_process"},
+            "severity": {"name": "Critical", "code": 5},
+        },
+        "event": {"id": "pid:0000:2"},
+    }
+    assert trigger.offsets_committer.pending == 0
+
+
+def test_offsets_wait_for_the_enrichment_of_the_detection(trigger):
+    detection_event = {
+        "metadata": {"eventType": "DetectionSummaryEvent"},
+        "event": {"DetectId": "ldt:0000:1111", "Severity": 5, "SeverityName": "Critical"},
+    }
+    verticles_collector = MagicMock()
+    verticles_collector.collect_verticles_from_detection.return_value = iter(
+        [("pid:0000:1", "child_process", {"id": "pid:0000:2"})]
+    )
+    reader = EventStreamReader(
+        trigger, "stream-1", {"refreshActiveSessionInterval": 1800}, "sio-00000", 0, MagicMock(), verticles_collector
+    )
+    trigger.push_events_to_intakes = MagicMock(side_effect=lambda events: [f"id{i}" for i in range(len(events))])
+
+    # the detection and the next event of the stream are forwarded before the detection is enriched
+    reader.submit_for_enrichment(detection_event)
+    reader.stop_refresh()
+    trigger.events_queue.put(("stream-1", orjson.dumps(detection_event).decode(), 10, None))
+    trigger.events_queue.put(("stream-1", '{"metadata": {"offset": 11}}', 11, None))
+    forwarder = EventForwarder(trigger)
+    forwarder.start()
+    time.sleep(2)
+    assert trigger.checkpoint.get("stream-1") == 0
+
+    # the offsets are committed once the verticles were forwarded
+    enricher = DetectionEnricher(trigger, verticles_collector)
+    enricher.start()
+    trigger.enrichment_queue.join()
+    enricher.stop()
+    enricher.join()
+    forwarder.stop()
+    forwarder.join()
+
+    assert trigger.checkpoint.get("stream-1") == 11
+    assert trigger.offsets_committer.pending == 0
+
+
+def test_read_stream_wait_for_room_in_the_enrichment_queue(trigger):
+    trigger.enrichment_queue = queue.Queue(maxsize=1)
+    trigger.enrichment_queue.put(("fake-stream-url", {}, trigger.offsets_committer.register()))
+    reader = EventStreamReader(
+        trigger, "fake-stream-url", {"refreshActiveSessionInterval": 1800}, "sio-00000", 0, MagicMock(), MagicMock()
+    )
+    detection_event = {"metadata": {"eventType": "DetectionSummaryEvent"}, "event": {"DetectId": "ldt:0000:1111"}}
+
+    submission = threading.Thread(target=reader.submit_for_enrichment, args=(detection_event,))
+    submission.start()
+    time.sleep(1.5)
+    assert submission.is_alive()
+
+    trigger.enrichment_queue.get_nowait()
+    submission.join(timeout=2)
+    reader.stop_refresh()
+
+    assert not submission.is_alive()
+    assert trigger.enrichment_queue.get_nowait()[1] == detection_event
+
+
+def test_read_stream_stop_while_the_enrichment_queue_is_full(trigger):
+    trigger.enrichment_queue = queue.Queue(maxsize=1)
+    trigger.enrichment_queue.put(("fake-stream-url", {}, trigger.offsets_committer.register()))
+    reader = EventStreamReader(
+        trigger, "fake-stream-url", {"refreshActiveSessionInterval": 1800}, "sio-00000", 0, MagicMock(), MagicMock()
+    )
+
+    reader.stop()
+    reader.submit_for_enrichment(
+        {"metadata": {"eventType": "DetectionSummaryEvent"}, "event": {"DetectId": "ldt:0000:1111"}}
+    )
+
+    # the detection is not enriched, and will be read again on restart
+    assert trigger.enrichment_queue.qsize() == 1
+    assert trigger.offsets_committer.blocked
 
 
 def test_read_stream_fails_on_stream_error(trigger):
@@ -341,6 +576,42 @@ def test_run(trigger, symphony_storage):
         trigger.run()
 
 
+def test_run_twice_recreates_the_verticles_collector(trigger, symphony_storage):
+    trigger.push_events_to_intakes = MagicMock()
+    trigger.get_streams = MagicMock(return_value={})
+    trigger.stop()
+
+    with (
+        patch.dict(os.environ, {"ACTIVATE_VERTICLES_COLLECTION": "true"}),
+        requests_mock.Mocker() as mock,
+    ):
+        mock.register_uri(
+            "POST",
+            "https://my.fake.sekoia/oauth2/token",
+            json={
+                "access_token": "foo-token",
+                "token_type": "bearer",
+                "expires_in": 1799,
+            },
+        )
+        mock.register_uri(
+            "GET",
+            "https://my.fake.sekoia/threatgraph/queries/edge-types/v1",
+            json={"resources": ["child_process"]},
+        )
+
+        trigger.run()
+        assert "verticles_collector" not in trigger.__dict__
+
+        trigger.run()
+        assert "verticles_collector" not in trigger.__dict__
+
+        # the collector of a new run accepts work
+        collector = trigger.verticles_collector
+        assert collector._executor.submit(lambda: 42).result() == 42
+        collector.shutdown()
+
+
 def test_read_stream_consider_offset(trigger):
     fake_stream = {
         "dataFeedURL": "https://firehose.eu-1.crowdstrike.com/sensors/entities/datafeed/v1/0?appId=sio-00000",
@@ -842,6 +1113,65 @@ def test_verticle_collector_collect_verticles_from_graph_ids(verticles_collector
         assert vertex_ids == {vertex["id"] for vertex in verticles}
 
 
+def test_verticle_collector_collect_verticles_from_graph_ids_concurrently(trigger):
+    falcon_client = MagicMock()
+    falcon_client.get_edge_types.return_value = ["child_process", "network_connection", "device"]
+    collector = VerticlesCollector(trigger, falcon_client, max_workers=2)
+
+    def list_edges(graph_id, edge_type):
+        if edge_type == "network_connection":
+            raise HTTPError("500 Server Error", response=MagicMock(status_code=500))
+        return [{"id": f"pid:{graph_id}:1", "source_vertex_id": graph_id}]
+
+    falcon_client.list_edges.side_effect = list_edges
+    falcon_client.get_verticles_details.side_effect = lambda ids, verticle_type: [{"id": ids[0]}]
+
+    collect = list(collector.collect_verticles_from_graph_ids({"aaaa", "bbbb"}))
+    collector.shutdown()
+
+    assert collector.max_workers == 2
+    assert sorted(collect, key=lambda item: item[0]) == [
+        ("aaaa", "child_process", {"id": "pid:aaaa:1"}),
+        ("bbbb", "child_process", {"id": "pid:bbbb:1"}),
+    ]
+    assert falcon_client.list_edges.call_count == 4
+
+
+def test_verticle_collector_cache_threatgraph_lookups(trigger):
+    falcon_client = MagicMock()
+    falcon_client.get_edge_types.return_value = ["child_process"]
+    falcon_client.list_edges.return_value = [
+        {"id": "pid:aaaa:1", "source_vertex_id": "pid:aaaa:0"},
+        {"id": "pid:aaaa:2", "source_vertex_id": "pid:aaaa:0"},
+    ]
+    falcon_client.get_verticles_details.side_effect = lambda ids, verticle_type: [{"id": id} for id in ids]
+    collector = VerticlesCollector(trigger, falcon_client, max_workers=1)
+
+    first_collect = list(collector.collect_verticles_from_graph_ids({"pid:aaaa:0"}))
+    second_collect = list(collector.collect_verticles_from_graph_ids({"pid:aaaa:0"}))
+    collector.shutdown()
+
+    assert first_collect == second_collect
+    assert falcon_client.list_edges.call_count == 1
+    assert falcon_client.get_verticles_details.call_count == 1
+
+    # only the missing verticles are requested
+    assert collector.get_verticles_details(["pid:aaaa:1", "pid:aaaa:3"], "processes") == [
+        {"id": "pid:aaaa:1"},
+        {"id": "pid:aaaa:3"},
+    ]
+    falcon_client.get_verticles_details.assert_called_with(["pid:aaaa:3"], "processes")
+
+
+def test_verticles_collector_property_concurrency_by_env_var(trigger):
+    with patch.dict(
+        os.environ, {"ACTIVATE_VERTICLES_COLLECTION": "true", "VERTICLES_COLLECTION_CONCURRENCY": "8"}
+    ), patch.object(trigger.client, "get_edge_types", return_value=["child_process"]):
+        collector = trigger.verticles_collector
+        assert collector.max_workers == 8
+        collector.shutdown()
+
+
 @patch.dict(os.environ, {"ACTIVATE_VERTICLES_COLLECTION": "true"})
 def test_read_stream_with_verticles(trigger):
     detection_id = "ldt:aaaaaaaaaaaaaaaaaaaaaaaaaaaaaaaa:11111111111"
@@ -1071,12 +1401,18 @@ def test_read_stream_with_verticles(trigger):
             trigger.client,
             trigger.verticles_collector,
         )
+        trigger.push_events_to_intakes = MagicMock(side_effect=lambda events: [f"id{i}" for i in range(len(events))])
+        enricher = DetectionEnricher(trigger, trigger.verticles_collector)
 
+        enricher.start()
         reader.start()
 
         time.sleep(1)
         reader.stop()
         reader.join()
+        trigger.enrichment_queue.join()
+        enricher.stop()
+        enricher.join()
 
         expected_verticles = [
             {
@@ -1125,17 +1461,17 @@ def test_read_stream_with_verticles(trigger):
                 "event": verticle3,
             },
         ]
-        expected_events = {orjson.dumps(msg).decode() for msg in (event, *expected_verticles)}
-
-        assert trigger.events_queue.qsize() == len(expected_events)
-        actual_events = set()
-        try:
-            while (msg := trigger.events_queue.get(timeout=1)) is not None:
-                actual_events.add(msg[1])
-        except queue.Empty:
-            pass
-
-        assert actual_events == expected_events
+        # the detection is queued, its verticles are pushed by the enricher
+        assert trigger.events_queue.qsize() == 1
+        assert trigger.events_queue.get_nowait()[1] == orjson.dumps(event).decode()
+
+        pushed_events = [
+            pushed_event
+            for call in trigger.push_events_to_intakes.call_args_list
+            for pushed_event in call.kwargs["events"]
+        ]
+        assert set(pushed_events) == {orjson.dumps(msg).decode() for msg in expected_verticles}
+        assert trigger.offsets_committer.pending == 0
 
 
 @patch.dict(os.environ, {"ACTIVATE_VERTICLES_COLLECTION": "true"})
@@ -1372,12 +1708,18 @@ def test_read_stream_with_verticles_with_alert(trigger):
             trigger.client,
             trigger.verticles_collector,
         )
+        trigger.push_events_to_intakes = MagicMock(side_effect=lambda events: [f"id{i}" for i in range(len(events))])
+        enricher = DetectionEnricher(trigger, trigger.verticles_collector)
 
+        enricher.start()
         reader.start()
 
         time.sleep(1)
         reader.stop()
         reader.join()
+        trigger.enrichment_queue.join()
+        enricher.stop()
+        enricher.join()
 
         expected_verticles = [
             {
@@ -1426,14 +1768,14 @@ def test_read_stream_with_verticles_with_alert(trigger):
                 "event": verticle3,
             },
         ]
-        expected_events = {orjson.dumps(msg).decode() for msg in (event, *expected_verticles)}
-
-        assert trigger.events_queue.qsize() == len(expected_events)
-        actual_events = set()
-        try:
-            while (msg := trigger.events_queue.get(timeout=1)) is not None:
-                actual_events.add(msg[1])
-        except queue.Empty:
-            pass
-
-        assert actual_events == expected_events
+        # the detection is queued, its verticles are pushed by the enricher
+        assert trigger.events_queue.qsize() == 1
+        assert trigger.events_queue.get_nowait()[1] == orjson.dumps(event).decode()
+
+        pushed_events = [
+            pushed_event
+            for call in trigger.push_events_to_intakes.call_args_list
+            for pushed_event in call.kwargs["events"]
+        ]
+        assert set(pushed_events) == {orjson.dumps(msg).decode() for msg in expected_verticles}
+        assert trigger.offsets_committer.pending == 0
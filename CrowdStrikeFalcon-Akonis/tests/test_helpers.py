@@ -1,6 +1,12 @@
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
 import pytest
 
 from crowdstrike_falcon.helpers import (
+    DetailsBatcher,
+    TTLCache,
     VerticleID,
     compute_refresh_interval,
     get_detection_id,
@@ -112,3 +118,83 @@ def test_get_detection_id():
 @pytest.mark.parametrize("interval,expected_result", [(1800, 1500), (60, 50), (30, 30), (3600, 3300)])
 def test_compute_refresh_interval(interval, expected_result):
     assert compute_refresh_interval(interval) == expected_result
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+
+    cache.set("c", 3)
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache(maxsize=10, ttl=60)
+    with patch("crowdstrike_falcon.helpers.time.monotonic", return_value=1000):
+        cache.set("a", 1)
+        assert cache.get("a") == 1
+
+    with patch("crowdstrike_falcon.helpers.time.monotonic", return_value=1061):
+        assert cache.get("a", "missing") == "missing"
+        assert len(cache) == 0
+
+
+def test_details_batcher_send_single_lookup_at_once():
+    fetch_details = MagicMock(return_value=[{"id": "A", "name": "name-a"}])
+    batcher = DetailsBatcher(fetch_details, id_field="id")
+
+    # the only result of a single lookup is returned, even if its identifier differs
+    assert batcher.get("a") == {"id": "A", "name": "name-a"}
+    fetch_details.assert_called_once_with(["a"])
+
+
+def test_details_batcher_coalesce_lookups():
+    first_request_started = threading.Event()
+    first_request_released = threading.Event()
+
+    def fetch_details(ids):
+        if not first_request_started.is_set():
+            first_request_started.set()
+            first_request_released.wait(5)
+        return [{"id": id, "name": f"name-{id}"} for id in ids if id != "c"]
+
+    fetch_details_mock = MagicMock(side_effect=fetch_details)
+    log = MagicMock()
+    batcher = DetailsBatcher(fetch_details_mock, id_field="id", max_batch_size=10, log=log)
+
+    results = {}
+
+    def lookup(identifier):
+        results[identifier] = batcher.get(identifier)
+
+    # the first lookup is sent at once, the next ones wait for its request to complete
+    threads = [threading.Thread(target=lookup, args=("a",))]
+    threads[0].start()
+    first_request_started.wait(5)
+    threads += [threading.Thread(target=lookup, args=(identifier,)) for identifier in ("b", "c")]
+    for thread in threads[1:]:
+        thread.start()
+    while len(batcher._pending) < 2:
+        time.sleep(0.01)
+    first_request_released.set()
+    for thread in threads:
+        thread.join()
+
+    assert [sorted(call.args[0]) for call in fetch_details_mock.call_args_list] == [["a"], ["b", "c"]]
+    assert results == {"a": {"id": "a", "name": "name-a"}, "b": {"id": "b", "name": "name-b"}, "c": None}
+    log.assert_called_once_with(message="No details were found for c", level="warning")
+
+
+def test_details_batcher_send_full_batch_and_propagate_errors():
+    fetch_details = MagicMock(side_effect=ValueError("API error"))
+    batcher = DetailsBatcher(fetch_details, id_field="id", max_batch_size=1)
+
+    with pytest.raises(ValueError):
+        batcher.get("a")
+
+    fetch_details.assert_called_once_with(["a"])
@@ -2,12 +2,15 @@ import os
 import queue
 import time
 from collections.abc import Generator
+from concurrent.futures import CancelledError, TimeoutError
 from datetime import datetime, timezone
 from functools import cached_property
 from threading import Event, Thread
 
 from google.api_core import exceptions, retry
 from google.cloud.pubsub_v1 import SubscriberClient, types
+from google.cloud.pubsub_v1.subscriber.futures import StreamingPullFuture
+from google.cloud.pubsub_v1.subscriber.message import Message
 from google_module.base import GoogleTrigger
 from google_module.metrics import EVENTS_LAG, FORWARD_EVENTS_DURATION, INCOMING_MESSAGES, OUTCOMING_EVENTS
 from pydantic import BaseModel
@@ -126,6 +129,94 @@ class MessagesConsumer(Worker):
                 self.connector.log_exception(ex, message=f"failed to fetch messages from {self.subscription_name}")
 
 
+class StreamingMessagesConsumer(Worker):
+    """
+    Receive the messages with a streaming pull, and queue them along with the messages to acknowledge
+
+    The messages are acknowledged once forwarded. The flow control pauses the stream
+    when too many messages are received but not acknowledged yet.
+
+    The acknowledgements are sent through the stream: on shutdown, the consumer stops receiving
+    messages, then the stream is closed only once the forwarders acknowledged the queued messages.
+    """
+
+    KIND = "Streaming consumer"
+
+    def __init__(
+        self,
+        connector: "PubSub",
+        subscription_name: str,
+        queue: queue.Queue,
+        max_messages: int = 10000,
+        max_bytes: int = 100 * 1024 * 1024,
+    ):
+        super().__init__()
+        self.connector = connector
+        self.subscription_name = subscription_name
+        self.queue = queue
+        self.configuration = connector.configuration
+        self.flow_control = types.FlowControl(max_messages=max_messages, max_bytes=max_bytes)
+        self.client: SubscriberClient | None = None
+        self.streaming_pull: StreamingPullFuture | None = None
+        self._receiving = Event()
+        self._receiving.set()
+
+    def stop_receiving(self):
+        """
+        Stop queueing the received messages, while keeping the stream open to acknowledge the queued ones
+        """
+        self._receiving.clear()
+
+    def stop(self):
+        super().stop()
+        self.stop_receiving()
+
+        # close the stream
+        if self.streaming_pull:
+            self.streaming_pull.cancel()
+
+    def handle_message(self, message: Message):
+        if not self._receiving.is_set():
+            # the consumer is stopping: the message will be received again
+            message.nack()
+            return
+
+        INCOMING_MESSAGES.labels(intake_key=self.configuration.intake_key).inc()
+
+        if message.publish_time is not None:
+            current_lag = datetime.now(timezone.utc) - message.publish_time
+            EVENTS_LAG.labels(intake_key=self.configuration.intake_key).set(int(current_lag.total_seconds()))
+
+        self.queue.put(([message.data.decode("utf-8")], [message]))
+
+    def run(self):
+        self.client = SubscriberClient()
+
+        with self.client as subscriber:
+            while self.is_running:
+                self.streaming_pull = subscriber.subscribe(
+                    self.subscription_name,
+                    callback=self.handle_message,
+                    flow_control=self.flow_control,
+                    await_callbacks_on_shutdown=True,
+                )
+
+                try:
+                    # wait for the stream to stop, and raise if it failed
+                    while self.is_running:
+                        try:
+                            self.streaming_pull.result(timeout=1)
+                            break
+                        except TimeoutError:
+                            continue
+                except (exceptions.Cancelled, CancelledError):
+                    pass
+                except Exception as ex:
+                    self.connector.log_exception(ex, message=f"failed to fetch messages from {self.subscription_name}")
+                finally:
+                    self.streaming_pull.cancel()
+
+
 class EventsForwarder(Worker):
     KIND = "forwarder"
 
@@ -136,11 +227,22 @@ class EventsForwarder(Worker):
         self.queue = queue
         self.max_batch_size = max_batch_size
 
+    def next_item(self):
+        """
+        Return the next queued item
+
+        Once the forwarder is stopped, the queue is drained without waiting for new items.
+        """
+        if self.is_running:
+            return self.queue.get(block=True, timeout=0.5)
+
+        return self.queue.get_nowait()
+
     def next_batch(self, max_batch_size: int) -> list:
         events = []
-        while self.is_running:
+        while True:
             try:
-                messages = self.queue.get(block=True, timeout=0.5)
+                messages = self.next_item()
 
                 if len(messages) > 0:
                     events.extend(messages)
@@ -169,6 +271,70 @@ class EventsForwarder(Worker):
             self.connector.log_exception(ex, message="Failed to forward events")
 
 
+class AcknowledgingEventsForwarder(EventsForwarder):
+    """
+    Forward the events, then acknowledge their messages
+
+    The messages are acknowledged only if all their events were accepted by the intake,
+    otherwise they are negatively acknowledged to be received again.
+    """
+
+    KIND = "acknowledging forwarder"
+
+    def next_batch(self, max_batch_size: int) -> tuple[list, list[Message]]:  # type: ignore[override]
+        events: list = []
+        messages: list[Message] = []
+        while True:
+            try:
+                batch_events, batch_messages = self.next_item()
+
+                events.extend(batch_events)
+                messages.extend(batch_messages)
+
+                if len(events) >= max_batch_size:
+                    break
+
+            except queue.Empty:
+                break
+
+        return events, messages
+
+    def run(self):
+        try:
+            while self.is_running or self.queue.qsize() > 0:
+                events, messages = self.next_batch(self.max_batch_size)
+
+                if len(events) > 0:
+                    self.connector.log(
+                        message=f"Forward {len(events)} events to the intake",
+                        level="info",
+                    )
+                    OUTCOMING_EVENTS.labels(intake_key=self.configuration.intake_key).inc(len(events))
+                    try:
+                        event_ids = self.connector.push_events_to_intakes(events=events)
+                    except Exception:
+                        # receive the messages again rather than waiting for their acknowledgement deadline
+                        for message in messages:
+                            message.nack()
+
+                        raise
+
+                    if len(event_ids) < len(events):
+                        self.connector.log(
+                            message=f"Failed to forward {len(events) - len(event_ids)} events, receive them again",
+                            level="warning",
+                        )
+                        for message in messages:
+                            message.nack()
+
+                        continue
+
+                for message in messages:
+                    message.ack()
+        except Exception as ex:
+            self.connector.log_exception(ex, message="Failed to forward events")
+
+
 class PubSub(GoogleTrigger):
     """
     Connect to Google Cloud PubSub API and return the results (PubSub works like kafka)
@@ -215,6 +381,28 @@ class PubSub(GoogleTrigger):
         for worker in workers:
             worker.join(timeout=timeout_per_worker)
 
+    def stop_acknowledging_workers(
+        self, consumers: list[Worker], forwarders: list[Worker], events_queue: queue.Queue, batch_size: int
+    ):
+        """
+        Forward and acknowledge the queued messages, then close the streams they were received from
+
+        The acknowledgements sent once a stream is closed would be dropped.
+        """
+        # Stop queueing messages, but keep the streams open
+        for consumer in consumers:
+            consumer.stop_receiving()  # type: ignore[attr-defined]
+
+        # Ensure that all events are forwarded and acknowledged
+        if events_queue.qsize() > 0:
+            self.supervise_workers(
+                forwarders, AcknowledgingEventsForwarder, self, events_queue, max_batch_size=batch_size
+            )
+        self.stop_workers(forwarders)
+
+        # Close the streams
+        self.stop_workers(consumers, timeout=2)
+
     def run(self) -> None:  # pragma: no cover
         self.log(
             message=f"Starting Google Cloud Pubsub subscription to {self.subscription_name}",
@@ -225,16 +413,34 @@ class PubSub(GoogleTrigger):
         events_queue_size = int(os.environ.get("QUEUE_SIZE", 10000))
         events_queue: queue.Queue = queue.Queue(maxsize=events_queue_size)
 
+        # in the acknowledge-after-forward mode, the messages are acknowledged once their events are forwarded
+        consumer_class: type[Worker] = MessagesConsumer
+        forwarder_class: type[Worker] = EventsForwarder
+        consumer_kwargs = {}
+        ack_after_forward = os.environ.get("ACK_AFTER_FORWARD", "false").lower() in ("1", "true")
+        if ack_after_forward:
+            consumer_class = StreamingMessagesConsumer
+            forwarder_class = AcknowledgingEventsForwarder
+            consumer_kwargs = {
+                "max_messages": int(os.environ.get("MAX_OUTSTANDING_MESSAGES", 10000)),
+                "max_bytes": int(os.environ.get("MAX_OUTSTANDING_BYTES", 100 * 1024 * 1024)),
+            }
+
         # start the event forwarders
         batch_size = int(os.environ.get("BATCH_SIZE", 10000))
         forwarders = self.create_workers(
-            int(os.environ.get("NB_FORWARDERS", 1)), EventsForwarder, self, events_queue, max_batch_size=batch_size
+            int(os.environ.get("NB_FORWARDERS", 1)), forwarder_class, self, events_queue, max_batch_size=batch_size
         )
         self.start_workers(forwarders)
 
         # start the consumers
         consumers = self.create_workers(
-            int(os.environ.get("NB_CONSUMERS", 1)), MessagesConsumer, self, self.subscription_name, events_queue
+            int(os.environ.get("NB_CONSUMERS", 1)),
+            consumer_class,
+            self,
+            self.subscription_name,
+            events_queue,
+            **consumer_kwargs,
         )
         self.start_workers(consumers)
 
@@ -242,18 +448,23 @@ class PubSub(GoogleTrigger):
             # Wait 5 seconds for the next supervision
             time.sleep(5)
 
-            self.supervise_workers(forwarders, EventsForwarder, self, events_queue, max_batch_size=batch_size)
-            self.supervise_workers(consumers, MessagesConsumer, self, self.subscription_name, events_queue)
+            self.supervise_workers(forwarders, forwarder_class, self, events_queue, max_batch_size=batch_size)
+            self.supervise_workers(
+                consumers, consumer_class, self, self.subscription_name, events_queue, **consumer_kwargs
+            )
 
-        # Stop the consumer
-        self.stop_workers(consumers, timeout=2)
+        if ack_after_forward:
+            self.stop_acknowledging_workers(consumers, forwarders, events_queue, batch_size)
+        else:
+            # Stop the consumer
+            self.stop_workers(consumers, timeout=2)
 
-        # Ensure that all events are forwarded
-        if events_queue.qsize() > 0:
-            self.supervise_workers(forwarders, EventsForwarder, self, events_queue, max_batch_size=batch_size)
+            # Ensure that all events are forwarded
+            if events_queue.qsize() > 0:
+                self.supervise_workers(forwarders, forwarder_class, self, events_queue, max_batch_size=batch_size)
 
-        # Stop the forward
-        self.stop_workers(forwarders)
+            # Stop the forward
+            self.stop_workers(forwarders)
 
         # Stop the connector executor
         self._executor.shutdown(wait=True)
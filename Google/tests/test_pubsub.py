@@ -1,6 +1,6 @@
 import queue
 import time
-from datetime import datetime
+from datetime import datetime, timezone
 from threading import Thread
 from unittest.mock import Mock, patch
 
@@ -8,7 +8,14 @@ from google.cloud import pubsub_v1
 from google.protobuf.timestamp_pb2 import Timestamp
 from pytest import fixture
 
-from google_module.pubsub import EventsForwarder, MessagesConsumer, PubSub, Worker
+from google_module.pubsub import (
+    AcknowledgingEventsForwarder,
+    EventsForwarder,
+    MessagesConsumer,
+    PubSub,
+    StreamingMessagesConsumer,
+    Worker,
+)
 
 
 @fixture
@@ -162,3 +169,171 @@ def test_event_forwarder_run(trigger, forwarder, events_queue):
     assert trigger.log_exception.called is False
     assert events_queue.qsize() == 0
     assert trigger.push_events_to_intakes.call_count == 3
+
+
+def test_streaming_consumer_handle_message(trigger, events_queue):
+    consumer = StreamingMessagesConsumer(trigger, "subscription_name", events_queue)
+    message = Mock()
+    message.data = b"data1"
+    message.publish_time = datetime(2023, 3, 11, 13, 21, 23, tzinfo=timezone.utc)
+
+    consumer.handle_message(message)
+
+    assert events_queue.get(block=False) == (["data1"], [message])
+    assert message.ack.called is False
+
+
+def test_streaming_consumer_handle_message_when_stopping(trigger, events_queue):
+    consumer = StreamingMessagesConsumer(trigger, "subscription_name", events_queue)
+    message = Mock()
+
+    consumer.stop_receiving()
+    consumer.handle_message(message)
+
+    assert events_queue.qsize() == 0
+    assert message.nack.called
+
+
+def test_streaming_consumer_run(trigger, events_queue):
+    consumer = StreamingMessagesConsumer(trigger, "subscription_name", events_queue, max_messages=10, max_bytes=1024)
+
+    with patch("google_module.pubsub.SubscriberClient") as mock:
+        instance = mock.return_value
+        instance.__enter__.return_value = instance
+        streaming_pull = instance.subscribe.return_value
+
+        def stop_on_second_call(*args, **kwargs):
+            if streaming_pull.result.call_count == 2:
+                consumer.stop()
+                return None
+            raise TimeoutError()
+
+        streaming_pull.result.side_effect = stop_on_second_call
+
+        consumer.run()
+
+    instance.subscribe.assert_called_once()
+    assert instance.subscribe.call_args.kwargs["flow_control"].max_messages == 10
+    assert instance.subscribe.call_args.kwargs["flow_control"].max_bytes == 1024
+    assert streaming_pull.cancel.called
+    assert trigger.log_exception.called is False
+
+
+def test_acknowledging_forwarder_run(trigger, events_queue):
+    forwarder = AcknowledgingEventsForwarder(trigger, events_queue, 500)
+    messages = [Mock() for _ in range(10)]
+    for index, message in enumerate(messages):
+        events_queue.put(([f"event{index}"], [message]), block=False)
+
+    trigger.push_events_to_intakes.side_effect = lambda events: [f"id-{event}" for event in events]
+
+    thread = Thread(target=forwarder.run)
+    thread.start()
+    time.sleep(1)
+    forwarder.stop()
+    thread.join(timeout=5)
+
+    assert trigger.push_events_to_intakes.call_count == 1
+    assert all(message.ack.called and not message.nack.called for message in messages)
+
+
+def test_acknowledging_forwarder_run_with_failed_push(trigger, events_queue):
+    forwarder = AcknowledgingEventsForwarder(trigger, events_queue, 500)
+    messages = [Mock() for _ in range(10)]
+    for index, message in enumerate(messages):
+        events_queue.put(([f"event{index}"], [message]), block=False)
+
+    trigger.push_events_to_intakes.return_value = []
+
+    thread = Thread(target=forwarder.run)
+    thread.start()
+    time.sleep(1)
+    forwarder.stop()
+    thread.join(timeout=5)
+
+    assert all(message.nack.called and not message.ack.called for message in messages)
+
+
+def test_acknowledging_forwarder_run_with_push_error(trigger, events_queue):
+    forwarder = AcknowledgingEventsForwarder(trigger, events_queue, 500)
+    messages = [Mock() for _ in range(10)]
+    for index, message in enumerate(messages):
+        events_queue.put(([f"event{index}"], [message]), block=False)
+
+    trigger.push_events_to_intakes.side_effect = Exception("intake unavailable")
+
+    thread = Thread(target=forwarder.run)
+    thread.start()
+    thread.join(timeout=5)
+
+    assert all(message.nack.called and not message.ack.called for message in messages)
+    assert trigger.log_exception.called
+
+
+def test_stop_acknowledging_workers_close_streams_after_forwarding(trigger, events_queue):
+    calls = []
+    consumer = Mock()
+    consumer.stop_receiving.side_effect = lambda: calls.append("stop receiving")
+    consumer.stop.side_effect = lambda: calls.append("close stream")
+    forwarder = Mock()
+    forwarder.is_alive.return_value = True
+    forwarder.stop.side_effect = lambda: calls.append("stop forwarder")
+    forwarder.join.side_effect = lambda timeout: calls.append("forwarded")
+
+    trigger.stop_acknowledging_workers([consumer], [forwarder], events_queue, 500)
+
+    assert calls == ["stop receiving", "stop forwarder", "forwarded", "close stream"]
+
+
+def test_acknowledging_forwarder_drains_the_queue_once_stopped(trigger, events_queue):
+    forwarder = AcknowledgingEventsForwarder(trigger, events_queue, 500)
+    messages = [Mock() for _ in range(5)]
+    for index, message in enumerate(messages):
+        events_queue.put(([f"event{index}"], [message]), block=False)
+
+    trigger.push_events_to_intakes.side_effect = lambda events: [f"id-{event}" for event in events]
+
+    forwarder.stop()
+    forwarder.start()
+    forwarder.join(timeout=3)
+
+    assert not forwarder.is_alive()
+    assert events_queue.qsize() == 0
+    assert trigger.push_events_to_intakes.call_count == 1
+    assert all(message.ack.called and not message.nack.called for message in messages)
+
+
+def test_stop_acknowledging_workers_forward_the_queued_messages(trigger, events_queue):
+    consumer = Mock()
+    forwarder = AcknowledgingEventsForwarder(trigger, events_queue, 500)
+    pushed = []
+
+    def push_events_to_intakes(events):
+        # queue new messages while the first batch is forwarded, and complete it once the forwarder is stopped
+        if not pushed:
+            for index, message in enumerate(messages):
+                events_queue.put(([f"event{index}"], [message]), block=False)
+            while forwarder.is_running:
+                time.sleep(0.01)
+
+        pushed.append(events)
+        return [f"id-{event}" for event in events]
+
+    trigger.push_events_to_intakes.side_effect = push_events_to_intakes
+    messages = [Mock() for _ in range(5)]
+    first_message = Mock()
+    events_queue.put((["first"], [first_message]), block=False)
+    forwarder.start()
+    while events_queue.qsize() == 0:
+        time.sleep(0.01)
+
+    thread = Thread(target=trigger.stop_acknowledging_workers, args=([consumer], [forwarder], events_queue, 500))
+    thread.start()
+    thread.join(timeout=3)
+
+    assert not thread.is_alive()
+    assert not forwarder.is_alive()
+    assert events_queue.qsize() == 0
+    assert sum(len(events) for events in pushed) == 6
+    assert all(message.ack.called for message in [first_message, *messages])
+    assert consumer.stop.called
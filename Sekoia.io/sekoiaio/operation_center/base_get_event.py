@@ -1,4 +1,3 @@
-import time
 from typing import Callable
 from posixpath import join as urljoin
 
@@ -11,12 +10,14 @@ from tenacity import retry, wait_exponential, stop_after_attempt, retry_if_excep
 from urllib3.util.retry import Retry
 
 from sekoia_automation.action import Action
+from sekoiaio.search_jobs import SearchJobClient
 from sekoiaio.utils import user_agent
 
 
 class BaseGetEvents(Action):
     http_session: Session
     events_api_path: str
+    search_job_client: SearchJobClient
 
     DEFAULT_LIMIT = 100
     MAX_LIMIT = 100
@@ -47,6 +48,7 @@ class BaseGetEvents(Action):
                 "User-Agent": user_agent(),
             }
         )
+        self.search_job_client = SearchJobClient(self.http_session, self.events_api_path, log=self.log)
 
     @retry(
         reraise=True,
@@ -100,40 +102,7 @@ class BaseGetEvents(Action):
         :param action: The expected action to be performed
         :param timeout: The maximum time to wait in seconds
         """
-        start_wait = time.time()
-
-        # Initial status check
-        response_get = self.http_session.get(f"{self.events_api_path}/search/jobs/{event_search_job_uuid}", timeout=20)
-        try:
-            response_get.raise_for_status()
-        except requests.exceptions.HTTPError as e:
-            self.log(
-                f"HTTP error during initial status check for job {event_search_job_uuid}: {e}. Response status: {response_get.status_code}, Response text: {response_get.text}",
-                level="error",
-            )
-            raise
-
-        # Wait for the condition to be met
-        while should_we_wait(response_get.json()["status"]):
-            # Wait one second before polling again
-            time.sleep(1)
-
-            # Poll the job status
-            response_get = self.http_session.get(
-                f"{self.events_api_path}/search/jobs/{event_search_job_uuid}", timeout=20
-            )
-            try:
-                response_get.raise_for_status()
-            except requests.exceptions.HTTPError as e:
-                self.log(
-                    f"HTTP error during job status polling for job {event_search_job_uuid}: {e}. Response status: {response_get.status_code}, Response text: {response_get.text}",
-                    level="error",
-                )
-                raise
-
-            # If we exceed the timeout, raise an error
-            if time.time() - start_wait > timeout:
-                raise TimeoutError(f"Event search job {event_search_job_uuid} took more than {timeout}s to {action}")
+        self.search_job_client.wait(event_search_job_uuid, should_we_wait, action, timeout)
 
     def wait_for_search_job_execution(self, event_search_job_uuid: str) -> None:
         # Wait for job to start (20 min)
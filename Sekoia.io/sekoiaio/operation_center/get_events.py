@@ -24,43 +24,7 @@ class GetEvents(BaseGetEvents):
         :param limit: The maximum number of results to retrieve
         :return: A list of events
         """
-        results: list[dict[str, Any]] = []
-        offset: int = 0
-        total: None | int = None
-
-        while total is None or total > offset:
-            response_events = self.http_session.get(
-                f"{self.events_api_path}/search/jobs/{event_search_job_uuid}/events",
-                params={"limit": limit, "offset": offset},
-                timeout=20,
-            )
-            try:
-                response_events.raise_for_status()
-            except requests.exceptions.HTTPError as e:
-                self.log(
-                    f"HTTP error when retrieving events for job {event_search_job_uuid}: {e}. Response status: {response_events.status_code}, Response text: {response_events.text}",
-                    level="error",
-                )
-                raise
-
-            response_content = response_events.json()
-            if not response_content["items"]:
-                num_results = len(results)
-                if num_results < response_content["total"] and num_results < limit:
-                    self.log(
-                        "Number of fetched results doesn't match total",
-                        level="error",
-                        num_results=num_results,
-                        total=response_content["total"],
-                        search_job=event_search_job_uuid,
-                    )
-                break
-            results += response_content["items"]
-            total = min(response_content["total"], limit)
-
-            offset += limit
-
-        return results
+        return list(self.search_job_client.iter_events(event_search_job_uuid, limit=limit))
 
     def run(self, arguments):
         limit = min(self.MAX_LIMIT, arguments.get("limit") or self.DEFAULT_LIMIT)
@@ -0,0 +1,216 @@
+import time
+from collections import deque
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any
+
+import requests
+
+# Status of the event search jobs
+SEARCH_JOB_NOT_STARTED = 0
+SEARCH_JOB_IN_PROGRESS = 1
+
+
+class SearchJobClient:
+    """
+    Client of the event search jobs, shared by the actions and the triggers.
+
+    - The status of a job is polled with an interval growing from `initial_poll_interval`
+      to `max_poll_interval`, and reset when the status changes
+    - Once the total of the results is known, the pages of results are fetched concurrently
+    - The results are streamed: only the pages being fetched are kept in memory
+    """
+
+    def __init__(
+        self,
+        http_session: requests.Session,
+        events_api_path: str,
+        log: Callable[..., None],
+        initial_poll_interval: float = 0.5,
+        max_poll_interval: float = 5,
+        poll_backoff_factor: float = 1.5,
+        max_concurrent_pages: int = 4,
+        page_size: int = 25,
+        request_timeout: int = 20,
+    ):
+        """
+        Args:
+            http_session: Session authenticated on the Sekoia.io API
+            events_api_path: URL of the events API
+            log: Logging callable of the action or trigger
+            initial_poll_interval: Seconds between the first polls of the status of a job
+            max_poll_interval: Maximum number of seconds between two polls of the status of a job
+            poll_backoff_factor: Factor applied to the poll interval after each poll
+            max_concurrent_pages: Maximum number of pages of results fetched at the same time
+            page_size: Default number of results per page
+            request_timeout: Timeout of the HTTP requests, in seconds
+        """
+        self.http_session = http_session
+        self.events_api_path = events_api_path
+        self.log = log
+        self.initial_poll_interval = initial_poll_interval
+        self.max_poll_interval = max_poll_interval
+        self.poll_backoff_factor = poll_backoff_factor
+        self.max_concurrent_pages = max_concurrent_pages
+        self.page_size = page_size
+        self.request_timeout = request_timeout
+
+    def get_job(self, job_uuid: str, initial: bool = True) -> dict[str, Any]:
+        """
+        Get the event search job
+
+        :param job_uuid: The UUID of the event search job
+        :param initial: Whether it is the first check of the status of the job
+        :return: The event search job
+        """
+        response = self.http_session.get(
+            f"{self.events_api_path}/search/jobs/{job_uuid}", timeout=self.request_timeout
+        )
+        try:
+            response.raise_for_status()
+        except requests.exceptions.HTTPError as e:
+            step = "initial status check" if initial else "job status polling"
+            self.log(
+                f"HTTP error during {step} for job {job_uuid}: {e}. Response status: {response.status_code}, Response text: {response.text}",
+                level="error",
+            )
+            raise
+
+        return response.json()
+
+    def wait(
+        self, job_uuid: str, should_we_wait: Callable[[int], bool], action: str, timeout: float
+    ) -> dict[str, Any]:
+        """
+        Wait for a step in the search job execution
+
+        :param job_uuid: The UUID of the event search job
+        :param should_we_wait: A function that takes the current status and returns True if we should keep waiting
+        :param action: The expected action to be performed
+        :param timeout: The maximum time to wait in seconds
+        :return: The event search job, once the step is reached
+        """
+        start_wait = time.time()
+        poll_interval = self.initial_poll_interval
+
+        job = self.get_job(job_uuid)
+        while should_we_wait(job["status"]):
+            elapsed = time.time() - start_wait
+            if elapsed > timeout:
+                raise TimeoutError(f"Event search job {job_uuid} took more than {timeout}s to {action}")
+
+            time.sleep(min(poll_interval, max(timeout - elapsed, 0)))
+
+            status = job["status"]
+            job = self.get_job(job_uuid, initial=False)
+
+            # poll more often right after a change of status, less often while the job stays in the same status
+            if job["status"] != status:
+                poll_interval = self.initial_poll_interval
+            else:
+                poll_interval = min(poll_interval * self.poll_backoff_factor, self.max_poll_interval)
+
+        return job
+
+    def wait_for_completion(self, job_uuid: str, timeout: float) -> dict[str, Any]:
+        """
+        Wait for the event search job to complete
+
+        :param job_uuid: The UUID of the event search job
+        :param timeout: The maximum time to wait in seconds
+        :return: The completed event search job
+        """
+        return self.wait(
+            job_uuid,
+            lambda status: status in (SEARCH_JOB_NOT_STARTED, SEARCH_JOB_IN_PROGRESS),
+            "complete",
+            timeout,
+        )
+
+    def get_events_page(self, job_uuid: str, offset: int, limit: int) -> dict[str, Any]:
+        """
+        Get a page of the results of the event search job
+
+        :param job_uuid: The UUID of the event search job
+        :param offset: The offset of the page
+        :param limit: The size of the page
+        :return: The page, with its items and the total of the results
+        """
+        response = self.http_session.get(
+            f"{self.events_api_path}/search/jobs/{job_uuid}/events",
+            params={"limit": limit, "offset": offset},
+            timeout=self.request_timeout,
+        )
+        try:
+            response.raise_for_status()
+        except requests.exceptions.HTTPError as e:
+            self.log(
+                f"HTTP error when retrieving events for job {job_uuid}: {e}. Response status: {response.status_code}, Response text: {response.text}",
+                level="error",
+            )
+            raise
+
+        return response.json()
+
+    def iter_events(
+        self, job_uuid: str, page_size: int | None = None, limit: int | None = None
+    ) -> Iterator[dict[str, Any]]:
+        """
+        Iterate over the results of the event search job, in order
+
+        The first page gives the total of the results; the next pages are then fetched concurrently,
+        at most `max_concurrent_pages` ahead of the consumer.
+
+        :param job_uuid: The UUID of the event search job
+        :param page_size: The size of the pages, `page_size` of the client by default
+        :param limit: The maximum number of results to retrieve
+        """
+        page_size = page_size or self.page_size
+        if limit is not None:
+            page_size = min(page_size, limit)
+
+        first_page = self.get_events_page(job_uuid, 0, page_size)
+        total = first_page.get("total", 0)
+        if limit is not None:
+            total = min(total, limit)
+
+        offsets = iter(range(page_size, total, page_size))
+        executor: ThreadPoolExecutor | None = None
+        pending: deque[Future] = deque()
+        count = 0
+
+        def fetch_next_page():
+            offset = next(offsets, None)
+            if executor is not None and offset is not None:
+                pending.append(executor.submit(self.get_events_page, job_uuid, offset, page_size))
+
+        try:
+            page: dict[str, Any] | None = first_page
+            while page is not None:
+                items = page.get("items", [])
+                if not items:
+                    if count < total:
+                        self.log(
+                            "Number of fetched results doesn't match total",
+                            level="error",
+                            num_results=count,
+                            total=total,
+                            search_job=job_uuid,
+                        )
+                    return
+
+                yield from items
+                count += len(items)
+
+                if executor is None and count < total:
+                    executor = ThreadPoolExecutor(max_workers=self.max_concurrent_pages)
+                    for _ in range(self.max_concurrent_pages):
+                        fetch_next_page()
+
+                page = None
+                if pending:
+                    page = pending.popleft().result()
+                    fetch_next_page()
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
@@ -9,8 +9,10 @@ import orjson
 import requests
 import urllib3
 from pydantic import BaseModel, ConfigDict, Field, model_validator
+from requests.adapters import HTTPAdapter
 from tenacity import retry, wait_exponential, stop_after_attempt, retry_if_exception_type
 
+from sekoiaio.search_jobs import SearchJobClient
 from sekoiaio.utils import user_agent
 
 from .base import _SEKOIANotificationBaseTrigger
@@ -22,6 +24,49 @@ class SecurityAlertsTrigger(_SEKOIANotificationBaseTrigger):
     # List of alert types we can handle.
     HANDLED_EVENT_SUB_TYPES = [("alert", "created"), ("alert", "updated"), ("alert-comment", "created")]
 
+    # Duration, in seconds, an alert fetched from the Alert API is reused for the notifications of the same alert
+    ALERT_CACHE_TTL_SECONDS = 5
+    # Maximum number of alerts kept in the cache
+    ALERT_CACHE_MAX_SIZE = 1024
+    # Maximum number of connections kept alive to the Alert API
+    ALERT_API_POOL_MAXSIZE = 32
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._alert_api_session: Optional[requests.Session] = None
+        self._alert_api_session_lock = Lock()
+        self._alert_cache: dict[str, tuple[float, dict[str, Any]]] = {}
+        self._alert_cache_lock = Lock()
+
+    @property
+    def alert_api_session(self) -> requests.Session:
+        """
+        HTTP session shared by the requests to the Alert API, keeping the connections alive between notifications.
+        """
+        with self._alert_api_session_lock:
+            if self._alert_api_session is None:
+                # the requests are retried by the callers, so the adapter doesn't retry them on its own
+                adapter = HTTPAdapter(pool_maxsize=self.ALERT_API_POOL_MAXSIZE, max_retries=0)
+                session = requests.Session()
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers.update(
+                    {
+                        "Authorization": f"Bearer {self.module.configuration['api_key']}",
+                        "User-Agent": user_agent(),
+                    }
+                )
+                self._alert_api_session = session
+
+            return self._alert_api_session
+
+    def stop(self, *args, **kwargs):
+        super().stop(*args, **kwargs)
+        with self._alert_api_session_lock:
+            if self._alert_api_session is not None:
+                self._alert_api_session.close()
+                self._alert_api_session = None
+
     def handle_event(self, message):
         """Handle alert messages.
 
@@ -101,21 +146,49 @@ class SecurityAlertsTrigger(_SEKOIANotificationBaseTrigger):
     def _filter_notifications(self, message) -> bool:
         return True
 
+    def _retrieve_alert_from_alertapi(self, alert_uuid):
+        """
+        Get the alert from the Alert API, reusing the alert fetched by a recent notification of the same alert.
+        """
+        now = time.monotonic()
+        with self._alert_cache_lock:
+            cached = self._alert_cache.get(alert_uuid)
+            if cached is not None and now - cached[0] < self.ALERT_CACHE_TTL_SECONDS:
+                return cached[1]
+
+        alert = self._fetch_alert_from_alertapi(alert_uuid)
+
+        if self.ALERT_CACHE_TTL_SECONDS > 0:
+            with self._alert_cache_lock:
+                if len(self._alert_cache) >= self.ALERT_CACHE_MAX_SIZE:
+                    # Drop the expired entries, then the oldest ones
+                    expired = [
+                        uuid
+                        for uuid, (fetched_at, _) in self._alert_cache.items()
+                        if now - fetched_at >= self.ALERT_CACHE_TTL_SECONDS
+                    ]
+                    for uuid in expired:
+                        del self._alert_cache[uuid]
+
+                    while len(self._alert_cache) >= self.ALERT_CACHE_MAX_SIZE:
+                        del self._alert_cache[next(iter(self._alert_cache))]
+
+                self._alert_cache.pop(alert_uuid, None)
+                self._alert_cache[alert_uuid] = (time.monotonic(), alert)
+
+        return alert
+
     @retry(
         reraise=True,
         wait=wait_exponential(max=10),
         stop=stop_after_attempt(10),
     )
-    def _retrieve_alert_from_alertapi(self, alert_uuid):
+    def _fetch_alert_from_alertapi(self, alert_uuid):
         api_url = urljoin(self.module.configuration["base_url"], f"api/v1/sic/alerts/{alert_uuid}")
         api_url = api_url.replace("/api/api", "/api")  # In case base_url ends with /api
 
-        api_key = self.module.configuration["api_key"]
-        headers = {"Authorization": f"Bearer {api_key}", "User-Agent": user_agent()}
-
-        response = requests.get(
+        response = self.alert_api_session.get(
             api_url,
-            headers=headers,
             params={
                 "stix": False,
                 "comments": False,
@@ -159,6 +232,9 @@ class AlertStatusChangedTrigger(SecurityAlertsTrigger):
     # List of alert types we can handle.
     HANDLED_EVENT_SUB_TYPES = [("alert", "updated")]
 
+    # Each notification is a new status: always fetch the current alert
+    ALERT_CACHE_TTL_SECONDS = 0
+
     def _filter_notifications(self, message) -> bool:
         if message.get("attributes", {}).get("updated", {}).get("status"):
             return True
@@ -268,10 +344,7 @@ class AlertCommentCreatedTrigger(SecurityAlertsTrigger):
 
         api_url = api_url.replace("/api/api", "/api")  # In case base_url ends with /api
 
-        api_key = self.module.configuration["api_key"]
-        headers = {"Authorization": f"Bearer {api_key}", "User-Agent": user_agent()}
-
-        response = requests.get(api_url, headers=headers)
+        response = self.alert_api_session.get(api_url)
 
         if not response.ok:
             try:
@@ -413,6 +486,10 @@ class AlertEventsThresholdTrigger(SecurityAlertsTrigger):
     # Check every 5 minutes to balance responsiveness vs resource usage
     TIME_THRESHOLD_CHECK_INTERVAL_SECONDS = 300
 
+    # Interval between two writes of the alerts state (in seconds)
+    # The state mutations of the interval are coalesced in a single upload
+    STATE_FLUSH_INTERVAL_SECONDS = 10
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.state_manager: Optional[AlertStateManager] = None
@@ -421,6 +498,7 @@ class AlertEventsThresholdTrigger(SecurityAlertsTrigger):
         self._validated_config: Optional[AlertEventsThresholdConfiguration] = None
         self._http_session: Optional[requests.Session] = None
         self._events_api_path: Optional[str] = None
+        self._search_job_client: Optional[SearchJobClient] = None
         self._alert_locks: dict[str, Lock] = {}
         self._locks_lock = Lock()  # Lock to protect access to _alert_locks dictionary
         self._max_locks = 1024  # Maximum number of locks to keep in memory
@@ -528,13 +606,7 @@ class AlertEventsThresholdTrigger(SecurityAlertsTrigger):
             time_window_hours=time_window_hours,
         )
 
-        # Reload state to get latest data from S3
-        try:
-            self.state_manager.reload_state()
-        except Exception as exp:
-            self.log_exception(exp, message="Failed to reload state for time threshold check")
-            return
-
+        # The in-memory state is authoritative for this single writer: only the due alerts are read
         pending_alerts = self.state_manager.get_alerts_pending_time_check(time_window_hours)
 
         if not pending_alerts:
@@ -699,7 +771,9 @@ class AlertEventsThresholdTrigger(SecurityAlertsTrigger):
             self.log(message=f"State file path: {state_path}", level="debug")
 
             try:
-                self.state_manager = AlertStateManager(state_path, logger=self.log)
+                self.state_manager = AlertStateManager(
+                    state_path, logger=self.log, flush_interval=self.STATE_FLUSH_INTERVAL_SECONDS
+                )
 
                 # Initialize HTTP session for events API
                 # Normalize base_url: remove trailing slashes and ensure it doesn't end with /api
@@ -716,6 +790,7 @@ class AlertEventsThresholdTrigger(SecurityAlertsTrigger):
                         "User-Agent": user_agent(),
                     }
                 )
+                self._search_job_client = SearchJobClient(self._http_session, self._events_api_path, log=self.log)
 
                 self._initialized = True
 
@@ -745,10 +820,18 @@ class AlertEventsThresholdTrigger(SecurityAlertsTrigger):
         # Stop the time threshold thread
         self._stop_time_threshold_thread()
 
+        # Write the pending state mutations
+        if self.state_manager is not None:
+            try:
+                self.state_manager.stop()
+            except Exception as exp:
+                self.log_exception(exp, message="Failed to flush the alerts state")
+
         # Close HTTP session
         if self._http_session is not None:
             self._http_session.close()
             self._http_session = None
+            self._search_job_client = None
 
         # Call parent stop
         super().stop(*args, **kwargs)
@@ -854,22 +937,13 @@ class AlertEventsThresholdTrigger(SecurityAlertsTrigger):
         self.log(message=f"Alert {alert.get('short_id')} passed rule filter", level="debug", alert_uuid=alert_uuid)
 
         # Load previous state for this alert
-        # IMPORTANT: We must reload state from S3 before reading to ensure we have the latest
-        # state from other concurrent notifications. Without this reload, we could read stale
-        # data from the in-memory cache and trigger multiple times for the same alert.
-        #
-        # Performance note: This reload adds S3 latency on every notification. This is an
-        # intentional trade-off: correctness (no duplicate triggers) over performance.
-        # In practice, alert notifications are relatively infrequent compared to event
-        # ingestion, and the S3 read latency (~50-100ms) is acceptable. For high-throughput
-        # scenarios, consider implementing a distributed lock or cache TTL mechanism.
+        # The in-memory state is authoritative for this single writer, and the notifications of an alert
+        # are serialized by its lock, so the state is not reloaded from S3 on each notification.
         try:
             if self.state_manager is None:
                 self.log(message="State manager not initialized", level="error", alert_uuid=alert_uuid)
                 return
 
-            # Reload state from S3 to get latest version (prevents race conditions)
-            self.state_manager.reload_state()
             previous_state = self.state_manager.get_alert_state(alert_uuid)
             self.log(
                 message=f"Loaded previous state for alert {alert.get('short_id')}",
@@ -1597,60 +1671,21 @@ class AlertEventsThresholdTrigger(SecurityAlertsTrigger):
         Returns:
             True if job completed successfully, False otherwise
         """
-        if self._http_session is None:
+        if self._search_job_client is None:
             self.log(message="HTTP session not initialized", level="error")
             return False
 
-        start_time = time.time()
-
         self.log(message=f"Waiting for search job {job_uuid} to complete", level="debug", job_uuid=job_uuid)
 
         try:
-            # Wait for job to start (status != 0)
-            while True:
-                response = self._http_session.get(
-                    f"{self._events_api_path}/search/jobs/{job_uuid}",
-                    timeout=20,
-                )
-                response.raise_for_status()
-                status = response.json()["status"]
-
-                if status != 0:
-                    break
-
-                if time.time() - start_time > timeout:
-                    self.log(
-                        message=f"Search job {job_uuid} timed out waiting to start", level="error", job_uuid=job_uuid
-                    )
-                    return False
-
-                time.sleep(1)
-
-            # Wait for job to complete (status != 1)
-            while True:
-                response = self._http_session.get(
-                    f"{self._events_api_path}/search/jobs/{job_uuid}",
-                    timeout=20,
-                )
-                response.raise_for_status()
-                status = response.json()["status"]
-
-                if status != 1:
-                    break
-
-                if time.time() - start_time > timeout:
-                    self.log(
-                        message=f"Search job {job_uuid} timed out waiting to complete",
-                        level="error",
-                        job_uuid=job_uuid,
-                    )
-                    return False
-
-                time.sleep(1)
-
+            self._search_job_client.wait_for_completion(job_uuid, timeout)
             self.log(message=f"Search job {job_uuid} completed", level="debug", job_uuid=job_uuid)
             return True
 
+        except TimeoutError:
+            self.log(message=f"Search job {job_uuid} timed out", level="error", job_uuid=job_uuid, timeout=timeout)
+            return False
+
         except Exception as e:
             self.log_exception(e, message=f"Failed to wait for search job {job_uuid}", job_uuid=job_uuid)
             return False
@@ -1672,7 +1707,7 @@ class AlertEventsThresholdTrigger(SecurityAlertsTrigger):
         Returns:
             List of events, or None if failed
         """
-        if self._http_session is None:
+        if self._search_job_client is None:
             self.log(message="HTTP session not initialized", level="error")
             return None
 
@@ -1683,39 +1718,8 @@ class AlertEventsThresholdTrigger(SecurityAlertsTrigger):
             limit=limit,
         )
 
-        results: list[dict[str, Any]] = []
-        offset = 0
-        total = None
-        page_size = limit
-
         try:
-            while total is None or offset < total:
-                response = self._http_session.get(
-                    f"{self._events_api_path}/search/jobs/{job_uuid}/events",
-                    params={"limit": page_size, "offset": offset},
-                    timeout=20,
-                )
-                response.raise_for_status()
-
-                data = response.json()
-                items = data.get("items", [])
-
-                if not items:
-                    num_results = len(results)
-                    if num_results < data.get("total", 0):
-                        self.log(
-                            "Number of fetched results doesn't match total",
-                            level="warning",
-                            num_results=num_results,
-                            total=data.get("total", 0),
-                            job_uuid=job_uuid,
-                        )
-                    break
-
-                results.extend(items)
-                if total is None:
-                    total = data.get("total", 0)
-                offset += page_size
+            results = list(self._search_job_client.iter_events(job_uuid, page_size=limit))
 
             self.log(
                 message=f"Retrieved {len(results)} events from search job",
@@ -1875,18 +1879,12 @@ class AlertEventsThresholdTrigger(SecurityAlertsTrigger):
 
         # Step 3: Get only the first page to extract the total count
         try:
-            if self._http_session is None:
+            if self._search_job_client is None:
                 self.log(message="HTTP session not initialized", level="error")
                 return None
 
-            response = self._http_session.get(
-                f"{self._events_api_path}/search/jobs/{job_uuid}/events",
-                params={"limit": 1, "offset": 0},  # Only fetch 1 item to get the total
-                timeout=20,
-            )
-            response.raise_for_status()
-
-            data = response.json()
+            # Only fetch 1 item to get the total
+            data = self._search_job_client.get_events_page(job_uuid, offset=0, limit=1)
             event_count = data.get("total", 0)
 
             self.log(
@@ -15,6 +15,7 @@ if should_patch():
 import json
 from urllib.parse import urlparse
 
+import orjson
 import requests
 from sekoia_automation.trigger import Trigger
 from websocket import WebSocketApp, WebSocketTimeoutException, setdefaulttimeout
@@ -44,7 +45,9 @@ class _SEKOIANotificationBaseTrigger(Trigger):
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self._message_processor: MessagesProcessor = MessagesProcessor(self.handler_dispatcher)
+        self._message_processor: MessagesProcessor = MessagesProcessor(
+            self.handler_dispatcher, key=self.get_message_ordering_key
+        )
         self._websocket: WebSocketApp | None = None
         self._last_error: datetime | None = None
         self._last_close: datetime | None = None
@@ -145,6 +148,17 @@ class _SEKOIANotificationBaseTrigger(Trigger):
         self.heartbeat()
         self._message_processor.push_message(raw_message)
 
+    @staticmethod
+    def get_message_ordering_key(raw_message: str) -> str | None:
+        """Return the key of the notifications to handle in their order of reception.
+
+        The notifications about the same alert (or case) are handled one
+        after the other; the others are handled concurrently.
+
+        """
+        attributes = orjson.loads(raw_message).get("attributes") or {}
+        return attributes.get("alert_uuid") or attributes.get("uuid") or None
+
     def handler_dispatcher(self, raw_message: str):
         """Dispatch events to handler methods given the event type.
 
@@ -1,9 +1,12 @@
 # state_manager.py
-import json
-from datetime import datetime, timezone
+import heapq
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
+from threading import Event, Lock, RLock, Thread
 from typing import Any, Optional, Callable
 
+import orjson
+
 
 class AlertStateManager:
     """
@@ -34,22 +37,50 @@ class AlertStateManager:
             "last_cleanup": str (ISO 8601),
         }
     }
+
+    Persistence:
+    - Mutations are applied in memory and the updated alerts are tracked in a dirty set
+    - With a `flush_interval`, a background thread writes the state at most once per interval,
+      coalescing all the mutations of the interval in one upload. Without, each mutation is written immediately
+    - `stop()` writes the pending mutations
+
+    Time threshold index:
+    - The alerts with pending events are indexed in a heap by their reference time
+      (last trigger, or first event), so the periodic check only pops the alerts that are due
+    - The heap entries are invalidated lazily: an entry is only valid if it matches the reference time
+      currently known for the alert
     """
 
     VERSION = "1.1"
 
-    def __init__(self, state_file_path: Path, logger: Optional[Callable] = None):
+    def __init__(self, state_file_path: Path, logger: Optional[Callable] = None, flush_interval: float = 0):
         """
         Initialize state manager.
 
         Args:
             state_file_path: Path to the state JSON file (can be S3Path or PosixPath)
             logger: Optional logger callable (can be a function or logger object)
+            flush_interval: Seconds between two writes of the state (0 to write on each mutation)
         """
         # Keep the original path object (S3Path, PosixPath, etc.) to preserve S3 functionality
         self.state_file_path = state_file_path
         self.logger = logger
+        self.flush_interval = flush_interval
+
+        # `_lock` protects the in-memory state, `_flush_lock` orders the writes and the reloads
+        self._lock = RLock()
+        self._flush_lock = Lock()
+        self._dirty: set[str] = set()
+        self._flush_thread: Optional[Thread] = None
+        self._stop_event = Event()
+
+        # Due-time index of the alerts with pending events
+        self._due_heap: list[tuple[float, str]] = []
+        self._due_times: dict[str, float] = {}
+        self._indexed_keys: dict[str, tuple] = {}
+
         self._state: dict[str, Any] = self._load_state()
+        self._reindex()
 
     def _log(self, message: str, level: str = "info", **kwargs):
         """Helper to log using the injected logger (SDK-style)."""
@@ -64,10 +95,10 @@ class AlertStateManager:
         """Load JSON from S3 using Path.open() for SDK compatibility."""
         try:
             # Use Path.open() instead of smart_open for SDK-managed paths
-            with self.state_file_path.open("r") as f:
-                state = json.load(f)
+            with self.state_file_path.open("rb") as f:
+                state = orjson.loads(f.read())
                 self._log("State file loaded successfully from S3", level="debug")
-        except json.JSONDecodeError as exc:
+        except orjson.JSONDecodeError as exc:
             self._log(
                 "State file corrupted; starting fresh",
                 level="error",
@@ -118,16 +149,20 @@ class AlertStateManager:
         )
         return state
 
-    def _save_state_to_s3(self):
+    def _save_state_to_s3(self, content: Optional[bytes] = None):
         """Write JSON to S3 using Path.open() for SDK compatibility."""
+        if content is None:
+            with self._lock:
+                content = orjson.dumps(self._state)
+
         try:
             # Ensure parent directory exists - required for S3Path (see SDK storage.py)
             # This pattern is used in all other automation modules
             self.state_file_path.parent.mkdir(parents=True, exist_ok=True)
 
             # Use Path.open() for SDK-managed S3 paths
-            with self.state_file_path.open("w", encoding="utf-8") as f:
-                json.dump(self._state, f, indent=2)
+            with self.state_file_path.open("wb") as f:
+                f.write(content)
             self._log("State saved successfully to S3", level="debug")
         except Exception as e:
             self._log(
@@ -163,23 +198,87 @@ class AlertStateManager:
     def _save_state(self):
         """Save state to S3."""
         self._log("Saving state to S3", level="debug", file_path=str(self.state_file_path))
-        try:
-            self._save_state_to_s3()
-            self._log(
-                "State saved successfully",
-                level="debug",
-                file_path=str(self.state_file_path),
-                alert_count=len(self._state.get("alerts", {})),
-            )
-        except Exception as e:
-            self._log(
-                "Failed to save state to S3",
-                level="error",
-                error=str(e),
-                error_type=type(e).__name__,
-                file_path=str(self.state_file_path),
-            )
-            raise
+        with self._flush_lock:
+            # Serialize a consistent snapshot; the mutations made during the upload are flushed later
+            with self._lock:
+                dirty, self._dirty = self._dirty, set()
+                content = orjson.dumps(self._state)
+                alert_count = len(self._state.get("alerts", {}))
+
+            try:
+                self._save_state_to_s3(content)
+                self._log(
+                    "State saved successfully",
+                    level="debug",
+                    file_path=str(self.state_file_path),
+                    alert_count=alert_count,
+                    flushed_alerts=len(dirty),
+                )
+            except Exception as e:
+                # Keep the mutations to write them on the next flush
+                with self._lock:
+                    self._dirty |= dirty
+
+                self._log(
+                    "Failed to save state to S3",
+                    level="error",
+                    error=str(e),
+                    error_type=type(e).__name__,
+                    file_path=str(self.state_file_path),
+                )
+                raise
+
+    def _mark_dirty(self, *alert_uuids: str):
+        """
+        Record the mutated alerts and schedule their persistence.
+
+        Without a flush interval, the state is written immediately.
+        """
+        with self._lock:
+            self._dirty.update(alert_uuids)
+
+        if self.flush_interval <= 0:
+            self._save_state()
+        else:
+            self._start_flush_thread()
+
+    def _start_flush_thread(self):
+        """Start the background thread writing the pending mutations."""
+        with self._lock:
+            if self._flush_thread is not None and self._flush_thread.is_alive():
+                return
+
+            self._stop_event.clear()
+            self._flush_thread = Thread(target=self._flush_loop, name="AlertStateFlusher", daemon=True)
+            self._flush_thread.start()
+
+    def _flush_loop(self):
+        """Periodically write the pending mutations until the manager is stopped."""
+        while not self._stop_event.wait(timeout=self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                # Already logged; the mutations are kept for the next flush
+                pass
+
+    def has_pending_changes(self) -> bool:
+        """Return whether some mutations are not written yet."""
+        with self._lock:
+            return bool(self._dirty)
+
+    def flush(self):
+        """Write the pending mutations, if any."""
+        if self.has_pending_changes():
+            self._save_state()
+
+    def stop(self):
+        """Stop the background flush and write the pending mutations."""
+        self._stop_event.set()
+        if self._flush_thread is not None:
+            self._flush_thread.join(timeout=10)
+            self._flush_thread = None
+
+        self.flush()
 
     def _migrate_state(self, old_state: dict[str, Any]) -> dict[str, Any]:
         """
@@ -273,9 +372,15 @@ class AlertStateManager:
         )
         now = datetime.now(timezone.utc).isoformat()
 
-        # Reload state from S3 to get latest version (use _load_state for consistent error handling)
-        self._state = self._load_state()
+        with self._lock:
+            self._apply_alert_state(alert_uuid, alert_short_id, rule_uuid, rule_name, event_count, now)
+
+        self._mark_dirty(alert_uuid)
 
+    def _apply_alert_state(
+        self, alert_uuid: str, alert_short_id: str, rule_uuid: str, rule_name: str, event_count: int, now: str
+    ):
+        """Apply a trigger of the alert to the in-memory state."""
         existing = self._state["alerts"].get(alert_uuid)
 
         if existing:
@@ -314,8 +419,7 @@ class AlertStateManager:
             }
             self._log(f"Created new state for alert {alert_short_id}", level="debug", alert_uuid=alert_uuid)
 
-        # Save back to S3
-        self._save_state_to_s3()
+        self._index_alert(alert_uuid, self._state["alerts"][alert_uuid])
 
     def cleanup_old_states(self, cutoff_date: datetime) -> int:
         """
@@ -335,8 +439,8 @@ class AlertStateManager:
         )
 
         try:
-            # Reload state from S3 to get latest version (use _load_state for consistent error handling)
-            self._state = self._load_state()
+            # Reload state from S3 to get latest version, keeping the pending mutations
+            self.reload_state()
 
             cutoff_iso = cutoff_date.isoformat()
             to_remove = []
@@ -354,13 +458,15 @@ class AlertStateManager:
                         last_triggered_at=last_triggered,
                     )
 
-            for alert_uuid in to_remove:
-                del self._state["alerts"][alert_uuid]
-
             if to_remove:
-                self._state["metadata"]["last_cleanup"] = datetime.now(timezone.utc).isoformat()
-                # save back to S3
-                self._save_state_to_s3()
+                with self._lock:
+                    for alert_uuid in to_remove:
+                        self._state["alerts"].pop(alert_uuid, None)
+                        self._unindex_alert(alert_uuid)
+
+                    self._state["metadata"]["last_cleanup"] = datetime.now(timezone.utc).isoformat()
+
+                self._mark_dirty(*to_remove)
                 self._log(
                     f"Cleanup completed: removed {len(to_remove)} old states",
                     level="info",
@@ -403,10 +509,7 @@ class AlertStateManager:
         Update cached alert info and current event count (without triggering).
         Used to store alert data from notifications to avoid API calls.
 
-        Note: This method reloads state from S3 on each call to ensure consistency.
-        While this adds latency per notification, it ensures we don't lose updates
-        from other processes. For high-volume scenarios, consider implementing
-        a write-through cache or batching updates.
+        The update is applied in memory; its persistence follows the flush interval.
 
         Args:
             alert_uuid: UUID of the alert
@@ -415,10 +518,13 @@ class AlertStateManager:
         """
         now = datetime.now(timezone.utc).isoformat()
 
-        # Reload state from S3 to get latest version before updating
-        # This ensures consistency when multiple processes may be updating
-        self._state = self._load_state()
+        with self._lock:
+            self._apply_alert_info(alert_uuid, alert_info, event_count, now)
+
+        self._mark_dirty(alert_uuid)
 
+    def _apply_alert_info(self, alert_uuid: str, alert_info: dict[str, Any], event_count: int, now: str):
+        """Apply the cached alert info and event count to the in-memory state."""
         existing = self._state["alerts"].get(alert_uuid)
 
         if existing:
@@ -460,8 +566,7 @@ class AlertStateManager:
                 event_count=event_count,
             )
 
-        # Save back to S3
-        self._save_state_to_s3()
+        self._index_alert(alert_uuid, self._state["alerts"][alert_uuid])
 
     def get_alert_info(self, alert_uuid: str) -> Optional[dict[str, Any]]:
         """
@@ -483,6 +588,95 @@ class AlertStateManager:
             return state.get("alert_info")
         return None
 
+    @staticmethod
+    def _index_key(state: dict[str, Any]) -> tuple:
+        """Return the fields of an alert state the time threshold index depends on."""
+        return (
+            state.get("last_event_at"),
+            state.get("last_triggered_at"),
+            state.get("created_at"),
+            state.get("current_event_count", 0),
+            state.get("last_triggered_event_count", 0),
+        )
+
+    def _get_reference_timestamp(self, alert_uuid: str, state: dict[str, Any]) -> Optional[float]:
+        """
+        Get the reference time of the time window of an alert with pending events.
+
+        - If previously triggered: use last_triggered_at
+        - If never triggered: use created_at (first time we saw this alert)
+        - Fallback to last_event_at if no other timestamp available
+
+        Args:
+            alert_uuid: UUID of the alert
+            state: State of the alert
+
+        Returns:
+            The reference time as a POSIX timestamp, or None if the alert has no pending events
+        """
+        last_event_at_str = state.get("last_event_at")
+
+        # Skip if no events received yet
+        if not last_event_at_str:
+            return None
+
+        # Check if there are pending events (current > last triggered)
+        if state.get("current_event_count", 0) - state.get("last_triggered_event_count", 0) <= 0:
+            return None
+
+        if state.get("last_triggered_at") is not None:
+            reference_time_str = state["last_triggered_at"]
+        elif state.get("created_at") is not None:
+            reference_time_str = state["created_at"]
+        else:
+            reference_time_str = last_event_at_str
+
+        try:
+            reference_time = datetime.fromisoformat(reference_time_str.replace("Z", "+00:00"))
+            if reference_time.tzinfo is None:
+                reference_time = reference_time.replace(tzinfo=timezone.utc)
+        except (ValueError, AttributeError):
+            self._log(
+                f"Invalid reference timestamp for alert {alert_uuid}",
+                level="warning",
+                alert_uuid=alert_uuid,
+                reference_time=reference_time_str,
+            )
+            return None
+
+        return reference_time.timestamp()
+
+    def _index_alert(self, alert_uuid: str, state: dict[str, Any]):
+        """Update the due time of an alert in the time threshold index."""
+        self._indexed_keys[alert_uuid] = self._index_key(state)
+
+        reference = self._get_reference_timestamp(alert_uuid, state)
+        if reference is None:
+            self._due_times.pop(alert_uuid, None)
+        elif self._due_times.get(alert_uuid) != reference:
+            self._due_times[alert_uuid] = reference
+            heapq.heappush(self._due_heap, (reference, alert_uuid))
+
+            # Drop the invalidated entries once they outnumber the valid ones
+            if len(self._due_heap) > 2 * len(self._due_times) + 64:
+                self._due_heap = [(due, uuid) for uuid, due in self._due_times.items()]
+                heapq.heapify(self._due_heap)
+
+    def _unindex_alert(self, alert_uuid: str):
+        """Remove an alert from the time threshold index."""
+        self._indexed_keys.pop(alert_uuid, None)
+        self._due_times.pop(alert_uuid, None)
+
+    def _reindex(self):
+        """Index the alerts of the state that changed since they were indexed."""
+        alerts = self._state["alerts"]
+        for alert_uuid in self._indexed_keys.keys() - alerts.keys():
+            self._unindex_alert(alert_uuid)
+
+        for alert_uuid, state in alerts.items():
+            if self._indexed_keys.get(alert_uuid) != self._index_key(state):
+                self._index_alert(alert_uuid, state)
+
     def get_alerts_pending_time_check(self, time_window_hours: int) -> list[dict[str, Any]]:
         """
         Get alerts that have pending events and the time window has elapsed since last trigger.
@@ -493,81 +687,38 @@ class AlertStateManager:
         - If previously triggered: check if time_window_hours has passed since last trigger
         - Only return alerts with pending events (current_count > last_triggered_count)
 
+        Only the alerts that are due are read from the time threshold index.
+        They stay indexed until a trigger updates their state.
+
         Args:
             time_window_hours: Time window in hours (1-168)
 
         Returns:
             List of alert states that need time threshold triggering
         """
-        from datetime import timedelta
-
         now = datetime.now(timezone.utc)
+        deadline = (now - timedelta(hours=time_window_hours)).timestamp()
 
-        pending_alerts = []
-        for alert_uuid, state in self._state["alerts"].items():
-            last_event_at_str = state.get("last_event_at")
-            last_triggered_at_str = state.get("last_triggered_at")
-            created_at_str = state.get("created_at")
-            current_count = state.get("current_event_count", 0)
-            last_triggered_count = state.get("last_triggered_event_count", 0)
-
-            # Skip if no events received yet
-            if not last_event_at_str:
-                continue
-
-            # Check if there are pending events (current > last triggered)
-            pending_events = current_count - last_triggered_count
-            if pending_events <= 0:
-                continue
-
-            # Determine the reference time for the time window check:
-            # - If previously triggered: use last_triggered_at
-            # - If never triggered: use created_at (first time we saw this alert)
-            if last_triggered_at_str is not None:
-                reference_time_str = last_triggered_at_str
-            elif created_at_str is not None:
-                reference_time_str = created_at_str
-            else:
-                # Fallback to last_event_at if no other timestamp available
-                reference_time_str = last_event_at_str
+        due: dict[str, float] = {}
+        with self._lock:
+            while self._due_heap and self._due_heap[0][0] <= deadline:
+                reference, alert_uuid = heapq.heappop(self._due_heap)
+                if self._due_times.get(alert_uuid) == reference:
+                    due[alert_uuid] = reference
 
-            # Parse reference timestamp
-            try:
-                reference_time = datetime.fromisoformat(reference_time_str.replace("Z", "+00:00"))
-                if reference_time.tzinfo is None:
-                    reference_time = reference_time.replace(tzinfo=timezone.utc)
-            except (ValueError, AttributeError):
-                self._log(
-                    f"Invalid reference timestamp for alert {alert_uuid}",
-                    level="warning",
-                    alert_uuid=alert_uuid,
-                    reference_time=reference_time_str,
-                )
-                continue
+            # the due alerts remain pending until they are triggered
+            for alert_uuid, reference in due.items():
+                heapq.heappush(self._due_heap, (reference, alert_uuid))
 
-            # Check if time_window_hours has elapsed since reference time
-            time_since_reference = now - reference_time
-            required_duration = timedelta(hours=time_window_hours)
+            pending_alerts = [self._state["alerts"][alert_uuid] for alert_uuid in due]
 
-            if time_since_reference < required_duration:
-                # Not enough time has passed yet
-                self._log(
-                    f"Alert {state.get('alert_short_id')} not ready yet (time remaining: {required_duration - time_since_reference})",
-                    level="debug",
-                    alert_uuid=alert_uuid,
-                    pending_events=pending_events,
-                    time_since_reference_hours=time_since_reference.total_seconds() / 3600,
-                    required_hours=time_window_hours,
-                )
-                continue
-
-            pending_alerts.append(state)
+        for alert_uuid, state in zip(due, pending_alerts):
             self._log(
                 f"Alert {state.get('alert_short_id')} ready for time threshold trigger",
                 level="debug",
                 alert_uuid=alert_uuid,
-                pending_events=pending_events,
-                time_since_reference_hours=time_since_reference.total_seconds() / 3600,
+                pending_events=state.get("current_event_count", 0) - state.get("last_triggered_event_count", 0),
+                time_since_reference_hours=(now.timestamp() - due[alert_uuid]) / 3600,
                 required_hours=time_window_hours,
             )
 
@@ -580,7 +731,8 @@ class AlertStateManager:
         Returns:
             Dictionary of all alert states
         """
-        return self._state["alerts"].copy()
+        with self._lock:
+            return self._state["alerts"].copy()
 
     def reload_state(self):
         """
@@ -596,6 +748,25 @@ class AlertStateManager:
         - For multi-instance deployments, external coordination (e.g., locks) should be used
         - The current implementation is designed for single-instance deployments where
           one trigger process handles all notifications for a given configuration
+        - The mutations not written yet are kept over the reloaded state
         """
-        self._state = self._load_state()
+        # Hold the flush lock so that a write in progress cannot be overridden by an older stored state
+        with self._flush_lock:
+            state = self._load_state()
+            with self._lock:
+                if self._dirty:
+                    for alert_uuid in self._dirty:
+                        alert_state = self._state["alerts"].get(alert_uuid)
+                        if alert_state is not None:
+                            state["alerts"][alert_uuid] = alert_state
+                        else:
+                            state["alerts"].pop(alert_uuid, None)
+
+                    state["metadata"]["last_cleanup"] = max(
+                        state["metadata"].get("last_cleanup") or "", self._state["metadata"]["last_cleanup"]
+                    )
+
+                self._state = state
+                self._reindex()
+
         self._log("State reloaded from storage", level="debug")
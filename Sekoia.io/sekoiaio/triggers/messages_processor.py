@@ -1,28 +1,49 @@
 import signal
+import time
+from collections import deque
 from collections.abc import Callable
 from queue import Queue
-from threading import Event, Thread
+from threading import Event, Lock, Thread
 
 from gevent.pool import Pool
 
+from sekoiaio.logging import get_logger
+from sekoiaio.triggers.metrics import (
+    NOTIFICATIONS_HANDLING_SECONDS,
+    NOTIFICATIONS_QUEUE_DEPTH,
+    NOTIFICATIONS_WAIT_SECONDS,
+)
+
+logger = get_logger(__name__)
+
 
 class MessagesProcessor(Thread):
     """
     Class in charge of processing messages received by the trigger
+
+    Messages are processed concurrently by a bounded pool of workers.
+    Messages sharing the same key (e.g. the uuid of their alert) are processed one after the other,
+    in their order of reception.
     """
 
     QUEUE_TIMEOUT = 1
+    POOL_SIZE = 100
 
     _queue: Queue
     _stop_event: Event
     _pool: Pool
 
-    def __init__(self, callback: Callable):
+    def __init__(self, callback: Callable, key: Callable[[str], str | None] | None = None):
         super().__init__()
         self._queue = Queue()
         self._stop_event = Event()  # Event to notify we must stop the thread
-        self._pool = Pool(100)
+        self._pool = Pool(self.POOL_SIZE)
         self._callback: Callable = callback
+        self._key: Callable[[str], str | None] | None = key
+
+        # Messages waiting for the processing of a previous message with the same key
+        self._pending: dict[str, deque[tuple[float, str]]] = {}
+        self._pending_lock = Lock()
 
         # Register signal to terminate thread
         signal.signal(signal.SIGINT, self.exit)
@@ -34,7 +55,8 @@ class MessagesProcessor(Thread):
         self._pool.join()
 
     def push_message(self, message: str):
-        self._queue.put(message)
+        NOTIFICATIONS_QUEUE_DEPTH.inc()
+        self._queue.put((time.monotonic(), message))
 
     def exit(self, _, __):
         # Exit signal received, asking the processor to stop
@@ -46,10 +68,60 @@ class MessagesProcessor(Thread):
         """
         self._stop_event.set()
 
+    def _get_key(self, message: str) -> str | None:
+        if self._key is None:
+            return None
+
+        try:
+            return self._key(message)
+        except Exception:
+            return None
+
     def _handle_message(self):
         try:
-            message = self._queue.get(timeout=self.QUEUE_TIMEOUT)
-            self._pool.spawn(self._callback, message)
+            received_at, message = self._queue.get(timeout=self.QUEUE_TIMEOUT)
+            key = self._get_key(message)
+            if key is not None:
+                with self._pending_lock:
+                    if key in self._pending:
+                        # A message with the same key is being processed; this one will follow it
+                        self._pending[key].append((received_at, message))
+                        return
+
+                    self._pending[key] = deque()
+
+            # Blocks while all the workers are busy
+            self._pool.spawn(self._process_messages, key, received_at, message)
         except Exception:
             # Don't block indefinitely to get a chance to exit properly
             pass
+
+    def _process_messages(self, key: str | None, received_at: float, message: str):
+        """
+        Process a message, then the messages received meanwhile with the same key.
+        """
+        while True:
+            self._process_message(received_at, message)
+
+            if key is None:
+                return
+
+            with self._pending_lock:
+                pending = self._pending[key]
+                if not pending:
+                    del self._pending[key]
+                    return
+
+                received_at, message = pending.popleft()
+
+    def _process_message(self, received_at: float, message: str):
+        NOTIFICATIONS_QUEUE_DEPTH.dec()
+        started_at = time.monotonic()
+        NOTIFICATIONS_WAIT_SECONDS.observe(started_at - received_at)
+        try:
+            self._callback(message)
+        except Exception:
+            # Keep processing the next messages with the same key
+            logger.exception("Failed to process message")
+        finally:
+            NOTIFICATIONS_HANDLING_SECONDS.observe(time.monotonic() - started_at)
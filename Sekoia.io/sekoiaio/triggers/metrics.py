@@ -1,4 +1,4 @@
-from prometheus_client import Counter, Gauge
+from prometheus_client import Counter, Gauge, Histogram
 
 # New metrics for threshold trigger
 THRESHOLD_CHECKS = Counter(
@@ -23,3 +23,18 @@ STATE_SIZE = Gauge(
     "sekoiaio_alert_threshold_state_size",
     "Number of alerts tracked in state",
 )
+
+NOTIFICATIONS_QUEUE_DEPTH = Gauge(
+    "sekoiaio_notifications_queue_depth",
+    "Number of notifications received and not yet handled",
+)
+
+NOTIFICATIONS_WAIT_SECONDS = Histogram(
+    "sekoiaio_notifications_wait_seconds",
+    "Time spent by the notifications waiting to be handled",
+)
+
+NOTIFICATIONS_HANDLING_SECONDS = Histogram(
+    "sekoiaio_notifications_handling_seconds",
+    "Time spent handling the notifications",
+)
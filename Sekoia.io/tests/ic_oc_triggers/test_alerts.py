@@ -1,4 +1,5 @@
 import json
+import time
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from unittest.mock import MagicMock, Mock, patch
@@ -76,6 +77,53 @@ def test_securityalertstrigger_retrieve_alert_from_api(alert_trigger, sample_not
         assert sorted(alert) == sorted(sample_sicalertapi)
 
 
+def test_securityalertstrigger_retrieve_alert_from_api_cached(alert_trigger, sample_sicalertapi):
+    alert_uuid = sample_sicalertapi.get("uuid")
+
+    with requests_mock.Mocker() as mock:
+        mock.get(f"http://fake.url/api/v1/sic/alerts/{alert_uuid}", json=sample_sicalertapi)
+
+        assert alert_trigger._retrieve_alert_from_alertapi(alert_uuid) == sample_sicalertapi
+        assert alert_trigger._retrieve_alert_from_alertapi(alert_uuid) == sample_sicalertapi
+        assert mock.call_count == 1
+        assert mock.last_request.headers["Authorization"] == "Bearer fake_api_key"
+
+        # the alert is fetched again once the cached one expired
+        with patch("sekoiaio.triggers.alerts.time.monotonic", return_value=time.monotonic() + 60):
+            alert_trigger._retrieve_alert_from_alertapi(alert_uuid)
+        assert mock.call_count == 2
+
+    # the connections are kept in a single session
+    assert alert_trigger.alert_api_session is alert_trigger.alert_api_session
+    # the requests are only retried by the trigger, not by the connection pool
+    assert alert_trigger.alert_api_session.get_adapter("https://").max_retries.total == 0
+
+
+def test_securityalertstrigger_alert_cache_is_bounded(alert_trigger, sample_sicalertapi):
+    alert_trigger.ALERT_CACHE_MAX_SIZE = 2
+
+    with requests_mock.Mocker() as mock:
+        mock.get(requests_mock.ANY, json=sample_sicalertapi)
+
+        for alert_uuid in ["alert-1", "alert-2", "alert-3"]:
+            alert_trigger._retrieve_alert_from_alertapi(alert_uuid)
+
+    assert list(alert_trigger._alert_cache) == ["alert-2", "alert-3"]
+
+
+def test_alert_status_changed_trigger_does_not_cache_alerts(module_configuration, sample_sicalertapi):
+    trigger = AlertStatusChangedTrigger()
+    trigger.module.configuration = module_configuration
+    alert_uuid = sample_sicalertapi.get("uuid")
+
+    with requests_mock.Mocker() as mock:
+        mock.get(f"http://fake.url/api/v1/sic/alerts/{alert_uuid}", json=sample_sicalertapi)
+
+        trigger._retrieve_alert_from_alertapi(alert_uuid)
+        trigger._retrieve_alert_from_alertapi(alert_uuid)
+        assert mock.call_count == 2
+
+
 def test_securityalertstrigger_retrieve_alert_from_api_exp_raised(
     alert_trigger, samplenotif_alert_created, requests_mock
 ):
@@ -1249,15 +1297,12 @@ class TestAlertEventsThresholdTrigger_EventFetching:
         page2_events = [{"uuid": f"event-{i}", "data": f"page2-{i}"} for i in range(100, 200)]
         page3_events = [{"uuid": f"event-{i}", "data": f"page3-{i}"} for i in range(200, 250)]
 
-        # Mock paginated responses
-        requests_mock.get(
-            f"http://fake.url/api/v1/sic/conf/events/search/jobs/{job_uuid}/events",
-            [
-                {"json": {"items": page1_events, "total": 250}},
-                {"json": {"items": page2_events, "total": 250}},
-                {"json": {"items": page3_events, "total": 250}},
-            ],
-        )
+        # Mock paginated responses (the pages after the first one are fetched concurrently)
+        for offset, page_events in ((0, page1_events), (100, page2_events), (200, page3_events)):
+            requests_mock.get(
+                f"http://fake.url/api/v1/sic/conf/events/search/jobs/{job_uuid}/events?limit=100&offset={offset}",
+                json={"items": page_events, "total": 250},
+            )
 
         results = threshold_trigger._get_search_job_results(job_uuid, limit=100)
 
@@ -1271,8 +1316,7 @@ class TestAlertEventsThresholdTrigger_EventFetching:
         # Verify pagination was done correctly
         assert requests_mock.call_count == 3
         assert requests_mock.request_history[0].qs == {"limit": ["100"], "offset": ["0"]}
-        assert requests_mock.request_history[1].qs == {"limit": ["100"], "offset": ["100"]}
-        assert requests_mock.request_history[2].qs == {"limit": ["100"], "offset": ["200"]}
+        assert sorted(int(request.qs["offset"][0]) for request in requests_mock.request_history[1:]) == [100, 200]
 
     def test_fetch_alert_events_all_events(
         self, threshold_trigger, sample_threshold_alert, sample_events, requests_mock
@@ -1668,6 +1712,8 @@ class TestAlertEventsThresholdTrigger_EventFetching:
             "alert_info": {**sample_threshold_alert, "uuid": alert_uuid, "short_id": "AL_TIME"},
         }
         threshold_trigger.state_manager._save_state()
+        # Load the stored state, as on startup
+        threshold_trigger.state_manager.reload_state()
 
         # Call the background thread check directly
         threshold_trigger._check_pending_time_thresholds()
@@ -2190,6 +2236,18 @@ class TestAlertEventsThresholdTrigger_AlertInfoOptimization:
             assert alert is not None
 
 
+def update_at(at, update, *args, **kwargs):
+    """Apply an update of the state manager as if it happened at the given time."""
+    clock = Mock(wraps=datetime)
+    clock.now.return_value = at
+    with patch("sekoiaio.triggers.helpers.state_manager.datetime", clock):
+        update(*args, **kwargs)
+
+
+def rule_alert_info(short_id):
+    return {"short_id": short_id, "rule": {"uuid": "rule-uuid", "name": "Test Rule"}}
+
+
 class TestAlertStateManager_NewMethods:
     """Test new AlertStateManager methods for caching and time threshold."""
 
@@ -2269,54 +2327,36 @@ class TestAlertStateManager_NewMethods:
         """Test that get_alerts_pending_time_check returns alerts where time window has elapsed."""
         now = datetime.now(timezone.utc)
 
+        def receive_events(alert_uuid, short_id, at, event_count):
+            update_at(at, state_manager.update_alert_info, alert_uuid, rule_alert_info(short_id), event_count)
+
+        def trigger(alert_uuid, short_id, at, event_count):
+            update_at(
+                at, state_manager.update_alert_state, alert_uuid, short_id, "rule-uuid", "Test Rule", event_count
+            )
+
         # Alert with pending events AND time window elapsed (last trigger > 1 hour ago)
         # This should be returned because:
         # - Has pending events (10 - 5 = 5 pending)
         # - Time since last trigger (2 hours) > time_window_hours (1 hour)
-        state_manager._state["alerts"]["alert-ready"] = {
-            "alert_uuid": "alert-ready",
-            "alert_short_id": "ALT-READY",
-            "current_event_count": 10,
-            "last_triggered_event_count": 5,
-            "last_event_at": now.isoformat(),
-            "last_triggered_at": (now - timedelta(hours=2)).isoformat(),
-            "created_at": (now - timedelta(hours=3)).isoformat(),
-        }
+        receive_events("alert-ready", "ALT-READY", now - timedelta(hours=3), 5)
+        trigger("alert-ready", "ALT-READY", now - timedelta(hours=2), 5)
+        receive_events("alert-ready", "ALT-READY", now, 10)
 
         # Alert with pending events but time window NOT elapsed (last trigger < 1 hour ago)
         # This should NOT be returned because time_window hasn't elapsed yet
-        state_manager._state["alerts"]["alert-not-ready"] = {
-            "alert_uuid": "alert-not-ready",
-            "alert_short_id": "ALT-NOTREADY",
-            "current_event_count": 10,
-            "last_triggered_event_count": 5,
-            "last_event_at": now.isoformat(),
-            "last_triggered_at": (now - timedelta(minutes=30)).isoformat(),  # Only 30 min ago
-            "created_at": (now - timedelta(hours=3)).isoformat(),
-        }
+        receive_events("alert-not-ready", "ALT-NOTREADY", now - timedelta(hours=3), 5)
+        trigger("alert-not-ready", "ALT-NOTREADY", now - timedelta(minutes=30), 5)  # Only 30 min ago
+        receive_events("alert-not-ready", "ALT-NOTREADY", now, 10)
 
         # Alert with no pending events (already fully triggered)
-        state_manager._state["alerts"]["alert-no-pending"] = {
-            "alert_uuid": "alert-no-pending",
-            "alert_short_id": "ALT-NOPEND",
-            "current_event_count": 5,
-            "last_triggered_event_count": 5,
-            "last_event_at": now.isoformat(),
-            "last_triggered_at": (now - timedelta(hours=2)).isoformat(),
-            "created_at": (now - timedelta(hours=3)).isoformat(),
-        }
+        receive_events("alert-no-pending", "ALT-NOPEND", now - timedelta(hours=3), 5)
+        trigger("alert-no-pending", "ALT-NOPEND", now - timedelta(hours=2), 5)
 
         # New alert never triggered, with pending events, created > 1 hour ago
         # Should be returned because created_at is used as reference when never triggered
-        state_manager._state["alerts"]["alert-never-triggered"] = {
-            "alert_uuid": "alert-never-triggered",
-            "alert_short_id": "ALT-NEVER",
-            "current_event_count": 10,
-            "last_triggered_event_count": 0,
-            "last_event_at": now.isoformat(),
-            "last_triggered_at": None,
-            "created_at": (now - timedelta(hours=2)).isoformat(),  # Created 2 hours ago
-        }
+        receive_events("alert-never-triggered", "ALT-NEVER", now - timedelta(hours=2), 5)  # Created 2 hours ago
+        receive_events("alert-never-triggered", "ALT-NEVER", now, 10)
 
         pending = state_manager.get_alerts_pending_time_check(time_window_hours=1)
 
@@ -2359,12 +2399,12 @@ class TestAlertStateManager_NewMethods:
         # Should return empty list since no valid alerts
         assert len(pending) == 0
 
-    def test_get_alerts_pending_time_check_fallback_to_last_event(self, state_manager):
+    def test_get_alerts_pending_time_check_fallback_to_last_event(self, state_file_path, mock_logger):
         """Test that last_event_at is used as fallback when no created_at or last_triggered_at."""
         now = datetime.now(timezone.utc)
 
-        # Alert with only last_event_at - should use it as reference
-        state_manager._state["alerts"]["alert-fallback"] = {
+        # Alert with only last_event_at, as stored by a former version - should use it as reference
+        alert_state = {
             "alert_uuid": "alert-fallback",
             "alert_short_id": "ALT-FALL",
             "current_event_count": 10,
@@ -2373,6 +2413,10 @@ class TestAlertStateManager_NewMethods:
             "last_triggered_at": None,
             "created_at": None,  # No created_at
         }
+        state_file_path.write_text(
+            json.dumps({"alerts": {"alert-fallback": alert_state}, "metadata": {"version": "1.1"}})
+        )
+        state_manager = AlertStateManager(state_file_path, logger=mock_logger)
 
         pending = state_manager.get_alerts_pending_time_check(time_window_hours=1)
 
@@ -2400,6 +2444,123 @@ class TestAlertStateManager_NewMethods:
         # Should return empty list since timestamp is invalid
         assert len(pending) == 0
 
+    def test_get_alerts_pending_time_check_follows_state_updates(self, state_manager):
+        """Test that the pending alerts index is maintained by the state updates."""
+        alert_info = {"short_id": "ALT-IDX", "rule": {"uuid": "rule-uuid", "name": "Test Rule"}}
+        state_manager.update_alert_info(alert_uuid="alert-idx", alert_info=alert_info, event_count=5)
+
+        # never triggered, and created now: not due yet
+        assert state_manager.get_alerts_pending_time_check(time_window_hours=1) == []
+
+        # move the first event 2 hours back, as if it was stored by another process
+        two_hours_ago = (datetime.now(timezone.utc) - timedelta(hours=2)).isoformat()
+        state_manager._state["alerts"]["alert-idx"]["created_at"] = two_hours_ago
+        state_manager._save_state()
+        state_manager.reload_state()
+
+        pending = state_manager.get_alerts_pending_time_check(time_window_hours=1)
+        assert [state["alert_uuid"] for state in pending] == ["alert-idx"]
+
+        # still due until triggered
+        assert len(state_manager.get_alerts_pending_time_check(time_window_hours=1)) == 1
+
+        state_manager.update_alert_state("alert-idx", "ALT-IDX", "rule-uuid", "Test Rule", event_count=5)
+        assert state_manager.get_alerts_pending_time_check(time_window_hours=1) == []
+
+    def test_get_alerts_pending_time_check_skips_removed_alerts(self, state_manager):
+        """Test that the alerts removed by the cleanup are no longer pending."""
+        now = datetime.now(timezone.utc)
+        update_at(
+            now - timedelta(days=41), state_manager.update_alert_info, "alert-old", rule_alert_info("ALT-OLD"), 5
+        )
+        update_at(
+            now - timedelta(days=40),
+            state_manager.update_alert_state,
+            "alert-old",
+            "ALT-OLD",
+            "rule-uuid",
+            "Test Rule",
+            5,
+        )
+        update_at(now, state_manager.update_alert_info, "alert-old", rule_alert_info("ALT-OLD"), 10)
+        assert len(state_manager.get_alerts_pending_time_check(time_window_hours=1)) == 1
+
+        state_manager.cleanup_old_states(now - timedelta(days=30))
+
+        assert state_manager.get_alerts_pending_time_check(time_window_hours=1) == []
+
+
+class TestAlertStateManager_WriteBehind:
+    """Test the deferred persistence of AlertStateManager."""
+
+    @pytest.fixture
+    def write_behind_manager(self, state_file_path, mock_logger):
+        manager = AlertStateManager(state_file_path, logger=mock_logger, flush_interval=3600)
+        yield manager
+        manager._stop_event.set()
+
+    def test_mutations_are_coalesced_until_flush(self, write_behind_manager, state_file_path):
+        """Test that the mutations are kept in memory and written in one compact upload."""
+        with patch.object(
+            write_behind_manager, "_save_state_to_s3", wraps=write_behind_manager._save_state_to_s3
+        ) as save:
+            for event_count in range(5):
+                write_behind_manager.update_alert_info(
+                    alert_uuid="alert-1", alert_info={"short_id": "ALT-1"}, event_count=event_count
+                )
+            write_behind_manager.update_alert_state("alert-2", "ALT-2", "rule", "Rule", event_count=3)
+
+            assert save.call_count == 0
+            assert not state_file_path.exists()
+            assert write_behind_manager.has_pending_changes()
+
+            write_behind_manager.flush()
+
+        assert save.call_count == 1
+        assert not write_behind_manager.has_pending_changes()
+        content = state_file_path.read_bytes()
+        assert b"\n" not in content
+        assert set(json.loads(content)["alerts"]) == {"alert-1", "alert-2"}
+
+    def test_reload_keeps_pending_mutations(self, write_behind_manager, state_file_path, mock_logger):
+        """Test that reloading the state doesn't lose the mutations not written yet."""
+        other = AlertStateManager(state_file_path, logger=mock_logger)
+        other.update_alert_state("alert-stored", "ALT-S", "rule", "Rule", event_count=1)
+        other.update_alert_state("alert-removed", "ALT-R", "rule", "Rule", event_count=1)
+
+        write_behind_manager.reload_state()
+        write_behind_manager.update_alert_state("alert-pending", "ALT-P", "rule", "Rule", event_count=2)
+        write_behind_manager.cleanup_old_states(datetime.now(timezone.utc) + timedelta(seconds=1))
+        write_behind_manager.update_alert_state("alert-pending", "ALT-P", "rule", "Rule", event_count=4)
+
+        write_behind_manager.reload_state()
+
+        assert set(write_behind_manager.get_all_alerts()) == {"alert-pending"}
+        assert write_behind_manager.get_alert_state("alert-pending")["last_triggered_event_count"] == 4
+
+    def test_stop_writes_pending_mutations(self, write_behind_manager, state_file_path, mock_logger):
+        """Test that stopping the manager writes the pending mutations."""
+        write_behind_manager.update_alert_state("alert-1", "ALT-1", "rule", "Rule", event_count=7)
+        assert write_behind_manager._flush_thread is not None
+
+        write_behind_manager.stop()
+
+        assert write_behind_manager._flush_thread is None
+        state = AlertStateManager(state_file_path, logger=mock_logger).get_alert_state("alert-1")
+        assert state["last_triggered_event_count"] == 7
+
+    def test_failed_flush_keeps_pending_mutations(self, write_behind_manager, state_file_path):
+        """Test that the mutations are written on the next flush after a failure."""
+        write_behind_manager.update_alert_state("alert-1", "ALT-1", "rule", "Rule", event_count=7)
+
+        with patch.object(Path, "open", side_effect=IOError("Disk full")):
+            with pytest.raises(IOError):
+                write_behind_manager.flush()
+
+        assert write_behind_manager.has_pending_changes()
+        write_behind_manager.flush()
+        assert "alert-1" in json.loads(state_file_path.read_bytes())["alerts"]
+
 
 class TestAlertEventsThresholdTrigger_ConfigValidation:
     """Test configuration validation edge cases."""
@@ -2486,6 +2647,8 @@ class TestAlertEventsThresholdTrigger_CheckPendingExceptionHandling:
             "version": 1,
         }
         threshold_trigger.state_manager._save_state_to_s3()
+        # Load the stored state, as on startup
+        threshold_trigger.state_manager.reload_state()
 
         # Mock _trigger_time_threshold_for_alert to raise
         with patch.object(
@@ -2588,8 +2751,9 @@ class TestAlertEventsThresholdTrigger_TimeThresholdThread:
             "rule_name": "Test Rule",
             "version": 1,
         }
-        # Save state so it persists when _check_pending_time_thresholds reloads
+        # Save the state and load it, as on startup
         threshold_trigger.state_manager._save_state_to_s3()
+        threshold_trigger.state_manager.reload_state()
 
         # Run the check
         threshold_trigger._check_pending_time_thresholds()
@@ -2666,20 +2830,24 @@ class TestAlertEventsThresholdTrigger_TimeThresholdThread:
         # Should return early without error
         threshold_trigger._check_pending_time_thresholds()
 
-    def test_check_pending_when_reload_state_fails(self, threshold_trigger):
-        """Test _check_pending_time_thresholds when reload_state raises exception."""
+    def test_check_pending_does_not_reload_state(self, threshold_trigger):
+        """Test _check_pending_time_thresholds only reads the due alerts, without reloading the state."""
         threshold_trigger.configuration["enable_time_threshold"] = True
         threshold_trigger._validated_config = None
 
         with patch("sekoiaio.triggers.alerts.Thread"):
             threshold_trigger._ensure_initialized()
 
-        # Mock reload_state to raise
-        with patch.object(threshold_trigger.state_manager, "reload_state", side_effect=Exception("S3 error")):
-            # Should not raise, just log the error
+        with (
+            patch.object(threshold_trigger.state_manager, "reload_state") as mock_reload,
+            patch.object(
+                threshold_trigger.state_manager, "get_alerts_pending_time_check", return_value=[]
+            ) as mock_pending,
+        ):
             threshold_trigger._check_pending_time_thresholds()
 
-            threshold_trigger.log_exception.assert_called()
+        assert not mock_reload.called
+        mock_pending.assert_called_once()
 
 
 class TestAlertEventsThresholdTrigger_TriggerTimeThreshold:
@@ -2912,14 +3080,14 @@ class TestAlertEventsThresholdTrigger_RaceConditionFix:
     """Tests for the race condition fix in _handle_event_locked.
 
     These tests verify that:
-    1. State is reloaded from S3 before reading to prevent stale cache reads
+    1. The in-memory state is read without being reloaded from S3 on each notification
     2. update_alert_info() is only called when threshold is NOT met
     3. update_alert_info() is NOT called when threshold IS met (to avoid creating
        entries with last_triggered_event_count=0 before the actual trigger)
     """
 
-    def test_reload_state_before_get_alert_state(self, threshold_trigger, sample_threshold_alert):
-        """Test that reload_state() is called before get_alert_state() to prevent stale reads."""
+    def test_state_not_reloaded_on_notification(self, threshold_trigger, sample_threshold_alert):
+        """Test that the notifications read the in-memory state, without reloading it from S3."""
         threshold_trigger._ensure_initialized()
 
         # Stop background thread to prevent interference
@@ -2937,32 +3105,17 @@ class TestAlertEventsThresholdTrigger_RaceConditionFix:
         }
 
         alert = {**sample_threshold_alert, "uuid": alert_uuid}
-
-        # Track call order
-        call_order = []
-
-        original_reload = threshold_trigger.state_manager.reload_state
         original_get_state = threshold_trigger.state_manager.get_alert_state
 
-        def mock_reload():
-            call_order.append("reload_state")
-            return original_reload()
-
-        def mock_get_state(uuid):
-            call_order.append("get_alert_state")
-            return original_get_state(uuid)
-
         with patch.object(threshold_trigger, "_retrieve_alert_from_alertapi", return_value=alert):
-            with patch.object(threshold_trigger.state_manager, "reload_state", side_effect=mock_reload):
-                with patch.object(threshold_trigger.state_manager, "get_alert_state", side_effect=mock_get_state):
+            with patch.object(threshold_trigger.state_manager, "reload_state") as mock_reload:
+                with patch.object(
+                    threshold_trigger.state_manager, "get_alert_state", side_effect=original_get_state
+                ) as mock_get_state:
                     threshold_trigger.handle_event(message)
 
-        # Verify reload_state is called before get_alert_state
-        assert "reload_state" in call_order
-        assert "get_alert_state" in call_order
-        reload_idx = call_order.index("reload_state")
-        get_state_idx = call_order.index("get_alert_state")
-        assert reload_idx < get_state_idx, "reload_state must be called before get_alert_state"
+        mock_get_state.assert_called_with(alert_uuid)
+        assert not mock_reload.called
 
     def test_update_alert_info_called_when_threshold_not_met(self, threshold_trigger, sample_threshold_alert):
         """Test that update_alert_info() is called when threshold is NOT met."""
@@ -34,6 +34,15 @@ def test_sekoianotificationbasetrigger_handler_dispatch_invalid_json(base_trigge
     base_trigger.handler_dispatcher("dfdfg")
 
 
+def test_sekoianotificationbasetrigger_message_ordering_key(base_trigger):
+    alert_message = {"type": "alert", "action": "updated", "attributes": {"uuid": "alert-uuid"}}
+    comment_message = {"type": "alert-comment", "attributes": {"uuid": "comment-uuid", "alert_uuid": "alert-uuid"}}
+
+    assert base_trigger.get_message_ordering_key(json.dumps(alert_message)) == "alert-uuid"
+    assert base_trigger.get_message_ordering_key(json.dumps(comment_message)) == "alert-uuid"
+    assert base_trigger.get_message_ordering_key(json.dumps({"authenticated": True})) is None
+
+
 def test_sekoianotificationbasetrigger_liveapi_url(base_trigger):
     base_trigger.module.configuration["base_url"] = "https://app.sekoia.io"
     assert base_trigger.liveapi_url == "wss://app.sekoia.io/live/"
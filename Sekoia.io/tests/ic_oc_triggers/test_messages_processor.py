@@ -1,7 +1,9 @@
 from time import sleep
 from unittest.mock import Mock
 
+import gevent
 import pytest
+from prometheus_client import REGISTRY
 
 from sekoiaio.triggers.messages_processor import MessagesProcessor
 
@@ -45,3 +47,54 @@ def test_run(callback):
     processor.stop()
     sleep(0.2)  # Give time to the thread to join the pool
     callback.assert_called_once_with("foo")
+
+
+def test_messages_with_the_same_key_are_processed_in_order():
+    processed = []
+
+    def callback(message: str):
+        if message == "alert-1:first":
+            gevent.sleep(0.05)  # A slow handling must not delay the other alerts
+
+        processed.append(message)
+
+    processor = MessagesProcessor(callback=callback, key=lambda message: message.split(":")[0])
+    for message in ["alert-1:first", "alert-1:second", "alert-2:first", "alert-1:third"]:
+        processor.push_message(message)
+        processor._handle_message()
+    processor._pool.join()
+
+    assert processed[0] == "alert-2:first"
+    assert [message for message in processed if message.startswith("alert-1")] == [
+        "alert-1:first",
+        "alert-1:second",
+        "alert-1:third",
+    ]
+    assert processor._pending == {}
+
+
+def test_failing_message_does_not_block_its_key():
+    callback = Mock(side_effect=[Exception("failed"), None])
+    processor = MessagesProcessor(callback=callback, key=lambda message: "alert-1")
+    for message in ["foo", "bar"]:
+        processor.push_message(message)
+        processor._handle_message()
+    processor._pool.join()
+
+    assert [call.args[0] for call in callback.call_args_list] == ["foo", "bar"]
+    assert processor._pending == {}
+
+
+def test_queue_depth_and_latency_metrics(callback):
+    depth_before = REGISTRY.get_sample_value("sekoiaio_notifications_queue_depth")
+    handled_before = REGISTRY.get_sample_value("sekoiaio_notifications_handling_seconds_count")
+
+    processor = MessagesProcessor(callback=callback)
+    processor.push_message("foo")
+    assert REGISTRY.get_sample_value("sekoiaio_notifications_queue_depth") == depth_before + 1
+
+    processor._handle_message()
+    processor._pool.join()
+
+    assert REGISTRY.get_sample_value("sekoiaio_notifications_queue_depth") == depth_before
+    assert REGISTRY.get_sample_value("sekoiaio_notifications_handling_seconds_count") == handled_before + 1
@@ -137,7 +137,7 @@ def test_not_events_found(requests_mock):
     requests_mock.get(
         (
             "https://fake.url/api/v1/sic/conf/events/search/jobs/"
-            "483d36a5-8538-49c4-be19-49b669f90bf8/events?limit=100&offset=0"
+            "483d36a5-8538-49c4-be19-49b669f90bf8/events?limit=25&offset=0"
         ),
         json={
             "items": [],
@@ -173,7 +173,7 @@ def test_not_events_found_but_total(requests_mock):
     requests_mock.get(
         (
             "https://fake.url/api/v1/sic/conf/events/search/jobs/"
-            "483d36a5-8538-49c4-be19-49b669f90bf8/events?limit=100&offset=0"
+            "483d36a5-8538-49c4-be19-49b669f90bf8/events?limit=25&offset=0"
         ),
         json={
             "items": [],
@@ -187,6 +187,40 @@ def test_not_events_found_but_total(requests_mock):
     assert action._logs[0]["level"] == "error"
 
 
+def test_get_events_in_pages(requests_mock):
+    action = GetEvents()
+    action.module.configuration = {"base_url": module_base_url, "api_key": apikey}
+
+    arguments = {
+        "query": 'source.ip:"127.0.0.1" OR destination.ip:"127.0.0.1"',
+        "earliest_time": "-1d",
+        "latest_time": "now",
+    }
+
+    requests_mock.post(
+        "https://fake.url/api/v1/sic/conf/events/search/jobs",
+        json={"uuid": "483d36a5-8538-49c4-be19-49b669f90bf8"},
+    )
+
+    requests_mock.get(
+        "https://fake.url/api/v1/sic/conf/events/search/jobs/483d36a5-8538-49c4-be19-49b669f90bf8",
+        json={"status": 2, "uuid": "483d36a5-8538-49c4-be19-49b669f90bf8"},
+    )
+
+    for offset in range(0, 100, 25):
+        requests_mock.get(
+            (
+                "https://fake.url/api/v1/sic/conf/events/search/jobs/"
+                f"483d36a5-8538-49c4-be19-49b669f90bf8/events?limit=25&offset={offset}"
+            ),
+            json={"items": [{"uuid": f"event-{i}"} for i in range(offset, offset + 25)], "total": 1000},
+        )
+
+    results: dict = action.run(arguments)
+    assert [event["uuid"] for event in results["events"]] == [f"event-{i}" for i in range(100)]
+    assert len([request for request in requests_mock.request_history if "/events?" in request.url]) == 4
+
+
 def test_get_events_with_retries(requests_mock):
     action = GetEvents()
     action.module.configuration = {"base_url": module_base_url, "api_key": apikey}
@@ -480,7 +514,7 @@ def test_get_events_http_error(requests_mock):
 
     # Mock 403 error on event retrieval
     requests_mock.get(
-        "https://fake.url/api/v1/sic/conf/events/search/jobs/483d36a5-8538-49c4-be19-49b669f90bf8/events?limit=100&offset=0",
+        "https://fake.url/api/v1/sic/conf/events/search/jobs/483d36a5-8538-49c4-be19-49b669f90bf8/events?limit=25&offset=0",
         status_code=403,
         text="Forbidden: Insufficient permissions",
     )
@@ -0,0 +1,134 @@
+import itertools
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+import requests_mock
+
+from sekoiaio.search_jobs import SearchJobClient
+
+EVENTS_API_PATH = "http://fake.url/api/v1/sic/conf/events"
+JOB_UUID = "job-uuid-12345"
+
+
+@pytest.fixture
+def client():
+    return SearchJobClient(requests.Session(), EVENTS_API_PATH, log=MagicMock())
+
+
+def test_wait_with_adaptive_poll_interval(client):
+    statuses = [0, 1, 1, 1, 1, 2]
+    with requests_mock.Mocker() as mock, patch("sekoiaio.search_jobs.time.sleep") as sleep:
+        mock.get(
+            f"{EVENTS_API_PATH}/search/jobs/{JOB_UUID}",
+            [{"json": {"uuid": JOB_UUID, "status": status}} for status in statuses],
+        )
+
+        job = client.wait_for_completion(JOB_UUID, timeout=300)
+
+    assert job["status"] == 2
+    # the interval is reset when the job starts, then grows while the job is in progress
+    assert [call.args[0] for call in sleep.call_args_list] == [0.5, 0.5, 0.75, 1.125, 1.6875]
+
+
+def test_wait_poll_interval_is_capped(client):
+    statuses = [1] * 10 + [2]
+    with requests_mock.Mocker() as mock, patch("sekoiaio.search_jobs.time.sleep") as sleep:
+        mock.get(
+            f"{EVENTS_API_PATH}/search/jobs/{JOB_UUID}",
+            [{"json": {"uuid": JOB_UUID, "status": status}} for status in statuses],
+        )
+
+        client.wait_for_completion(JOB_UUID, timeout=300)
+
+    assert max(call.args[0] for call in sleep.call_args_list) == client.max_poll_interval
+
+
+def test_wait_timeout(client):
+    with (
+        requests_mock.Mocker() as mock,
+        patch("sekoiaio.search_jobs.time.sleep"),
+        patch("sekoiaio.search_jobs.time.time", side_effect=itertools.count(step=100)),
+    ):
+        mock.get(f"{EVENTS_API_PATH}/search/jobs/{JOB_UUID}", json={"uuid": JOB_UUID, "status": 1})
+
+        with pytest.raises(TimeoutError):
+            client.wait_for_completion(JOB_UUID, timeout=300)
+
+        assert mock.call_count < 10
+
+
+def test_iter_events_in_order(client):
+    with requests_mock.Mocker() as mock:
+        for offset in range(0, 1000, 100):
+            mock.get(
+                f"{EVENTS_API_PATH}/search/jobs/{JOB_UUID}/events?limit=100&offset={offset}",
+                json={"items": [{"uuid": f"event-{i}"} for i in range(offset, offset + 100)], "total": 1000},
+            )
+
+        events = list(client.iter_events(JOB_UUID, page_size=100))
+
+    assert [event["uuid"] for event in events] == [f"event-{i}" for i in range(1000)]
+
+
+def test_iter_events_with_limit(client):
+    with requests_mock.Mocker() as mock:
+        for offset in range(0, 1000, 100):
+            mock.get(
+                f"{EVENTS_API_PATH}/search/jobs/{JOB_UUID}/events?limit=100&offset={offset}",
+                json={"items": [{"uuid": f"event-{i}"} for i in range(offset, offset + 100)], "total": 1000},
+            )
+
+        events = list(client.iter_events(JOB_UUID, page_size=100, limit=300))
+
+        assert mock.call_count == 3
+
+    assert len(events) == 300
+
+
+def test_iter_events_bounds_the_pages_fetched_ahead(client):
+    with requests_mock.Mocker() as mock:
+        for offset in range(0, 1000, 100):
+            mock.get(
+                f"{EVENTS_API_PATH}/search/jobs/{JOB_UUID}/events?limit=100&offset={offset}",
+                json={"items": [{"uuid": f"event-{i}"} for i in range(offset, offset + 100)], "total": 1000},
+            )
+
+        events = client.iter_events(JOB_UUID, page_size=100)
+        for _ in range(100):
+            next(events)
+
+        # consuming the first page only fetches the next `max_concurrent_pages` pages
+        next(events)
+        time.sleep(0.1)
+        assert mock.call_count == 1 + client.max_concurrent_pages + 1
+        events.close()
+
+
+def test_iter_events_with_missing_results(client):
+    with requests_mock.Mocker() as mock:
+        mock.get(
+            f"{EVENTS_API_PATH}/search/jobs/{JOB_UUID}/events?limit=100&offset=0",
+            json={"items": [{"uuid": f"event-{i}"} for i in range(100)], "total": 200},
+        )
+        mock.get(
+            f"{EVENTS_API_PATH}/search/jobs/{JOB_UUID}/events?limit=100&offset=100",
+            json={"items": [], "total": 200},
+        )
+
+        events = list(client.iter_events(JOB_UUID, page_size=100))
+
+    assert len(events) == 100
+    client.log.assert_called_once()
+    assert client.log.call_args.kwargs["level"] == "error"
+
+
+def test_get_events_page_http_error(client):
+    with requests_mock.Mocker() as mock:
+        mock.get(f"{EVENTS_API_PATH}/search/jobs/{JOB_UUID}/events", status_code=500)
+
+        with pytest.raises(requests.exceptions.HTTPError):
+            client.get_events_page(JOB_UUID, offset=0, limit=100)
+
+    client.log.assert_called_once()